@@ -3,6 +3,7 @@ __description__ = "One-stop solution for AUTO testing."
 
 # import firstly for monkey patch if needed
 from autorunner.ext.locust import main_locusts
+from autorunner.memoize import memoize
 from autorunner.parser import parse_parameters as Parameters
 from autorunner.runner import AutoRunner
 from autorunner.testcase import Config, Step, RunRequest, RunTestCase, RunLocation
@@ -17,5 +18,6 @@ __all__ = [
     "RunRequest",
     "RunTestCase",
     "Parameters",
+    "memoize",
     "Parameters2",
 ]
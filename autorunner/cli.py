@@ -1,17 +1,22 @@
 import argparse
 import enum
+import json
 import os
 import sys
+from typing import Text
 
 import pytest
 from loguru import logger
 
 from autorunner import __description__, __version__
-from autorunner.compat import ensure_cli_args
+from autorunner.compat import ensure_cli_args, get_summary_path
 from autorunner.ext.har2case import init_har2case_parser, main_har2case
 from autorunner.make import init_make_parser, main_make
 from autorunner.scaffold import init_parser_scaffold, main_scaffold
-from autorunner.utils import init_sentry_sdk, ga_client
+from autorunner.scheduler import (GRANULARITY_PARAM, GRANULARITY_TESTCASE,
+                                  parse_workers, run_in_workers)
+from autorunner.utils import (ExtendJSONEncoder, ga_client, init_sentry_sdk,
+                              is_support_multiprocessing)
 
 init_sentry_sdk()
 
@@ -20,11 +25,25 @@ def init_parser_run(subparsers):
     sub_parser_run = subparsers.add_parser(
         "run", help="Make AutoRunner testcases and run with pytest."
     )
+    sub_parser_run.add_argument(
+        "--workers",
+        default=None,
+        help="Specify process count to run testcases, integer or auto for cpu count.",
+    )
+    sub_parser_run.add_argument(
+        "--granularity",
+        choices=[GRANULARITY_TESTCASE, GRANULARITY_PARAM],
+        default=GRANULARITY_TESTCASE,
+        help="Schedule each testcase or each parameter row to workers, default to testcase.",
+    )
     return sub_parser_run
 
 
-def main_run(extra_args) -> enum.IntEnum:
+def main_run(
+        extra_args, workers: Text = None, granularity: Text = GRANULARITY_TESTCASE
+) -> enum.IntEnum:
     ga_client.track_event("RunAPITests", "arun")
+    save_tests = "--save-tests" in extra_args
     # keep compatibility with v2
     extra_args = ensure_cli_args(extra_args)
 
@@ -43,14 +62,42 @@ def main_run(extra_args) -> enum.IntEnum:
         logger.error(f"No valid testcase path in cli arguments: {extra_args}")
         sys.exit(1)
 
-    testcase_path_list = main_make(tests_path_list)
-    if not testcase_path_list:
-        logger.error("No valid testcases found, exit 1.")
-        sys.exit(1)
+    is_native = "--autorunner-native" in extra_args_new
+    if is_native or any(arg.startswith("--parameters-shard") for arg in extra_args_new):
+        # --autorunner-native and --parameters-shard are options of autorunner pytest plugin
+        extra_args_new.extend(["-p", "autorunner.ext.pytest_plugin"])
+
+    if is_native:
+        # collect and run YAML/JSON testcases directly with autorunner pytest plugin
+        testcase_path_list = tests_path_list
+    else:
+        testcase_path_list = main_make(tests_path_list)
+        if not testcase_path_list:
+            logger.error("No valid testcases found, exit 1.")
+            sys.exit(1)
 
     if "--tb=short" not in extra_args_new:
         extra_args_new.append("--tb=short")
 
+    workers = parse_workers(workers)
+    if workers > 1 and is_support_multiprocessing():
+        logger.info(
+            f"start to run tests with pytest in {workers} workers. AutoRunner version: {__version__}"
+        )
+        exit_code, summary = run_in_workers(
+            testcase_path_list, extra_args_new, workers, granularity
+        )
+        if save_tests:
+            summary_path = get_summary_path(tests_path_list[0])
+            os.makedirs(os.path.dirname(summary_path), exist_ok=True)
+            with open(summary_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    summary, f, indent=4, ensure_ascii=False, cls=ExtendJSONEncoder
+                )
+            logger.info(f"generated task summary: {summary_path}")
+
+        return exit_code
+
     extra_args_new.extend(testcase_path_list)
     logger.info(f"start to run tests with pytest. AutoRunner version: {__version__}")
     return pytest.main(extra_args_new)
@@ -113,13 +160,13 @@ def main():
         sys.exit(0)
 
     if sys.argv[1] == "run":
-        sys.exit(main_run(extra_args))
+        sys.exit(main_run(extra_args, args.workers, args.granularity))
     elif sys.argv[1] == "startproject":
         main_scaffold(args)
     elif sys.argv[1] == "har2case":
         main_har2case(args)
     elif sys.argv[1] == "make":
-        main_make(args.testcase_path)
+        main_make(args.testcase_path, args.workers)
 
 
 def main_hrun_alias():
@@ -12,6 +12,8 @@ from requests.exceptions import (
     RequestException,
 )
 
+from autorunner import jsonlib
+from autorunner.logs import is_enabled
 from autorunner.models import RequestData, ResponseData
 from autorunner.models import SessionData, ReqRespData
 from autorunner.utils import lower_dict_keys, omit_long_data
@@ -31,6 +33,9 @@ def get_req_resp_record(resp_obj: Response) -> ReqRespData:
     """
 
     def log_print(req_or_resp, r_type):
+        if not is_enabled("DEBUG"):
+            return
+
         msg = f"\n================== {r_type} details ==================\n"
         for key, value in req_or_resp.dict().items():
             if isinstance(value, dict) or isinstance(value, list):
@@ -46,11 +51,9 @@ def get_req_resp_record(resp_obj: Response) -> ReqRespData:
     request_body = resp_obj.request.body
     if request_body is not None:
         try:
-            request_body = json.loads(request_body)
-        except json.JSONDecodeError:
+            request_body = jsonlib.loads(request_body)
+        except ValueError:
             # str: a=1&b=2
-            pass
-        except UnicodeDecodeError:
             # bytes/bytearray: request body in protobuf
             pass
         except TypeError:
@@ -83,8 +86,8 @@ def get_req_resp_record(resp_obj: Response) -> ReqRespData:
         response_body = resp_obj.content
     else:
         try:
-            # try to record json data
-            response_body = resp_obj.json()
+            # try to record json data, decoded body is shared with ResponseObject
+            response_body = jsonlib.get_response_json(resp_obj)
         except ValueError:
             # only record at most 512 text charactors
             resp_text = resp_obj.text
@@ -183,7 +186,7 @@ class HttpSession(requests.Session):
             client_ip, client_port = response.raw._connection.sock.getsockname()
             self.data.address.client_ip = client_ip
             self.data.address.client_port = client_port
-            logger.debug(f"client IP: {client_ip}, Port: {client_port}")
+            logger.debug("client IP: {}, Port: {}", client_ip, client_port)
         except Exception:
             pass
 
@@ -191,7 +194,7 @@ class HttpSession(requests.Session):
             server_ip, server_port = response.raw._connection.sock.getpeername()
             self.data.address.server_ip = server_ip
             self.data.address.server_port = server_port
-            logger.debug(f"server IP: {server_ip}, Port: {server_port}")
+            logger.debug("server IP: {}, Port: {}", server_ip, server_port)
         except Exception:
             pass
 
@@ -215,9 +218,10 @@ class HttpSession(requests.Session):
             logger.error(f"{str(ex)}")
         else:
             logger.info(
-                f"status_code: {response.status_code}, "
-                f"response_time(ms): {response_time_ms} ms, "
-                f"response_length: {content_size} bytes"
+                "status_code: {}, response_time(ms): {} ms, response_length: {} bytes",
+                response.status_code,
+                response_time_ms,
+                content_size,
             )
 
         return response
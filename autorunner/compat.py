@@ -163,6 +163,7 @@ def _sort_step_by_custom_order(step: Dict) -> Dict:
         "validate",
         "validate_script",
         "sql",
+        "wait_until",
     ]
     return sort_dict_by_custom_order(step, custom_order)
 
@@ -206,6 +207,9 @@ def _ensure_step_attachment(step: Dict) -> Dict:
     if "sql" in step:
         test_dict["sql"] = step["sql"]
 
+    if "wait_until" in step:
+        test_dict["wait_until"] = step["wait_until"]
+
     return test_dict
 
 
@@ -311,55 +315,44 @@ import json
 import os
 import time
 
-import pytest
 from loguru import logger
 
-from autorunner.utils import get_platform, ExtendJSONEncoder
+from autorunner.scheduler import (
+    WORKER_ENV_NAME,
+    build_tests_summary,
+    get_testcase_summaries,
+)
+from autorunner.utils import ExtendJSONEncoder
+
+
+start_at = time.time()
 
 
-@pytest.fixture(scope="session", autouse=True)
-def session_fixture(request):
-    """setup and teardown each task"""
+def pytest_sessionstart(session):
+    """setup each task"""
+    global start_at
     logger.info(f"start running testcases ...")
 
     start_at = time.time()
 
-    yield
-
-    logger.info(f"task finished, generate task summary for --save-tests")
 
-    summary = {
-        "success": True,
-        "stat": {
-            "testcases": {"total": 0, "success": 0, "fail": 0},
-            "teststeps": {"total": 0, "failures": 0, "successes": 0},
-        },
-        "time": {"start_at": start_at, "duration": time.time() - start_at},
-        "platform": get_platform(),
-        "details": [],
-    }
+def pytest_sessionfinish(session):
+    """teardown each task, hooks work for both pytest files and YAML/JSON testcases"""
+    if os.getenv(WORKER_ENV_NAME) == "true":
+        # summary of all workers is merged and dumped by main process
+        return
 
-    for item in request.node.items:
-        testcase_summary = item.instance.get_summary()
-        summary["success"] &= testcase_summary.success
+    if session.config.option.collectonly:
+        # nothing has run in collecting
+        return
 
-        summary["stat"]["testcases"]["total"] += 1
-        summary["stat"]["teststeps"]["total"] += len(testcase_summary.step_datas)
-        if testcase_summary.success:
-            summary["stat"]["testcases"]["success"] += 1
-            summary["stat"]["teststeps"]["successes"] += len(
-                testcase_summary.step_datas
-            )
-        else:
-            summary["stat"]["testcases"]["fail"] += 1
-            summary["stat"]["teststeps"]["successes"] += (
-                len(testcase_summary.step_datas) - 1
-            )
-            summary["stat"]["teststeps"]["failures"] += 1
+    logger.info(f"task finished, generate task summary for --save-tests")
 
-        testcase_summary_json = testcase_summary.dict()
-        testcase_summary_json["records"] = testcase_summary_json.pop("step_datas")
-        summary["details"].append(testcase_summary_json)
+    summary = build_tests_summary(
+        get_testcase_summaries(session.items),
+        start_at,
+        time.time() - start_at,
+    )
 
     summary_path = r"{{SUMMARY_PATH_PLACEHOLDER}}"
     summary_dir = os.path.dirname(summary_path)
@@ -372,9 +365,29 @@ def session_fixture(request):
 
 '''
 
+    project_meta = load_project_meta(test_path)
+    conftest_path = os.path.join(project_meta.RootDir, "conftest.py")
+
+    summary_path = get_summary_path(test_path)
+    conftest_content = conftest_content.replace(
+        "{{SUMMARY_PATH_PLACEHOLDER}}", summary_path
+    )
+
+    dir_path = os.path.dirname(conftest_path)
+    if not os.path.exists(dir_path):
+        os.makedirs(dir_path)
+
+    with open(conftest_path, "w", encoding="utf-8") as f:
+        f.write(conftest_content)
+
+    logger.info("generated conftest.py to generate summary.json")
+
+
+def get_summary_path(test_path: Text) -> Text:
+    """ get summary.json path of --save-tests for test file/folder path
+    """
     project_meta = load_project_meta(test_path)
     project_root_dir = project_meta.RootDir
-    conftest_path = os.path.join(project_root_dir, "conftest.py")
 
     test_path = os.path.abspath(test_path)
     logs_dir_path = os.path.join(project_root_dir, "logs")
@@ -389,19 +402,7 @@ def session_fixture(request):
         test_file_name, _ = os.path.splitext(test_file)
         dump_file_name = f"{test_file_name}.summary.json"
 
-    summary_path = os.path.join(file_foder_path, dump_file_name)
-    conftest_content = conftest_content.replace(
-        "{{SUMMARY_PATH_PLACEHOLDER}}", summary_path
-    )
-
-    dir_path = os.path.dirname(conftest_path)
-    if not os.path.exists(dir_path):
-        os.makedirs(dir_path)
-
-    with open(conftest_path, "w", encoding="utf-8") as f:
-        f.write(conftest_content)
-
-    logger.info("generated conftest.py to generate summary.json")
+    return os.path.join(file_foder_path, dump_file_name)
 
 
 def ensure_path_sep(path: Text) -> Text:
@@ -3,3 +3,7 @@
 # @time   :2024/10/28 14:49
 # @Author : liangchunhua
 # @Desc   : 数据库
+
+from autorunner.dbcore.cache import query_cache
+from autorunner.dbcore.engine import (DBEngine, dispose_engines, get_engine,
+                                      get_pool_stats)
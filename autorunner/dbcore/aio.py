@@ -0,0 +1,247 @@
+""" asyncio version of DBEngine based on SQLAlchemy asyncio, run statements of datasources concurrently.
+
+In async runner, engines are got in running loop and awaited directly
+
+    db = get_async_engine("mysql+pymysql://...")
+    rows = await db.fetchall("select id from orders where order_no = :order_no", {"order_no": no})
+
+In sync code, coroutines are run in one managed loop of background thread
+
+    async def query(url):
+        return await get_async_engine(url).fetchall("select status from orders")
+
+    results = run_concurrently([query(url) for url in datasource_urls])
+
+Datasource urls with sync drivers are converted to async drivers, e.g. mysql+pymysql to mysql+aiomysql.
+"""
+
+import asyncio
+import atexit
+import sys
+import threading
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Text, Tuple, TypeVar, Union
+
+from loguru import logger
+from sqlalchemy.engine import make_url
+
+from autorunner.dbcore.cache import query_cache
+from autorunner.dbcore.engine import (get_bind_params, get_pool_options,
+                                      get_statement, project_columns)
+
+try:
+    # greenlet is required by sqlalchemy asyncio
+    import greenlet  # noqa: F401
+    from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+    AIO_DB_READY = True
+except ModuleNotFoundError:
+    AIO_DB_READY = False
+
+T = TypeVar("T")
+
+""" async drivers of sync datasource urls
+"""
+ASYNC_DRIVERS = {
+    "mysql": "aiomysql",
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
+
+""" async engines keyed by loop and datasource url, connections can not be shared between loops
+"""
+async_engines_mapping: Dict[Tuple[int, Text], "AsyncDBEngine"] = {}
+async_engines_lock = threading.Lock()
+
+managed_loop: Union[asyncio.AbstractEventLoop, None] = None
+managed_loop_lock = threading.Lock()
+
+
+def ensure_aio_db_ready():
+    if AIO_DB_READY:
+        return
+
+    msg = """
+    async database dependencies uninstalled, install first and try again.
+    install with pip:
+    $ pip install greenlet aiomysql
+
+    or you can install autorunner with optional async database dependencies:
+    $ pip install "autorunner[async-db]"
+    """
+    logger.error(msg)
+    sys.exit(1)
+
+
+def get_async_url(db_uri: Text) -> Text:
+    """ convert datasource url with sync driver to async driver
+    """
+    url = make_url(db_uri)
+    if url.get_dialect().is_async:
+        return db_uri
+
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f'数据源不支持异步查询：{backend}，请确认！')
+
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(
+        hide_password=False
+    )
+
+
+class AsyncDBEngine(object):
+    """ async version of DBEngine, results are in the same format as DBEngine
+    """
+
+    def __init__(self, db_uri: Text, **engine_options):
+        ensure_aio_db_ready()
+        self.__engine: "AsyncEngine" = create_async_engine(
+            get_async_url(db_uri), **engine_options
+        )
+        # same as DBEngine of db_uri, thus cached query results of datasource are invalidated
+        self.__datasource = make_url(db_uri).render_as_string(hide_password=True)
+
+    @property
+    def datasource(self) -> Text:
+        return self.__datasource
+
+    async def fetchall(
+            self, query: Text, params: Dict = None, cache: bool = False, cache_ttl: float = None
+    ) -> Union[List[Dict], Dict, None]:
+        """
+        cache: cache results of SELECT query by statement and bound params, same as DBEngine
+        cache_ttl: seconds to keep cached results, kept in whole run if None
+        """
+        if not cache or query.strip().upper()[:6] != "SELECT":
+            return await self.__fetchall(query, params)
+
+        _, bind_names = get_statement(query, params is not None)
+        bind_params = get_bind_params(bind_names, params)
+        return await query_cache.fetch_async(
+            self.__datasource,
+            query,
+            bind_params,
+            lambda: self.__fetchall(query, None if params is None else bind_params),
+            cache_ttl,
+        )
+
+    async def __fetchall(
+            self, query: Text, params: Dict = None
+    ) -> Union[List[Dict], Dict, None]:
+        statement, bind_names = get_statement(query, params is not None)
+        async with self.__engine.connect() as conn:
+            result = await conn.execute(statement, get_bind_params(bind_names, params))
+            if query.strip().upper()[:6] == "SELECT":
+                rows = [row._asdict() for row in result.fetchall()]
+                return rows or None
+
+            await conn.commit()
+            query_cache.invalidate(self.__datasource)
+            if query.strip().upper()[:6] in ("UPDATE", "DELETE", "INSERT"):
+                return {"count": result.rowcount}
+
+    async def executemany(self, query: Text, params_list: List[Dict]) -> int:
+        if not params_list:
+            return 0
+
+        statement, bind_names = get_statement(query)
+        async with self.__engine.connect() as conn:
+            result = await conn.execute(
+                statement, [get_bind_params(bind_names, params) for params in params_list]
+            )
+            await conn.commit()
+
+        query_cache.invalidate(self.__datasource)
+        return result.rowcount
+
+    async def iter_rows(
+            self,
+            query: Text,
+            batch_size: int = 1000,
+            columns: List[Text] = None,
+            params: Dict = None,
+    ) -> AsyncIterator[Dict]:
+        """ stream rows of query with server-side cursor, same as DBEngine.iter_rows
+        """
+        statement, bind_names = get_statement(query, params is not None)
+        async with self.__engine.connect() as conn:
+            result = await conn.stream(
+                statement,
+                get_bind_params(bind_names, params),
+                execution_options={"yield_per": batch_size},
+            )
+            async for row in result:
+                yield project_columns(row._asdict(), columns)
+
+    async def dispose(self):
+        await self.__engine.dispose()
+
+
+def get_async_engine(db_uri: Text) -> AsyncDBEngine:
+    """ get async engine of datasource url in running loop
+    """
+    key = (id(asyncio.get_running_loop()), db_uri)
+    with async_engines_lock:
+        if key not in async_engines_mapping:
+            async_engines_mapping[key] = AsyncDBEngine(
+                db_uri, **get_pool_options(get_async_url(db_uri))
+            )
+
+        return async_engines_mapping[key]
+
+
+async def dispose_async_engines():
+    """ dispose async engines of running loop
+    """
+    loop_id = id(asyncio.get_running_loop())
+    with async_engines_lock:
+        keys = [key for key in async_engines_mapping if key[0] == loop_id]
+        db_engines = [async_engines_mapping.pop(key) for key in keys]
+
+    for db_engine in db_engines:
+        await db_engine.dispose()
+
+
+def get_managed_loop() -> asyncio.AbstractEventLoop:
+    """ event loop running in background thread, used to run coroutines from sync code
+    """
+    global managed_loop
+    with managed_loop_lock:
+        if managed_loop is None:
+            managed_loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=managed_loop.run_forever, name="autorunner-db-loop", daemon=True
+            ).start()
+
+        return managed_loop
+
+
+def run_sync(coro: Awaitable[T], timeout: float = None) -> T:
+    """ run coroutine in managed loop and wait for result
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, get_managed_loop())
+    return future.result(timeout)
+
+
+async def gather(aws: List[Awaitable]) -> List[Any]:
+    return list(await asyncio.gather(*aws))
+
+
+def run_concurrently(aws: List[Awaitable], timeout: float = None) -> List[Any]:
+    """ run awaitables concurrently in managed loop, results are in the same order
+    """
+    return run_sync(gather(aws), timeout)
+
+
+def close_managed_loop():
+    global managed_loop
+    with managed_loop_lock:
+        loop, managed_loop = managed_loop, None
+
+    if loop is None:
+        return
+
+    asyncio.run_coroutine_threadsafe(dispose_async_engines(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+
+
+atexit.register(close_managed_loop)
@@ -0,0 +1,198 @@
+""" cache results of idempotent SELECT queries, e.g. configuration and enum tables.
+
+Enabled for each sql of step explicitly, queries are cached by datasource, statement and bound params.
+
+    sql:
+      - datasource: MYSQL_DB
+        cache: true
+        cache_ttl: 60
+        dml:
+          - select value from sys_config where code = :code
+
+Cached results are dropped when a new testcase run starts, and all results of a datasource
+are dropped once insert/update/delete is executed on it. Queries in rollback mode are not cached,
+changes in transaction are not visible to other runs.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Hashable, List, Text, Tuple, Union
+
+from autorunner.models import QueryCacheStat
+
+# max count of query results kept in cache
+QUERY_CACHE_MAXSIZE = 1024
+
+# results with more rows are not cached
+QUERY_CACHE_MAX_ROWS = 10000
+
+
+class QueryResultCache(object):
+    """ bounded LRU cache for query results, keyed by datasource, statement and bound params
+    """
+
+    def __init__(
+            self, maxsize: int = QUERY_CACHE_MAXSIZE, max_rows: int = QUERY_CACHE_MAX_ROWS
+    ):
+        self.maxsize = maxsize
+        self.max_rows = max_rows
+        # key => (expire_at, rows)
+        self.__entries: OrderedDict = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+        self.__invalidations = 0
+        # generation is increased once results are invalidated or cleared, results fetched before
+        # that are not stored, e.g. the datasource is changed by other thread in fetching
+        self.__generation = 0
+        self.__cleared_at = 0
+        self.__invalidated_at: Dict[Text, int] = {}
+
+    @staticmethod
+    def __make_key(
+            datasource: Text, query: Text, params: Dict
+    ) -> Union[Hashable, None]:
+        key = (datasource, query.strip(), tuple(sorted(params.items())))
+        try:
+            hash(key)
+        except TypeError:
+            # unhashable params, e.g. list or dict
+            return None
+
+        return key
+
+    def fetch(
+            self,
+            datasource: Text,
+            query: Text,
+            params: Dict,
+            fetch_func: Callable[[], Union[List[Dict], None]],
+            ttl: Union[float, None] = None,
+    ) -> Union[List[Dict], None]:
+        """ get cached rows of query, rows are fetched with fetch_func and cached if missed
+
+        Args:
+            datasource: datasource of engine
+            query: select statement
+            params: bound params of statement
+            fetch_func: function to fetch rows
+            ttl: seconds to keep rows, kept in whole run if None
+
+        """
+        key = self.__make_key(datasource, query, params)
+        if key is None:
+            return fetch_func()
+
+        hit, rows, generation = self.__lookup(key)
+        if hit:
+            return rows
+
+        # query outside lock, slow queries should not block other lookups
+        rows = fetch_func()
+        self.__store(key, rows, ttl, generation)
+        return rows
+
+    async def fetch_async(
+            self,
+            datasource: Text,
+            query: Text,
+            params: Dict,
+            fetch_func: Callable[[], Awaitable[Union[List[Dict], None]]],
+            ttl: Union[float, None] = None,
+    ) -> Union[List[Dict], None]:
+        """ same as fetch, rows are fetched with async fetch_func of async engine
+        """
+        key = self.__make_key(datasource, query, params)
+        if key is None:
+            return await fetch_func()
+
+        hit, rows, generation = self.__lookup(key)
+        if hit:
+            return rows
+
+        rows = await fetch_func()
+        self.__store(key, rows, ttl, generation)
+        return rows
+
+    def __lookup(self, key: Hashable) -> Tuple[bool, Union[List[Dict], None], int]:
+        """ returns (hit, rows, generation), expired entry is dropped
+        """
+        now = time.monotonic()
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None:
+                expire_at, rows = entry
+                if expire_at is None or expire_at > now:
+                    self.__entries.move_to_end(key)
+                    self.__hits += 1
+                    # rows are changed by callers, e.g. column projection
+                    rows = [dict(row) for row in rows] if rows is not None else None
+                    return True, rows, self.__generation
+
+                del self.__entries[key]
+
+            self.__misses += 1
+            return False, None, self.__generation
+
+    def __store(
+            self,
+            key: Hashable,
+            rows: Union[List[Dict], None],
+            ttl: Union[float, None],
+            generation: int,
+    ):
+        """ store rows fetched in generation, dropped if invalidated or cleared in fetching
+        """
+        if rows is not None and len(rows) > self.max_rows:
+            return
+
+        expire_at = None if ttl is None else time.monotonic() + ttl
+        with self.__lock:
+            if (
+                    self.__cleared_at > generation
+                    or self.__invalidated_at.get(key[0], 0) > generation
+            ):
+                return
+
+            self.__entries[key] = (
+                expire_at,
+                [dict(row) for row in rows] if rows is not None else None,
+            )
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.maxsize:
+                self.__entries.popitem(last=False)
+
+    def invalidate(self, datasource: Text):
+        """ drop cached results of datasource, called when datasource data is changed
+        """
+        with self.__lock:
+            self.__generation += 1
+            self.__invalidated_at[datasource] = self.__generation
+            keys = [key for key in self.__entries if key[0] == datasource]
+            for key in keys:
+                del self.__entries[key]
+
+            if keys:
+                self.__invalidations += 1
+
+    def clear(self):
+        with self.__lock:
+            self.__generation += 1
+            self.__cleared_at = self.__generation
+            self.__invalidated_at.clear()
+            self.__entries.clear()
+
+    def stat(self) -> QueryCacheStat:
+        with self.__lock:
+            return QueryCacheStat(
+                hits=self.__hits,
+                misses=self.__misses,
+                invalidations=self.__invalidations,
+                size=len(self.__entries),
+            )
+
+
+""" process-wide query results
+"""
+query_cache = QueryResultCache()
@@ -3,26 +3,227 @@
 # @time   :2024/10/29 14:14
 # @Author : liangchunhua
 # @Desc   : 数据库引擎
+import atexit
+import contextvars
 import datetime
+import functools
 import json
+import os
+import threading
 import time
+from typing import Dict, Iterator, List, Text, Tuple, Union
 
-from sqlalchemy import create_engine, text, Row
-from sqlalchemy.orm import sessionmaker, DeclarativeMeta
+from loguru import logger
+from sqlalchemy import create_engine, event, text, Row
+from sqlalchemy.engine import make_url
+from sqlalchemy.sql.elements import TextClause
+from sqlalchemy.orm import Session, sessionmaker, DeclarativeMeta
+from sqlalchemy.pool import QueuePool
+
+from autorunner.dbcore.cache import query_cache
+from autorunner.models import DBPoolStat
+
+""" engines registry keyed by datasource url, connection pools are shared in process
+"""
+engines_mapping: Dict[Text, "DBEngine"] = {}
+engines_lock = threading.Lock()
+
+""" sessions of engines in current rollback scope, each runs in one transaction to be rolled back
+"""
+rollback_sessions: contextvars.ContextVar[Union[Dict["DBEngine", Session], None]] = (
+    contextvars.ContextVar("rollback_sessions", default=None)
+)
+
+
+def get_pool_options(db_uri: Text) -> Dict:
+    """ connection pool options of create_engine, configured with environment variables
+        DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_RECYCLE(seconds, -1 for no recycle), DB_POOL_PRE_PING
+    """
+    options = {
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", 3600)),
+        # compiled statements cache of engine
+        "query_cache_size": int(os.getenv("DB_QUERY_CACHE_SIZE", 500)),
+    }
+
+    url = make_url(db_uri)
+    pool_class = url.get_dialect().get_pool_class(url)
+    if issubclass(pool_class, QueuePool):
+        # size options are not supported by pools like SingletonThreadPool of sqlite memory database
+        options["pool_size"] = int(os.getenv("DB_POOL_SIZE", 5))
+        options["max_overflow"] = int(os.getenv("DB_MAX_OVERFLOW", 10))
+
+    return options
+
+
+def get_engine(db_uri: Text) -> "DBEngine":
+    """ get engine of datasource url, created with pool options at the first time
+    """
+    with engines_lock:
+        if db_uri not in engines_mapping:
+            engines_mapping[db_uri] = DBEngine(db_uri, **get_pool_options(db_uri))
+
+        return engines_mapping[db_uri]
+
+
+def dispose_engines():
+    """ close all pooled connections and clear registry, engines are created again if needed
+    """
+    with engines_lock:
+        for db_engine in engines_mapping.values():
+            db_engine.dispose()
+
+        if engines_mapping:
+            logger.debug(f"disposed {len(engines_mapping)} datasource engines")
+        engines_mapping.clear()
+
+
+def get_pool_stats(since: List[DBPoolStat] = None) -> List[DBPoolStat]:
+    """ get pool stats of registered engines,
+        connects and checkouts are counted from stats in since if specified
+    """
+    since_mapping = {pool_stat.datasource: pool_stat for pool_stat in since or []}
+    with engines_lock:
+        pool_stats = [db_engine.pool_stat() for db_engine in engines_mapping.values()]
+
+    for pool_stat in pool_stats:
+        if pool_stat.datasource in since_mapping:
+            pool_stat.connects -= since_mapping[pool_stat.datasource].connects
+            pool_stat.checkouts -= since_mapping[pool_stat.datasource].checkouts
+
+    return pool_stats
+
+
+def begin_rollback_scope() -> Union[contextvars.Token, None]:
+    """ begin rollback scope, sql of all engines run in transactions until end_rollback_scope.
+        commits of sql are savepoints, changes are visible to later sql in the scope.
+        returns None if already in rollback scope, e.g. referenced testcase
+    """
+    if rollback_sessions.get() is not None:
+        return None
+
+    return rollback_sessions.set({})
+
+
+def in_rollback_scope() -> bool:
+    return rollback_sessions.get() is not None
+
+
+def end_rollback_scope(token: Union[contextvars.Token, None]):
+    """ roll back transactions of all engines used in rollback scope
+    """
+    if token is None:
+        return
+
+    sessions = rollback_sessions.get()
+    rollback_sessions.reset(token)
+    for db_engine, session in sessions.items():
+        db_engine.rollback_session(session)
+
+
+@functools.lru_cache(maxsize=512)
+def get_statement(query: Text, bind: bool = True) -> Tuple[TextClause, Tuple[Text, ...]]:
+    """ get text statement and its bind param names, e.g. :user_id, cached by query.
+        without bind, colons are escaped and query is sent as it is, e.g. '12:30' or ::int cast
+    """
+    if not bind:
+        return text(query.strip().replace(":", "\\:")), ()
+
+    statement = text(query.strip())
+    return statement, tuple(statement.compile().params)
+
+
+def get_bind_params(bind_names: Tuple[Text, ...], variables: Dict = None) -> Dict:
+    """ get values of bind params from variables
+    """
+    variables = variables or {}
+    for name in bind_names:
+        if name not in variables:
+            raise ValueError(f'SQL参数未定义：{name}，请确认！')
+
+    return {name: variables[name] for name in bind_names}
+
+
+def project_columns(row: Dict, columns: List[Text] = None) -> Dict:
+    """ only keep named columns of row, all columns if not specified
+    """
+    if not columns:
+        return row
+
+    try:
+        return {column: row[column] for column in columns}
+    except KeyError as ex:
+        raise ValueError(f'查询结果中不存在字段：{ex}，请确认！')
+
+
+atexit.register(dispose_engines)
 
 
 class DBEngine(object):
-    def __init__(self, db_uri: str):
+    def __init__(self, db_uri: str, **engine_options):
         """
         db_uri = f'mysql+pymysql://{username}:{password}@{host}:{port}/{database}?charset=utf8mb4'
+        engine_options: options of create_engine, e.g. pool_size, pool_recycle
         """
-        engine = create_engine(db_uri)
+        engine = create_engine(db_uri, **engine_options)
+        self.__engine = engine
+        self.__datasource = engine.url.render_as_string(hide_password=True)
+        self.__connects = 0
+        self.__checkouts = 0
+        event.listen(engine, "connect", self.__on_connect)
+        event.listen(engine, "checkout", self.__on_checkout)
+
+        if engine.dialect.name == "sqlite" and engine.dialect.driver == "pysqlite":
+            self.__enable_sqlite_savepoint(engine)
+
         session = sessionmaker(bind=engine)
         from sqlalchemy.orm import scoped_session
         # 多线程
         scoped_session = scoped_session(session)
         self.__session = scoped_session
 
+    def __on_connect(self, dbapi_connection, connection_record):
+        self.__connects += 1
+
+    @staticmethod
+    def __enable_sqlite_savepoint(engine):
+        # pysqlite begins transaction itself and breaks savepoint, emit BEGIN by sqlalchemy instead
+        @event.listens_for(engine, "connect")
+        def do_connect(dbapi_connection, connection_record):
+            dbapi_connection.isolation_level = None
+
+        @event.listens_for(engine, "begin")
+        def do_begin(conn):
+            conn.exec_driver_sql("BEGIN")
+
+    def __get_session(self) -> Session:
+        """ session of current thread, or session in transaction if in rollback scope
+        """
+        sessions = rollback_sessions.get()
+        if sessions is None:
+            return self.__session
+
+        if self not in sessions:
+            conn = self.__engine.connect()
+            conn.begin()
+            # session commits are savepoints released in transaction of connection
+            sessions[self] = Session(bind=conn, join_transaction_mode="create_savepoint")
+
+        return sessions[self]
+
+    def rollback_session(self, session: Session):
+        """ roll back all changes in transaction of rollback session
+        """
+        conn = session.get_bind()
+        session.close()
+        conn.rollback()
+        conn.close()
+        query_cache.invalidate(self.__datasource)
+        logger.debug(f"rolled back transaction of datasource: {self.__datasource}")
+
+    def __on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self.__checkouts += 1
+
     @staticmethod
     def __value_decode(row: dict):
         """
@@ -44,10 +245,15 @@ class DBEngine(object):
                 except ValueError:
                     pass
 
-    def __fetch(self, query: str, size: int = -1, commit: bool = True):
+    def __fetch(self, query: str, size: int = -1, commit: bool = True, params: Dict = None):
         query = query.strip()
-        result = self.__session.execute(text(query))
-        self.__session.commit()
+        statement, bind_names = get_statement(query, params is not None)
+        session = self.__get_session()
+        result = session.execute(statement, get_bind_params(bind_names, params))
+        session.commit()
+        if query.upper()[:6] != "SELECT":
+            # data changed, cached query results of datasource are outdated
+            query_cache.invalidate(self.__datasource)
         if query.upper()[:6] == "SELECT":
             if size < 0:
                 # al = result.fetchall()
@@ -83,14 +289,85 @@ class DBEngine(object):
         except TypeError as err:
             return repr(obj)
 
-    def fetchone(self, query, commit=True):
-        return self.__fetch(query, size=1, commit=commit)
+    def fetchone(self, query, commit=True, params=None):
+        return self.__fetch(query, size=1, commit=commit, params=params)
 
-    def fetchmany(self, query, size=1000, commit=True):
-        return self.__fetch(query=query, size=size, commit=commit)
+    def fetchmany(self, query, size=1000, commit=True, params=None):
+        return self.__fetch(query=query, size=size, commit=commit, params=params)
 
-    def fetchall(self, query, commit=True):
-        return self.__fetch(query=query, size=-1, commit=commit)
+    def fetchall(self, query, commit=True, params=None, cache=False, cache_ttl=None):
+        """
+        cache: cache results of SELECT query by statement and bound params
+        cache_ttl: seconds to keep cached results, kept in whole run if None
+        """
+        if not cache or query.strip().upper()[:6] != "SELECT" or in_rollback_scope():
+            # rows read in rollback transaction may include uncommitted changes, not shared
+            return self.__fetch(query=query, size=-1, commit=commit, params=params)
+
+        _, bind_names = get_statement(query, params is not None)
+        bind_params = get_bind_params(bind_names, params)
+        return query_cache.fetch(
+            self.__datasource,
+            query,
+            bind_params,
+            lambda: self.__fetch(
+                query=query, size=-1, commit=commit, params=None if params is None else bind_params
+            ),
+            cache_ttl,
+        )
+
+    def executemany(self, query: Text, params_list: List[Dict]) -> int:
+        """
+        Execute insert/update/delete once with list of bind params in one round trip,
+        returns count of affected rows.
+        """
+        if not params_list:
+            return 0
+
+        statement, bind_names = get_statement(query)
+        session = self.__get_session()
+        result = session.execute(
+            statement, [get_bind_params(bind_names, params) for params in params_list]
+        )
+        session.commit()
+        query_cache.invalidate(self.__datasource)
+        return result.rowcount
+
+    def iter_rows(
+            self,
+            query: Text,
+            batch_size: int = 1000,
+            columns: List[Text] = None,
+            params: Dict = None,
+    ) -> Iterator[Dict]:
+        """
+        Stream rows of query with server-side cursor, rows are fetched in batches of batch_size,
+        thus large result is never held in memory. Only named columns are kept if columns specified.
+        """
+        statement, bind_names = get_statement(query, params is not None)
+        sessions = rollback_sessions.get()
+        if sessions is not None:
+            # query in transaction, rows changed in rollback scope are visible
+            yield from self.__iter_result(
+                self.__get_session().connection(), statement, bind_names, batch_size, columns, params
+            )
+            return
+
+        with self.__engine.connect() as conn:
+            yield from self.__iter_result(conn, statement, bind_names, batch_size, columns, params)
+
+    @staticmethod
+    def __iter_result(conn, statement, bind_names, batch_size, columns, params) -> Iterator[Dict]:
+        result = conn.execute(
+            statement,
+            get_bind_params(bind_names, params),
+            execution_options={"stream_results": True, "yield_per": batch_size},
+        )
+        if not result.returns_rows:
+            return
+
+        for row in result:
+            yield project_columns(row._asdict(), columns)
 
     def insert(self, query, commit=True):
         return self.__fetch(query=query, commit=commit)
@@ -105,6 +382,26 @@ class DBEngine(object):
         if self.__session:
             self.__session.close()
 
+    def dispose(self):
+        """ close sessions of all threads and connections in pool
+        """
+        self.__session.remove()
+        self.__engine.dispose()
+
+    def pool_stat(self) -> DBPoolStat:
+        pool = self.__engine.pool
+        pool_stat = DBPoolStat(
+            datasource=self.__datasource,
+            connects=self.__connects,
+            checkouts=self.__checkouts,
+        )
+        if isinstance(pool, QueuePool):
+            pool_stat.pool_size = pool.size()
+            pool_stat.checked_out = pool.checkedout()
+            pool_stat.overflow = max(pool.overflow(), 0)
+
+        return pool_stat
+
     def __is_timestamp(value):
         try:
             # 尝试将数据转换为float类型
@@ -0,0 +1,29 @@
+""" asyncio runner extension, run many API testcases concurrently on one event loop.
+
+If you want to use this extension, you should install the following dependencies first.
+
+- aiohttp
+
+Then you can run testcases as below:
+
+    import asyncio
+
+    from autorunner.ext.aio import run_testcases_concurrently
+    from autorunner.loader import load_testcase_file
+
+    testcases = [load_testcase_file(path) for path in testcase_paths]
+    runners = asyncio.run(run_testcases_concurrently(testcases, concurrency=500))
+    summaries = [runner.get_summary() for runner in runners]
+
+Requests are recorded in the same SessionData as AutoRunner, only API teststeps are supported.
+"""
+
+from autorunner.ext.aio.client import AsyncHttpSession, create_connector
+from autorunner.ext.aio.runner import AsyncAutoRunner, run_testcases_concurrently
+
+__all__ = [
+    "AsyncHttpSession",
+    "AsyncAutoRunner",
+    "create_connector",
+    "run_testcases_concurrently",
+]
@@ -0,0 +1,319 @@
+import asyncio
+import datetime
+import ssl
+import sys
+import time
+from http.cookies import SimpleCookie
+from typing import Dict, Text, Union
+
+from loguru import logger
+from requests import PreparedRequest, Request, Response
+from requests.cookies import RequestsCookieJar, cookiejar_from_dict, create_cookie
+from requests.exceptions import (
+    ConnectionError,
+    InvalidURL,
+    ReadTimeout,
+    RequestException,
+)
+from requests.structures import CaseInsensitiveDict
+
+from autorunner.client import ApiResponse, get_req_resp_record
+from autorunner.models import SessionData
+
+try:
+    import aiohttp
+
+    AIO_READY = True
+except ModuleNotFoundError:
+    AIO_READY = False
+
+
+def ensure_aio_ready():
+    if AIO_READY:
+        return
+
+    msg = """
+    async runner extension dependencies uninstalled, install first and try again.
+    install with pip:
+    $ pip install aiohttp
+
+    or you can install autorunner with optional async dependencies:
+    $ pip install "autorunner[async]"
+    """
+    logger.error(msg)
+    sys.exit(1)
+
+
+if AIO_READY:
+
+    class AddressClientResponse(aiohttp.ClientResponse):
+        """ client response with socket addresses of its connection, connection may be released or
+            closed once small response body is read, thus addresses are got when response starts
+        """
+
+        sockname = None
+        peername = None
+
+        async def start(self, connection):
+            transport = connection.transport
+            if transport is not None:
+                self.sockname = transport.get_extra_info("sockname")
+                self.peername = transport.get_extra_info("peername")
+
+            return await super().start(connection)
+
+
+def create_connector(limit: int = 100) -> "aiohttp.TCPConnector":
+    """ create connector to be shared by sessions, limit 0 for no limit of connections
+    """
+    ensure_aio_ready()
+    return aiohttp.TCPConnector(limit=limit)
+
+
+def convert_request(
+        request_info: "aiohttp.RequestInfo", body, original: PreparedRequest
+) -> PreparedRequest:
+    """ convert actual request sent by aiohttp to requests.PreparedRequest, including default headers
+        and cookies added by aiohttp and url of redirection
+    """
+    request = PreparedRequest()
+    request.method = request_info.method
+    request.url = str(request_info.url)
+    request.headers = CaseInsensitiveDict(request_info.headers)
+    request.body = body
+    # cookies of session and request actually sent in Cookie header
+    sent_cookies = SimpleCookie()
+    sent_cookies.load(request.headers.get("Cookie", ""))
+    request._cookies = cookiejar_from_dict(
+        {name: morsel.value for name, morsel in sent_cookies.items()}
+    )
+    return request
+
+
+def convert_cookies(client_resp: "aiohttp.ClientResponse") -> RequestsCookieJar:
+    """ convert cookies set by response, domain, path and secure are kept as requests.Response
+    """
+    cookie_jar = RequestsCookieJar()
+    for name, morsel in client_resp.cookies.items():
+        cookie_jar.set_cookie(create_cookie(
+            name,
+            morsel.value,
+            domain=morsel["domain"] or client_resp.url.host or "",
+            path=morsel["path"] or "/",
+            secure=bool(morsel["secure"]),
+        ))
+
+    return cookie_jar
+
+
+def convert_response(
+        client_resp: "aiohttp.ClientResponse",
+        content: bytes,
+        request: PreparedRequest,
+        elapsed: float,
+) -> Response:
+    """ convert aiohttp response to requests.Response, thus it can be used as sync response
+    """
+    resp = Response()
+    resp.status_code = client_resp.status
+    resp.reason = client_resp.reason
+    resp.headers = CaseInsensitiveDict(client_resp.headers)
+    resp.url = str(client_resp.url)
+    resp.encoding = client_resp.get_encoding() if content else None
+    resp.cookies = convert_cookies(client_resp)
+    resp.elapsed = datetime.timedelta(seconds=elapsed)
+    resp.request = request
+    resp._content = content
+    return resp
+
+
+class AsyncHttpSession(object):
+    """
+    Async version of autorunner.client.HttpSession based on aiohttp.
+    Requests are prepared with requests, thus request data are encoded in the same way,
+    response is converted to requests.Response and recorded in the same SessionData.
+
+    One session keeps cookies of one testcase, sessions can share one connector to reuse connections.
+    Cookies are kept in aiohttp cookie jar, thus they are sent to matched domain and path only,
+    and cookies set in redirection are sent to the next hop, same as requests.Session.
+    """
+
+    def __init__(self, connector: "aiohttp.BaseConnector" = None):
+        ensure_aio_ready()
+        self.data = SessionData()
+        self.__connector = connector
+        self.__client: Union["aiohttp.ClientSession", None] = None
+        # unsafe to accept cookies of IP address hosts, e.g. test servers in local network
+        self.__cookie_jar = aiohttp.CookieJar(unsafe=True)
+
+    def __get_client(self) -> "aiohttp.ClientSession":
+        # client should be created in running event loop
+        if self.__client is None or self.__client.closed:
+            self.__client = aiohttp.ClientSession(
+                connector=self.__connector,
+                connector_owner=self.__connector is None,
+                cookie_jar=self.__cookie_jar,
+                response_class=AddressClientResponse,
+            )
+
+        return self.__client
+
+    async def close(self):
+        if self.__client is not None and not self.__client.closed:
+            await self.__client.close()
+
+    async def __aenter__(self) -> "AsyncHttpSession":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    @staticmethod
+    def __get_ssl(verify: Union[bool, Text]) -> Union[bool, ssl.SSLContext]:
+        if isinstance(verify, Text):
+            # CA_BUNDLE path
+            return ssl.create_default_context(cafile=verify)
+
+        return bool(verify)
+
+    async def request(self, method, url, name=None, **kwargs) -> Response:
+        """
+        Constructs and sends a request in the same arguments as autorunner.client.HttpSession.request,
+        returns requests.Response object.
+        """
+        self.data = SessionData()
+
+        # timeout default to 120 seconds
+        timeout = kwargs.pop("timeout", 120)
+        allow_redirects = kwargs.pop("allow_redirects", True)
+        verify = kwargs.pop("verify", True)
+        kwargs.pop("stream", None)
+
+        # request cookies override session cookies of cookie jar, same as requests.Session
+        cookies = dict(kwargs.pop("cookies", None) or {})
+
+        data = kwargs.pop("data", None)
+        if hasattr(data, "to_string"):
+            # MultipartEncoder in upload test
+            data = data.to_string()
+
+        request = Request(
+            method=method.upper(),
+            url=url,
+            data=data,
+            **kwargs,
+        ).prepare()
+
+        start_timestamp = time.time()
+        response = await self._send_request_safe_mode(
+            request, timeout, allow_redirects, self.__get_ssl(verify), cookies
+        )
+        response_time_ms = round((time.time() - start_timestamp) * 1000, 2)
+
+        # get length of the response content
+        content_size = int(dict(response.headers).get("content-length") or 0)
+
+        # record the consumed time
+        self.data.stat.response_time_ms = response_time_ms
+        self.data.stat.elapsed_ms = response.elapsed.microseconds / 1000.0
+        self.data.stat.content_size = content_size
+
+        # record request and response histories, include 30X redirection
+        response_list = response.history + [response]
+        self.data.req_resps = [
+            get_req_resp_record(resp_obj) for resp_obj in response_list
+        ]
+
+        try:
+            response.raise_for_status()
+        except RequestException as ex:
+            logger.error(f"{str(ex)}")
+        else:
+            logger.info(
+                "status_code: {}, response_time(ms): {} ms, response_length: {} bytes",
+                response.status_code,
+                response_time_ms,
+                content_size,
+            )
+
+        return response
+
+    async def _send_request_safe_mode(
+            self,
+            request: PreparedRequest,
+            timeout: float,
+            allow_redirects: bool,
+            ssl_option: Union[bool, ssl.SSLContext],
+            cookies: Dict = None,
+    ) -> Response:
+        """
+        Send a prepared request, and catch any exception that might occur due to connection problems.
+        """
+        start_timestamp = time.time()
+        try:
+            async with self.__get_client().request(
+                    request.method,
+                    request.url,
+                    headers=dict(request.headers),
+                    data=request.body,
+                    cookies=cookies or None,
+                    allow_redirects=allow_redirects,
+                    ssl=ssl_option,
+                    timeout=aiohttp.ClientTimeout(total=timeout),
+            ) as client_resp:
+                self.__record_address(client_resp)
+                content = await client_resp.read()
+                elapsed = time.time() - start_timestamp
+        except aiohttp.InvalidURL as ex:
+            raise InvalidURL(str(ex))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as ex:
+            # asyncio.TimeoutError is not builtin TimeoutError before Python 3.11
+            resp = ApiResponse()
+            resp.error = (
+                ReadTimeout(str(ex))
+                if isinstance(ex, asyncio.TimeoutError)
+                else ConnectionError(str(ex))
+            )
+            resp.status_code = 0  # with this status_code, content returns None
+            resp.request = request
+            return resp
+
+        # record actual request of each response, body is dropped once redirected without 307/308
+        body = request.body
+        response_history = []
+        for history_resp in client_resp.history:
+            response_history.append(convert_response(
+                history_resp, b"", convert_request(history_resp.request_info, body, request), elapsed
+            ))
+            if history_resp.status not in (307, 308):
+                body = None
+
+        response = convert_response(
+            client_resp, content, convert_request(client_resp.request_info, body, request), elapsed
+        )
+        response.history = response_history
+        return response
+
+    def __record_address(self, client_resp: "aiohttp.ClientResponse"):
+        sockname = getattr(client_resp, "sockname", None)
+        peername = getattr(client_resp, "peername", None)
+        if not sockname or not peername:
+            return
+
+        client_ip, client_port = sockname[:2]
+        self.data.address.client_ip = client_ip
+        self.data.address.client_port = client_port
+        server_ip, server_port = peername[:2]
+        self.data.address.server_ip = server_ip
+        self.data.address.server_port = server_port
+        logger.debug(
+            "client IP: {}, Port: {}, server IP: {}, Port: {}",
+            client_ip,
+            client_port,
+            server_ip,
+            server_port,
+        )
+
+    @property
+    def cookies(self) -> Dict:
+        return {morsel.key: morsel.value for morsel in self.__cookie_jar}
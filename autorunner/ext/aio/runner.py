@@ -0,0 +1,368 @@
+import asyncio
+import os
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Text, Union
+
+from loguru import logger
+
+from autorunner import exceptions
+from autorunner.exceptions import ParamsError, ValidationFailure
+from autorunner.ext.aio.client import (AsyncHttpSession, create_connector,
+                                       ensure_aio_ready)
+from autorunner.loader import load_project_meta, load_testcase_file
+from autorunner.memoize import function_cache
+from autorunner.models import (
+    FunctionCacheStat,
+    ProjectMeta,
+    StepData,
+    StepTypeEnum,
+    TConfig,
+    TestCase,
+    TestCaseInOut,
+    TestCaseSummary,
+    TestCaseTime,
+    TStep,
+    VariablesMapping,
+)
+from autorunner.plan import compile_testcase
+from autorunner.response import ResponseObject
+from autorunner.steps import (WaitUntilBackoff, call_hooks, extract_variables,
+                              get_export_variables, get_ref_testcase_path,
+                              log_req_resp_details, parse_config,
+                              parse_step_variables, prepare_request)
+
+
+class AsyncAutoRunner(object):
+    """ run API testcases on asyncio event loop, many testcases can be run concurrently in one thread.
+        testcase semantics are the same as AutoRunner, including variables, hooks, extract,
+        validate, wait_until and referenced testcases. SQL and UI steps are not supported,
+        and parallel_steps is rejected as testcases are run concurrently instead.
+
+    Examples:
+        >>> runner = await AsyncAutoRunner().run_testcase(testcase_obj)
+        >>> runners = await run_testcases_concurrently([testcase_obj1, testcase_obj2], concurrency=100)
+
+    """
+
+    def __init__(self):
+        self.success: bool = False
+        self.__config: Union[TConfig, None] = None
+        self.__teststeps: List[TStep] = []
+        self.__project_meta: Union[ProjectMeta, None] = None
+        self.__case_id: Text = ""
+        self.__export: List[Text] = []
+        self.__step_datas: List[StepData] = []
+        self.__session: Union[AsyncHttpSession, None] = None
+        self.__session_variables: VariablesMapping = {}
+        self.__start_at: float = 0
+        self.__duration: float = 0
+        self.__function_cache_stat: FunctionCacheStat = FunctionCacheStat()
+        self.__is_reference: bool = False
+
+    def with_project_meta(self, project_meta: ProjectMeta) -> "AsyncAutoRunner":
+        self.__project_meta = project_meta
+        return self
+
+    def with_session(self, session: AsyncHttpSession) -> "AsyncAutoRunner":
+        self.__session = session
+        return self
+
+    def with_case_id(self, case_id: Text) -> "AsyncAutoRunner":
+        self.__case_id = case_id
+        return self
+
+    def with_is_reference(self, is_reference: bool) -> "AsyncAutoRunner":
+        self.__is_reference = is_reference
+        return self
+
+    def with_variables(self, variables: VariablesMapping) -> "AsyncAutoRunner":
+        self.__session_variables = variables
+        return self
+
+    def with_export(self, export: List[Text]) -> "AsyncAutoRunner":
+        self.__export = export
+        return self
+
+    async def __run_step_request(self, step: TStep) -> StepData:
+        """run teststep: request"""
+        step_data = StepData(name=step.name)
+
+        # parse request and call setup hooks
+        method, url, parsed_request_dict = prepare_request(
+            step, self.__config, self.__project_meta.functions, self.__case_id
+        )
+
+        # request
+        resp = await self.__session.request(method, url, **parsed_request_dict)
+        resp_obj = ResponseObject(resp)
+        step.variables["response"] = resp_obj
+
+        # teardown hooks
+        if step.teardown_hooks:
+            call_hooks(
+                step.teardown_hooks, step.variables, "teardown request", self.__project_meta.functions
+            )
+
+        # extract
+        extract_mapping = extract_variables(step, resp_obj, self.__project_meta.functions)
+        step_data.export_vars = extract_mapping
+
+        # validate
+        session_success = False
+        try:
+            resp_obj.validate(
+                step.validators, step.variables, self.__project_meta.functions
+            )
+            session_success = True
+        except ValidationFailure:
+            log_req_resp_details(method, url, parsed_request_dict, resp)
+            # log testcase duration before raise ValidationFailure
+            self.__duration = time.time() - self.__start_at
+            raise
+        finally:
+            self.success = session_success
+            step_data.success = session_success
+
+            # save request & response meta data
+            self.__session.data.success = session_success
+            self.__session.data.validators = resp_obj.validation_results
+            step_data.data = self.__session.data
+
+        return step_data
+
+    async def __run_step_testcase(self, step: TStep) -> StepData:
+        """run teststep: referenced testcase"""
+        step_data = StepData(name=step.name)
+        step_variables = step.variables
+
+        # setup hooks
+        if step.setup_hooks:
+            call_hooks(
+                step.setup_hooks, step_variables, "setup testcase", self.__project_meta.functions
+            )
+
+        if hasattr(step.testcase, "config") and hasattr(step.testcase, "teststeps"):
+            # testcase class in chain style
+            ref_testcase_obj = step.testcase().raw_testcase
+        elif isinstance(step.testcase, Text):
+            ref_testcase_path = get_ref_testcase_path(step, self.__project_meta)
+            if not os.path.isfile(ref_testcase_path):
+                raise exceptions.ParamsError(
+                    f"Invalid testcase path: {ref_testcase_path}"
+                )
+
+            ref_testcase_obj = load_testcase_file(ref_testcase_path)
+        else:
+            raise exceptions.ParamsError(
+                f"Invalid teststep referenced testcase: {step.dict()}"
+            )
+
+        case_result = await (
+            AsyncAutoRunner()
+            .with_project_meta(self.__project_meta)
+            .with_session(self.__session)
+            .with_case_id(self.__case_id)
+            .with_is_reference(True)
+            .with_variables(step_variables)
+            .with_export(step.export)
+            .run_testcase(ref_testcase_obj)
+        )
+
+        # teardown hooks
+        if step.teardown_hooks:
+            call_hooks(
+                step.teardown_hooks, step.variables, "teardown testcase", self.__project_meta.functions
+            )
+
+        step_data.data = case_result.get_step_datas()  # list of step data
+        step_data.export_vars = case_result.get_export_variables()
+        step_data.success = case_result.success
+        self.success = case_result.success
+
+        if step_data.export_vars:
+            logger.info("export variables: {}", step_data.export_vars)
+
+        return step_data
+
+    async def __run_step(self, step: TStep) -> StepData:
+        """run teststep, teststep maybe a request or referenced testcase"""
+        logger.info("run step begin: {} >>>>>>", step.name)
+        if step.step_type != StepTypeEnum.API or step.sql or step.location:
+            raise ParamsError(
+                f"only API teststep is supported in async runner: {step.name}"
+            )
+
+        if step.request:
+            step_data = await self.__run_step_request(step)
+        elif step.testcase:
+            step_data = await self.__run_step_testcase(step)
+        else:
+            raise ParamsError(
+                f"teststep is neither a request nor a referenced testcase: {step.dict()}"
+            )
+
+        logger.info("run step end: {} <<<<<<\n", step.name)
+        return step_data
+
+    async def __run_step_until(
+            self, step: TStep, extracted_variables: VariablesMapping
+    ) -> StepData:
+        """ prepare and run step, if wait_until configured, step is prepared and run again
+            with backoff until validators pass, same as AutoRunner but waiting without blocking loop.
+        """
+        wait_until = step.wait_until
+        if not wait_until or not step.request:
+            parse_step_variables(
+                step, extracted_variables, self.__config, self.__project_meta.functions
+            )
+            return await self.__run_step(step)
+
+        # variables are prepared in each attempt, thus functions are called again
+        raw_variables = step.variables
+        backoff = WaitUntilBackoff(wait_until)
+        while True:
+            backoff.attempts += 1
+            step.variables = dict(raw_variables)
+            try:
+                parse_step_variables(
+                    step, extracted_variables, self.__config, self.__project_meta.functions
+                )
+                step_data = await self.__run_step(step)
+                break
+            except ValidationFailure:
+                delay = backoff.next_delay(step)
+                if delay is None:
+                    raise
+
+                await asyncio.sleep(delay)
+
+        step_data.attempts = backoff.attempts
+        step_data.wait_seconds = round(backoff.wait_seconds, 3)
+        return step_data
+
+    async def run_testcase(self, testcase: TestCase) -> "AsyncAutoRunner":
+        """run specified testcase
+
+        Examples:
+            >>> testcase_obj = TestCase(config=TConfig(...), teststeps=[TStep(...)])
+            >>> await AsyncAutoRunner().with_project_meta(project_meta).run_testcase(testcase_obj)
+
+        """
+        # config and teststeps of this run are copied from compiled plan, skipped steps excluded
+        plan = compile_testcase(testcase)
+        self.__config = plan.new_config()
+        self.__teststeps = plan.new_teststeps()
+
+        if self.__config.parallel_steps > 1:
+            # testcases are run concurrently in async runner instead of steps of one testcase
+            raise ParamsError(
+                f"parallel_steps is not supported in async runner: {self.__config.name}"
+            )
+
+        # prepare
+        self.__project_meta = self.__project_meta or load_project_meta(
+            self.__config.path
+        )
+        self.__case_id = self.__case_id or str(uuid.uuid4())
+        own_session = self.__session is None
+        self.__session = self.__session or AsyncHttpSession()
+        # save extracted variables of teststeps
+        extracted_variables: VariablesMapping = {}
+        # memoized calls are counted in this run, each task of concurrent runs has its own context
+        function_cache_token = function_cache.begin_run()
+
+        try:
+            parse_config(self.__config, self.__session_variables, self.__project_meta.functions)
+            self.__start_at = time.time()
+            self.__step_datas = []
+            # run teststeps
+            for step in self.__teststeps:
+                step_data = await self.__run_step_until(step, extracted_variables)
+                self.__step_datas.append(step_data)
+                # save extracted variables to session variables
+                extracted_variables.update(step_data.export_vars)
+        finally:
+            self.__function_cache_stat = function_cache.end_run(function_cache_token)
+            if own_session:
+                await self.__session.close()
+
+        self.__session_variables.update(extracted_variables)
+        self.__duration = time.time() - self.__start_at
+        return self
+
+    async def run_path(self, path: Text) -> "AsyncAutoRunner":
+        if not os.path.isfile(path):
+            raise exceptions.ParamsError(f"Invalid testcase path: {path}")
+
+        testcase_obj = load_testcase_file(path)
+        return await self.run_testcase(testcase_obj)
+
+    def get_step_datas(self) -> List[StepData]:
+        return self.__step_datas
+
+    def get_export_variables(self) -> Dict:
+        # override testcase export vars with step export
+        export_var_names = self.__export or self.__config.export
+        return get_export_variables(export_var_names, self.__session_variables)
+
+    def get_summary(self) -> TestCaseSummary:
+        """get testcase result summary"""
+        return TestCaseSummary(
+            name=self.__config.name,
+            success=self.success,
+            case_id=self.__case_id,
+            time=TestCaseTime(
+                start_at=self.__start_at,
+                start_at_iso_format=datetime.utcfromtimestamp(
+                    self.__start_at
+                ).isoformat(),
+                duration=self.__duration,
+            ),
+            in_out=TestCaseInOut(
+                config_vars=self.__config.variables,
+                export_vars=self.get_export_variables(),
+            ),
+            step_datas=self.__step_datas,
+            function_cache=self.__function_cache_stat,
+        )
+
+
+async def run_testcases_concurrently(
+        testcases: List[TestCase],
+        concurrency: int = 100,
+        connector_limit: int = None,
+) -> List[Union[AsyncAutoRunner, BaseException]]:
+    """ run testcases concurrently on current event loop, each testcase has its own cookies session,
+        connections are pooled in one shared connector.
+
+    Args:
+        testcases: testcases to run, testcase models are not changed in running
+        concurrency: max count of testcases running at the same time
+        connector_limit: max count of connections, default to concurrency
+
+    Returns:
+        list: finished runner or raised exception of each testcase, in the same order as testcases
+
+    """
+    ensure_aio_ready()
+
+    semaphore = asyncio.Semaphore(concurrency)
+    connector = create_connector(
+        connector_limit if connector_limit is not None else concurrency
+    )
+
+    async def run_one(testcase: TestCase) -> AsyncAutoRunner:
+        async with semaphore:
+            async with AsyncHttpSession(connector) as session:
+                return await AsyncAutoRunner().with_session(session).run_testcase(
+                    testcase
+                )
+
+    try:
+        return await asyncio.gather(
+            *[run_one(testcase) for testcase in testcases], return_exceptions=True
+        )
+    finally:
+        await connector.close()
@@ -21,7 +21,7 @@ import inspect
 import os
 from typing import List
 
-from loguru import logger
+from autorunner.logs import set_console_level
 
 
 """ converted pytest files from YAML/JSON testcases
@@ -74,8 +74,7 @@ def main_locusts():
     ga_client.track_event("RunLoadTests", "locust")
 
     # avoid print too much log details in console
-    logger.remove()
-    logger.add(sys.stderr, level="WARNING")
+    set_console_level("WARNING")
 
     sys.argv[0] = "locust"
     if len(sys.argv) == 1:
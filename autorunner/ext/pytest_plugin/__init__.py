@@ -0,0 +1,244 @@
+""" pytest plugin to collect and run YAML/JSON testcases directly, without making pytest files.
+
+Enable with command line option or ini option, e.g.
+
+    $ pytest --autorunner-native testcases/
+    $ arun --autorunner-native testcases/
+
+    # pytest.ini
+    [pytest]
+    autorunner_native = true
+
+testcase/testsuite files are loaded and validated in collection, each testcase
+(each parameter row if parameters are configured) is collected as one test item
+and run with AutoRunner.start_testcase. Referenced testcases are run by path.
+
+Parameter rows can be split into deterministic shards, e.g. run the first of four shards on one machine
+
+    $ arun --parameters-shard 0/4 testcases/
+
+rows of native testcases are sharded in collection, rows of made pytest files are deselected.
+
+The plugin is installed for every pytest session with pytest11 entry point, its hooks do nothing
+unless native collection or parameters shard is enabled.
+"""
+
+import copy
+import os
+from typing import Dict, Iterator, List, Text, Union
+
+import pytest
+from loguru import logger
+
+from autorunner import exceptions
+from autorunner.compat import convert_variables, ensure_testcase_v3, ensure_testcase_v3_api
+from autorunner.dbcore.engine import dispose_engines
+from autorunner.loader import load_test_file, load_testcase
+from autorunner.make import load_testsuite_testcases
+from autorunner.models import TestCase
+from autorunner.parser import parse_parameters, parse_parameters_shard
+from autorunner.runner import AutoRunner
+from autorunner.scheduler import WORKER_ENV_NAME
+from autorunner.utils import get_shard_range
+
+TEST_FILE_SUFFIXES = (".yml", ".yaml", ".json")
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("autorunner")
+    group.addoption(
+        "--autorunner-native",
+        action="store_true",
+        default=None,
+        help="collect and run YAML/JSON testcases directly, without making pytest files.",
+    )
+    group.addoption(
+        "--parameters-shard",
+        action="store",
+        default=None,
+        help="only run the i-th of n deterministic shards of parameter rows, in format i/n, e.g. 0/4.",
+    )
+    parser.addini(
+        "autorunner_native",
+        type="bool",
+        default=False,
+        help="collect and run YAML/JSON testcases directly, without making pytest files.",
+    )
+
+
+def is_native_enabled(config) -> bool:
+    enabled = config.getoption("autorunner_native")
+    if enabled is None:
+        enabled = config.getini("autorunner_native")
+
+    return bool(enabled)
+
+
+def is_plugin_enabled(config) -> bool:
+    """ native collection or parameters shard enabled, other pytest sessions are not changed
+    """
+    return is_native_enabled(config) or bool(config.getoption("parameters_shard"))
+
+
+def pytest_collect_file(file_path, parent):
+    if file_path.suffix.lower() not in TEST_FILE_SUFFIXES:
+        return None
+
+    if not is_native_enabled(parent.config):
+        return None
+
+    return NativeTestFile.from_parent(parent, path=file_path)
+
+
+def pytest_sessionfinish(session):
+    if not is_plugin_enabled(session.config):
+        return
+
+    if os.getenv(WORKER_ENV_NAME) == "true":
+        # pools are reused by later units run in the same worker process
+        return
+
+    # datasource engines are shared by testcases in session, close pooled connections at the end
+    dispose_engines()
+
+
+def pytest_configure(config):
+    shard = config.getoption("parameters_shard")
+    if not shard:
+        return
+
+    try:
+        get_shard_range(0, *parse_parameters_shard(shard))
+    except exceptions.ParamsError as ex:
+        raise pytest.UsageError(f"--parameters-shard: {ex}")
+
+
+def pytest_collection_modifyitems(config, items):
+    # made pytest files are only changed with explicit --parameters-shard
+    shard = config.getoption("parameters_shard")
+    if not shard:
+        return
+
+    shard_index, shard_count = parse_parameters_shard(shard)
+
+    # parameter rows of each test function in made pytest files
+    rows_mapping: Dict[Text, List[pytest.Item]] = {}
+    for item in items:
+        callspec = getattr(item, "callspec", None)
+        if callspec is None or "param" not in callspec.params:
+            continue
+
+        rows_mapping.setdefault(item.nodeid.split("[", 1)[0], []).append(item)
+
+    deselected = []
+    for rows in rows_mapping.values():
+        shard_range = get_shard_range(len(rows), shard_index, shard_count)
+        deselected.extend(
+            row for index, row in enumerate(rows) if index not in shard_range
+        )
+
+    if deselected:
+        deselected_ids = {id(item) for item in deselected}
+        items[:] = [item for item in items if id(item) not in deselected_ids]
+        config.hook.pytest_deselected(items=deselected)
+
+
+def load_native_testcases(test_file: Text) -> List[Dict]:
+    """ load testcase dicts in v3 format from testcase/testsuite file, empty if not a test file
+    """
+    test_content = load_test_file(test_file)
+    if not isinstance(test_content, Dict):
+        return []
+
+    # api in v2 format, convert to v3 testcase
+    if "request" in test_content and "name" in test_content:
+        test_content = ensure_testcase_v3_api(test_content)
+
+    if not isinstance(test_content.get("config"), Dict):
+        return []
+
+    test_content["config"]["path"] = test_file
+
+    if "teststeps" in test_content:
+        testcases = [test_content]
+    elif "testcases" in test_content:
+        testcases = load_testsuite_testcases(test_content)
+    else:
+        return []
+
+    return [ensure_testcase_v3(testcase) for testcase in testcases]
+
+
+class NativeTestFile(pytest.File):
+    """ YAML/JSON testcase/testsuite file
+    """
+
+    def collect(self) -> Iterator["NativeTestItem"]:
+        test_file = str(self.path)
+        try:
+            testcases = load_native_testcases(test_file)
+        except (exceptions.FileNotFound, exceptions.FileFormatError) as ex:
+            logger.warning(f"Invalid test file: {test_file}\n{type(ex).__name__}: {ex}")
+            return
+
+        if not testcases:
+            logger.debug(f"not testcase/testsuite file, skip collecting: {test_file}")
+            return
+
+        for testcase in testcases:
+            testcase_path = testcase["config"]["path"]
+            testcase["config"]["variables"] = convert_variables(
+                testcase["config"].get("variables", {}), testcase_path
+            )
+            testcase_obj = load_testcase(testcase)
+
+            name = testcase_obj.config.name
+            if len(testcases) > 1:
+                # testcases in testsuite, name with referenced testcase file
+                name = f"{name}({os.path.basename(testcase_path)})"
+
+            parameters = testcase_obj.config.parameters
+            if not parameters:
+                yield NativeTestItem.from_parent(self, name=name, testcase=testcase_obj)
+                continue
+
+            if isinstance(parameters, Text):
+                raise exceptions.ParamsError(
+                    f"Invalid parameters format: {parameters}, should be dict"
+                )
+
+            # rows of other shards are not merged at all
+            rows = parse_parameters(
+                parameters, shard=self.config.getoption("parameters_shard")
+            )
+            for index, param in enumerate(rows):
+                yield NativeTestItem.from_parent(
+                    self, name=f"{name}[{index}]", testcase=testcase_obj, param=param
+                )
+
+
+class NativeTestItem(pytest.Item):
+    """ one testcase run, or one parameter row of testcase with parameters
+    """
+
+    def __init__(
+            self, *, testcase: TestCase, param: Union[Dict, None] = None, **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.testcase = testcase
+        self.param = param
+        self.runner: Union[AutoRunner, None] = None
+
+    @property
+    def instance(self) -> Union[AutoRunner, None]:
+        """ runner of this item, used to get summary as pytest files made from testcase
+        """
+        return self.runner
+
+    def runtest(self):
+        self.runner = AutoRunner()
+        # testcase models are not changed in running, parameter rows share one compiled plan
+        self.runner.start_testcase(self.testcase, copy.deepcopy(self.param))
+
+    def reportinfo(self):
+        return self.path, None, f"testcase: {self.name}"
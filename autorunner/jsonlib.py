@@ -0,0 +1,117 @@
+""" json decoding of responses, body of each response is decoded only once.
+
+Decoded body is cached on the response object and shared by the request/response record and
+ResponseObject used by extractors and validators:
+
+    body = get_response_json(resp)  # decoded, raise ValueError if body is not json
+    body = get_response_json(resp)  # cached
+
+Faster json backend is used if installed, orjson first and then ujson, or set with env
+JSON_BACKEND=orjson/ujson/json. Bodies rejected by the fast backend, e.g. NaN or integers
+beyond 64-bit, are decoded with the standard json again.
+"""
+
+import json
+import os
+from typing import Any, Text, Union
+
+from loguru import logger
+from requests import Response
+
+try:
+    import orjson
+
+    ORJSON_READY = True
+except ModuleNotFoundError:
+    ORJSON_READY = False
+
+try:
+    import ujson
+
+    UJSON_READY = True
+except ModuleNotFoundError:
+    UJSON_READY = False
+
+# attribute of response to cache decoded body or decoding error
+RESPONSE_JSON_ATTR = "_autorunner_json"
+
+# encodings decoded from bytes directly by all backends
+UTF8_ENCODINGS = ("utf-8", "utf8")
+
+
+def get_json_backend() -> Text:
+    backend = os.getenv("JSON_BACKEND", "").strip().lower()
+    if backend == "orjson" and ORJSON_READY:
+        return "orjson"
+    elif backend == "ujson" and UJSON_READY:
+        return "ujson"
+    elif backend == "json":
+        return "json"
+    elif backend:
+        logger.warning("json backend {} unavailable, select automatically", backend)
+
+    if ORJSON_READY:
+        return "orjson"
+    elif UJSON_READY:
+        return "ujson"
+    else:
+        return "json"
+
+
+JSON_BACKEND = get_json_backend()
+
+
+def loads(content: Union[Text, bytes, bytearray]) -> Any:
+    """ decode json with fast backend, raise ValueError if content is not valid json
+    """
+    if JSON_BACKEND == "orjson":
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
+            # NaN/Infinity or big integers are supported by standard json only
+            pass
+    elif JSON_BACKEND == "ujson":
+        try:
+            return ujson.loads(content)
+        except ValueError:
+            pass
+
+    return json.loads(content)
+
+
+def decode_response_json(resp_obj: Response) -> Any:
+    """ decode json body of response, same as Response.json() with fast backend
+    """
+    content = resp_obj.content
+    if not content:
+        raise ValueError("response body is empty")
+
+    encoding = (resp_obj.encoding or "utf-8").lower()
+    if encoding in UTF8_ENCODINGS:
+        # bytes are decoded by backend without building text
+        return loads(content)
+
+    return loads(resp_obj.text)
+
+
+def get_response_json(resp_obj: Response) -> Any:
+    """ decoded json body of response, cached on response thus decoded only once
+
+    Raises:
+        ValueError: response body is not json, raised again when called again
+
+    """
+    cached = getattr(resp_obj, RESPONSE_JSON_ATTR, None)
+    if cached is None:
+        try:
+            cached = (True, decode_response_json(resp_obj))
+        except ValueError as ex:
+            cached = (False, ex)
+
+        setattr(resp_obj, RESPONSE_JSON_ATTR, cached)
+
+    is_json, value = cached
+    if not is_json:
+        raise value
+
+    return value
@@ -1,29 +1,235 @@
 import csv
+import hashlib
+import hmac
 import importlib
 import json
 import os
+import pickle
 import re
 import sys
 import types
-from typing import Callable, Dict, List, Text, Tuple, Union
+from typing import Any, Callable, Dict, List, Set, Text, Tuple, Union
 
+import pydantic
 import yaml
 from loguru import logger
 from pydantic import ValidationError
 
-from autorunner import builtin, exceptions, utils
+from autorunner import __version__, builtin, exceptions, utils
 from autorunner.exceptions import ParamsError
-from autorunner.models import ProjectMeta, TestCase, TestSuite
+from autorunner.models import FunctionsMapping, ProjectMeta, TestCase, TestSuite
 
 project_meta: Union[ProjectMeta, None] = None
 
+""" functions available without debugtalk.py, built once on first use
+"""
+builtin_functions_registry: Union[FunctionsMapping, None] = None
+
+try:
+    # libyaml C loader is much faster than the pure-Python one
+    from yaml import CFullLoader as YamlLoader
+except ImportError:
+    from yaml import FullLoader as YamlLoader
+
+""" loaded test file contents and validated testcases are cached in this folder under project RootDir,
+    keyed by file content hash, set DISABLE_TESTCASE_CACHE=true to disable
+"""
+TESTCASE_CACHE_DIR_NAME = ".autorunner_cache"
+
+""" format version of cache files, cache files of other versions are dropped
+"""
+TESTCASE_CACHE_VERSION = "1"
+
+""" max count of cache files in cache folder, least recently used files are pruned
+"""
+TESTCASE_CACHE_MAXSIZE = 2048
+
+""" secret to sign cache files, kept in user home instead of project, thus cache files copied from
+    other machines or committed to repository are not unpickled
+"""
+TESTCASE_CACHE_SECRET_NAME = os.path.join(".autorunner", "cache_secret")
+testcase_cache_secret: Union[bytes, None] = None
+
+""" cache folders pruned in this process, each folder is pruned once
+"""
+testcase_cache_pruned_dirs: Set[Text] = set()
+
+
+def _get_cache_secret(create: bool = False) -> Union[bytes, None]:
+    """ get secret to sign cache files, None if not available.
+        secret is created only to dump cache, cache is disabled if user home is not writable.
+    """
+    global testcase_cache_secret
+    if testcase_cache_secret is not None:
+        return testcase_cache_secret or None
+
+    home_dir = os.path.expanduser("~")
+    if home_dir == "~" or not os.path.isabs(home_dir):
+        # user home unknown, secret is not created in current directory
+        testcase_cache_secret = b""
+        return None
+
+    secret_path = os.path.join(home_dir, TESTCASE_CACHE_SECRET_NAME)
+    secret = b""
+    try:
+        if os.path.isfile(secret_path):
+            with open(secret_path, mode="rb") as f:
+                secret = f.read()
+        elif not create:
+            # nothing cached before, try again once cache is dumped
+            return None
+        else:
+            os.makedirs(os.path.dirname(secret_path), exist_ok=True)
+            try:
+                fd = os.open(secret_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            except FileExistsError:
+                with open(secret_path, mode="rb") as f:
+                    secret = f.read()
+            else:
+                secret = os.urandom(32)
+                with os.fdopen(fd, mode="wb") as f:
+                    f.write(secret)
+    except OSError as ex:
+        logger.debug(f"failed to get testcase cache secret {secret_path}, cache disabled: {ex}")
+
+    # secret may be partially written by other process, cache is disabled in this process
+    testcase_cache_secret = secret if len(secret) >= 32 else b""
+    return testcase_cache_secret or None
+
+
+def _sign_cache(secret: bytes, cache_key: Text, content: bytes) -> Text:
+    return hmac.new(
+        secret, f"{TESTCASE_CACHE_VERSION}:{cache_key}:".encode("utf-8") + content, hashlib.sha256
+    ).hexdigest()
+
+
+def _get_cache_path(test_file: Text, cache_type: Text) -> Union[Text, None]:
+    """ get cache file path for test file content under project RootDir,
+        None if cache is disabled, project meta not loaded or file not readable
+    """
+    if os.getenv("DISABLE_TESTCASE_CACHE") == "true" or project_meta is None:
+        return None
+
+    try:
+        with open(test_file, mode="rb") as f:
+            content = f.read()
+    except OSError:
+        return None
+
+    content_hash = hashlib.sha1(
+        f"{__version__}:{pydantic.VERSION}:{cache_type}:".encode("utf-8") + content
+    ).hexdigest()
+
+    return os.path.join(
+        project_meta.RootDir, TESTCASE_CACHE_DIR_NAME, f"{content_hash}.{cache_type}.pickle"
+    )
+
+
+def _load_cache(cache_path: Union[Text, None]) -> Any:
+    """ load cached object, None if missed.
+        cache file is unpickled only if its version, key and signature are valid, otherwise removed
+    """
+    if not cache_path or not os.path.isfile(cache_path):
+        return None
+
+    secret = _get_cache_secret()
+    if secret is None:
+        return None
+
+    try:
+        with open(cache_path, mode="rb") as f:
+            header = f.readline()
+            content = f.read()
+    except OSError as ex:
+        logger.debug(f"failed to load testcase cache {cache_path}: {ex}")
+        return None
+
+    # header: version:key:signature
+    cache_key = os.path.basename(cache_path)
+    header_items = header.decode("utf-8", errors="replace").rstrip("\n").split(":")
+    if (
+            len(header_items) != 3
+            or header_items[0] != TESTCASE_CACHE_VERSION
+            or header_items[1] != cache_key
+            or not hmac.compare_digest(header_items[2], _sign_cache(secret, cache_key, content))
+    ):
+        logger.debug(f"invalid testcase cache {cache_path}, remove it")
+        try:
+            os.remove(cache_path)
+        except OSError:
+            pass
+        return None
+
+    try:
+        obj = pickle.loads(content)
+        # recently used cache files are kept in pruning
+        os.utime(cache_path)
+        return obj
+    except Exception as ex:
+        logger.debug(f"failed to load testcase cache {cache_path}: {ex}")
+        return None
+
+
+def _prune_cache(cache_dir: Text):
+    """ remove least recently used cache files beyond max size, each folder is pruned once in process
+    """
+    if cache_dir in testcase_cache_pruned_dirs:
+        return
+
+    testcase_cache_pruned_dirs.add(cache_dir)
+    cache_files = []
+    for file_name in os.listdir(cache_dir):
+        if not file_name.endswith(".pickle"):
+            continue
+
+        file_path = os.path.join(cache_dir, file_name)
+        try:
+            cache_files.append((os.path.getmtime(file_path), file_path))
+        except OSError:
+            continue
+
+    if len(cache_files) <= TESTCASE_CACHE_MAXSIZE:
+        return
+
+    cache_files.sort(reverse=True)
+    for _, file_path in cache_files[TESTCASE_CACHE_MAXSIZE:]:
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
+
+
+def _dump_cache(cache_path: Union[Text, None], obj: Any):
+    if not cache_path:
+        return
+
+    secret = _get_cache_secret(create=True)
+    if secret is None:
+        return
+
+    try:
+        content = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+        cache_key = os.path.basename(cache_path)
+        header = f"{TESTCASE_CACHE_VERSION}:{cache_key}:{_sign_cache(secret, cache_key, content)}\n"
+        cache_dir = os.path.dirname(cache_path)
+        os.makedirs(cache_dir, exist_ok=True)
+        # write to temp file first, avoid reading partial cache in other processes
+        temp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temp_path, mode="wb") as f:
+            f.write(header.encode("utf-8"))
+            f.write(content)
+        os.replace(temp_path, cache_path)
+        _prune_cache(cache_dir)
+    except Exception as ex:
+        logger.debug(f"failed to dump testcase cache {cache_path}: {ex}")
+
 
 def _load_yaml_file(yaml_file: Text) -> Dict:
     """ load yaml file and check file content format
     """
     with open(yaml_file, mode="rb") as stream:
         try:
-            yaml_content = yaml.load(stream, Loader=yaml.FullLoader)
+            yaml_content = yaml.load(stream, Loader=YamlLoader)
         except yaml.YAMLError as ex:
             err_msg = f"YAMLError:\nfile: {yaml_file}\nerror: {ex}"
             logger.error(err_msg)
@@ -46,10 +252,15 @@ def _load_json_file(json_file: Text) -> Dict:
 
 
 def load_test_file(test_file: Text) -> Dict:
-    """load testcase/testsuite file content"""
+    """load testcase/testsuite file content, unchanged file content is loaded from cache"""
     if not os.path.isfile(test_file):
         raise exceptions.FileNotFound(f"test file not exists: {test_file}")
 
+    cache_path = _get_cache_path(test_file, "content")
+    test_file_content = _load_cache(cache_path)
+    if test_file_content is not None:
+        return test_file_content
+
     file_suffix = os.path.splitext(test_file)[1].lower()
     if file_suffix == ".json":
         test_file_content = _load_json_file(test_file)
@@ -61,6 +272,7 @@ def load_test_file(test_file: Text) -> Dict:
             f"testcase/testsuite file should be YAML/JSON format, invalid format file: {test_file}"
         )
 
+    _dump_cache(cache_path, test_file_content)
     return test_file_content
 
 
@@ -76,10 +288,19 @@ def load_testcase(testcase: Dict) -> TestCase:
 
 
 def load_testcase_file(testcase_file: Text) -> TestCase:
-    """load testcase file and validate with pydantic model"""
-    testcase_content = load_test_file(testcase_file)
-    # testcase_content = convert_location_to_obj_list(testcase_content)
-    testcase_obj = load_testcase(testcase_content)
+    """load testcase file and validate with pydantic model,
+    validated testcase of unchanged file is unpickled from cache without validation again"""
+    if not os.path.isfile(testcase_file):
+        raise exceptions.FileNotFound(f"test file not exists: {testcase_file}")
+
+    cache_path = _get_cache_path(testcase_file, "testcase")
+    testcase_obj = _load_cache(cache_path)
+    if not isinstance(testcase_obj, TestCase):
+        testcase_content = load_test_file(testcase_file)
+        # testcase_content = convert_location_to_obj_list(testcase_content)
+        testcase_obj = load_testcase(testcase_content)
+        _dump_cache(cache_path, testcase_obj)
+
     testcase_obj.config.path = testcase_file
     return testcase_obj
 
@@ -283,6 +504,54 @@ def load_builtin_functions() -> Dict[Text, Callable]:
     return load_module_functions(builtin)
 
 
+def load_builtin_functions_registry() -> FunctionsMapping:
+    """ load autorunner functions which can be referenced without debugtalk.py/validate.py,
+        the registry is built only once. Python builtin functions are not copied into registry,
+        they are looked up by name only if not found, see parser.get_mapping_function.
+
+        precedence, from high to low:
+            autorunner extensions: parameterize/P, environ/ENV, multipart_encoder/multipart_content_type
+            autorunner builtin functions and comparators
+    """
+    global builtin_functions_registry
+    if builtin_functions_registry is not None:
+        return builtin_functions_registry
+
+    # extension for upload test
+    from autorunner.ext import uploader
+
+    registry = dict(load_builtin_functions())
+    registry.update(
+        {
+            "parameterize": load_csv_file,
+            "P": load_csv_file,
+            "environ": utils.get_os_environ,
+            "ENV": utils.get_os_environ,
+            "multipart_encoder": uploader.multipart_encoder,
+            "multipart_content_type": uploader.multipart_content_type,
+        }
+    )
+
+    builtin_functions_registry = registry
+    return builtin_functions_registry
+
+
+def build_functions_registry(project_functions: FunctionsMapping) -> FunctionsMapping:
+    """ merge project functions over builtin functions registry into one mapping,
+        functions defined in debugtalk.py/validate.py have the highest precedence.
+
+    Args:
+        project_functions: functions loaded from debugtalk.py and validate.py
+
+    Returns:
+        dict: functions registry, name lookup needs no more fallback
+
+    """
+    functions_registry = dict(load_builtin_functions_registry())
+    functions_registry.update(project_functions)
+    return functions_registry
+
+
 def locate_file(start_path: Text, file_name: Text) -> Text:
     """ locate filename and return absolute file path.
         searching will be recursive upward until system root dir.
@@ -507,8 +776,9 @@ def load_project_meta(test_path: Text, reload: bool = False) -> ProjectMeta:
     debugtalk_functions.update(validate_functions)
 
     # locate project RootDir and load debugtalk.py functions
+    # functions registry is rebuilt only when project meta is reloaded
     project_meta.RootDir = project_root_directory
-    project_meta.functions = debugtalk_functions
+    project_meta.functions = build_functions_registry(debugtalk_functions)
     project_meta.debugtalk_path = debugtalk_path
 
     return project_meta
@@ -0,0 +1,133 @@
+""" logging helpers for hot paths.
+
+Messages of requests, responses and validators are costly to build, build them only if
+some sink handles the level:
+
+    if is_enabled("DEBUG"):
+        logger.debug(build_costly_message())
+
+    # or formatted by loguru only if handled
+    logger.info("status_code: {}", resp.status_code)
+
+Debug details of each testcase run are written to its own log file by one enqueued sink,
+files are written in background thread instead of adding a file sink for each testcase.
+Console sink should be replaced with set_console_level, thus levels of sinks are known:
+
+    set_console_level("WARNING")
+"""
+
+import contextvars
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Dict, IO, Set, Text, Union
+
+from loguru import logger
+
+LOG_FORMAT = "{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name}:{function}:{line} - {message}"
+
+""" level of console sink, loguru writes DEBUG messages to stderr by default
+"""
+console_level: Text = "DEBUG"
+
+""" log path of current testcase run, set in case_log context
+"""
+case_log_path: contextvars.ContextVar[Union[Text, None]] = contextvars.ContextVar(
+    "case_log_path", default=None
+)
+
+
+def is_enabled(level: Text) -> bool:
+    """ whether messages of level are handled by console sink, or by case log sink in case_log context
+    """
+    level_no = logger.level(level).no
+    if case_log_path.get() is not None:
+        # all messages of testcase run are written to its log file
+        return level_no >= logger.level("DEBUG").no
+
+    return level_no >= logger.level(console_level).no
+
+
+class CaseLogSink(object):
+    """ write messages to log file of testcase run, path is bound with logger.contextualize(log_path=...)
+    """
+
+    def __init__(self):
+        self.__files: Dict[Text, IO] = {}
+        self.__paths: Set[Text] = set()
+        self.__lock = threading.Lock()
+
+    def open(self, log_path: Text):
+        with self.__lock:
+            self.__paths.add(log_path)
+
+    def write(self, message):
+        log_path = message.record["extra"]["log_path"]
+        with self.__lock:
+            if log_path not in self.__paths:
+                # messages of threads still running after testcase run ends, file is closed
+                return
+
+            log_file = self.__files.get(log_path)
+            if log_file is None:
+                os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+                log_file = self.__files[log_path] = open(log_path, "a", encoding="utf-8")
+
+            log_file.write(message)
+
+    def close(self, log_path: Text):
+        with self.__lock:
+            self.__paths.discard(log_path)
+            log_file = self.__files.pop(log_path, None)
+
+        if log_file is not None:
+            log_file.close()
+
+
+case_log_sink = CaseLogSink()
+case_log_handler_id: Union[int, None] = None
+case_log_lock = threading.Lock()
+
+
+def set_console_level(level: Text):
+    """ replace all sinks with stderr sink of level, case log sink is added again once needed
+    """
+    global console_level, case_log_handler_id
+    with case_log_lock:
+        logger.remove()
+        case_log_handler_id = None
+        logger.add(sys.stderr, level=level)
+        console_level = level
+
+
+def ensure_case_log_sink():
+    global case_log_handler_id
+    with case_log_lock:
+        if case_log_handler_id is not None:
+            return
+
+        case_log_handler_id = logger.add(
+            case_log_sink.write,
+            level="DEBUG",
+            format=LOG_FORMAT,
+            enqueue=True,
+            filter=lambda record: "log_path" in record["extra"],
+        )
+
+
+@contextmanager
+def case_log(log_path: Text):
+    """ write messages logged in context, including threads started with copied context, to log_path
+    """
+    ensure_case_log_sink()
+    case_log_sink.open(log_path)
+    token = case_log_path.set(log_path)
+    try:
+        with logger.contextualize(log_path=log_path):
+            yield
+    finally:
+        case_log_path.reset(token)
+        # wait for enqueued messages written before closing file
+        logger.complete()
+        case_log_sink.close(log_path)
@@ -1,8 +1,11 @@
+import hashlib
+import json
 import os
 import string
 import subprocess
 import sys
-from typing import Dict, List, Set, Text, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Set, Text, Tuple, Union
 
 import jinja2
 from loguru import logger
@@ -11,9 +14,11 @@ from sentry_sdk import capture_exception
 from autorunner import __version__, exceptions
 from autorunner.compat import (convert_variables, ensure_path_sep,
                                ensure_testcase_v3, ensure_testcase_v3_api)
-from autorunner.loader import (convert_relative_project_root_dir,
+from autorunner.loader import (TESTCASE_CACHE_DIR_NAME,
+                               convert_relative_project_root_dir,
                                load_folder_files, load_project_meta,
                                load_test_file, load_testcase, load_testsuite)
+from autorunner.models import ProjectMeta
 from autorunner.response import uniform_validator
 from autorunner.uicore.element import get_uniform_comparator
 
@@ -28,6 +33,24 @@ pytest_files_made_cache_mapping: Dict[Text, Text] = {}
 """
 pytest_files_run_set: Set = set()
 
+""" digests of pytest files made in this run, including unchanged ones
+"""
+pytest_files_digest_mapping: Dict[Text, Text] = {}
+
+""" pytest files rewritten in this run, only these files need to be formatted
+"""
+pytest_files_rewritten_set: Set = set()
+
+""" make manifest of each project root dir, loaded on demand
+"""
+make_manifest_mapping: Dict[Text, Dict[Text, Dict]] = {}
+
+MAKE_MANIFEST_FILE_NAME = "make_manifest.json"
+
+""" min count of files in one level to make them in process pool
+"""
+MAKE_PARALLEL_MIN_FILES = 16
+
 __TEMPLATE__ = jinja2.Template(
     """# NOTE: Generated By autorunner v{{ version }}
 # FROM: {{ testcase_path }}
@@ -71,6 +94,17 @@ if __name__ == "__main__":
 )
 
 
+
+def __get_template_digest() -> Text:
+    """ generated pytest files depend on template and chain style converters in this module
+    """
+    with open(__file__, mode="rb") as f:
+        return hashlib.sha1(__version__.encode("utf-8") + f.read()).hexdigest()
+
+
+__TEMPLATE_DIGEST__ = __get_template_digest()
+
+
 def __ensure_absolute(path: Text) -> Text:
     if path.startswith("./"):
         # Linux/Darwin, hrun ./test.yml
@@ -135,6 +169,78 @@ def ensure_file_abs_path_valid(file_abs_path: Text) -> Text:
     return new_file_path
 
 
+def __get_testcase_digest(
+        testcase: Dict, testcase_python_abs_path: Text, project_meta: ProjectMeta
+):
+    """ hash testcase content with everything else the generated pytest file depends on,
+        digests of referenced testcases should be updated by caller.
+    """
+    testcase_digest = hashlib.sha1(__TEMPLATE_DIGEST__.encode("utf-8"))
+    testcase_digest.update(project_meta.RootDir.encode("utf-8"))
+    testcase_digest.update(testcase_python_abs_path.encode("utf-8"))
+    testcase_digest.update(
+        json.dumps(testcase, ensure_ascii=False, default=str).encode("utf-8")
+    )
+
+    if isinstance(testcase["config"].get("variables"), Text):
+        # variables are generated by debugtalk.py functions while making
+        testcase_digest.update(project_meta.debugtalk_py.encode("utf-8"))
+
+    return testcase_digest
+
+
+def __get_make_manifest_path(root_dir: Text) -> Union[Text, None]:
+    if os.getenv("DISABLE_TESTCASE_CACHE") == "true":
+        return None
+
+    return os.path.join(root_dir, TESTCASE_CACHE_DIR_NAME, MAKE_MANIFEST_FILE_NAME)
+
+
+def __get_make_manifest(root_dir: Text) -> Dict[Text, Dict]:
+    """ load make manifest of project root dir,
+        pytest file path => {"digest": testcase digest, "class_name": testcase class name}
+    """
+    if root_dir in make_manifest_mapping:
+        return make_manifest_mapping[root_dir]
+
+    manifest = {}
+    manifest_path = __get_make_manifest_path(root_dir)
+    if manifest_path and os.path.isfile(manifest_path):
+        try:
+            with open(manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as ex:
+            logger.debug(f"failed to load make manifest {manifest_path}: {ex}")
+
+    make_manifest_mapping[root_dir] = manifest
+    return manifest
+
+
+def __dump_make_manifest():
+    """ record digests of pytest files made in this run to make manifest
+    """
+    for testcase_python_abs_path, testcase_digest in pytest_files_digest_mapping.items():
+        root_dir = load_project_meta(testcase_python_abs_path).RootDir
+        __get_make_manifest(root_dir)[testcase_python_abs_path] = {
+            "digest": testcase_digest,
+            "class_name": pytest_files_made_cache_mapping[testcase_python_abs_path],
+        }
+
+    for root_dir, manifest in make_manifest_mapping.items():
+        manifest_path = __get_make_manifest_path(root_dir)
+        if not manifest_path:
+            continue
+
+        try:
+            os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+            tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False)
+            os.replace(tmp_path, manifest_path)
+        except OSError as ex:
+            logger.debug(f"failed to dump make manifest {manifest_path}: {ex}")
+
+
 def __ensure_testcase_module(path: Text):
     """ ensure pytest files are in python module, generate __init__.py on demand
     """
@@ -204,7 +310,16 @@ def make_config_chain_style(config: Dict) -> Text:
         config_chain_style += f'.locust_weight({config["weight"]})'
 
     if "datasource" in config:
-        config_chain_style += f".datasource('{config['datasource']}')"
+        if config.get("rollback"):
+            config_chain_style += f".datasource('{config['datasource']}', rollback=True)"
+        else:
+            config_chain_style += f".datasource('{config['datasource']}')"
+
+    if config.get("async_sql"):
+        config_chain_style += ".async_sql()"
+
+    if config.get("parallel_steps"):
+        config_chain_style += f'.parallel_steps({config["parallel_steps"]})'
 
     return config_chain_style
 
@@ -299,6 +414,8 @@ def make_teststep_chain_style(teststep: Dict) -> Text:
 
     if teststep.get("request"):
         step_info += make_request_chain_style(teststep["request"])
+        if teststep.get("wait_until"):
+            step_info += f'.wait_until(**{teststep["wait_until"]})'
     elif teststep.get("location"):
         # 新增ui步骤
         step_info += make_location_chain_style(teststep["location"])
@@ -335,6 +452,16 @@ def make_teststep_chain_style(teststep: Dict) -> Text:
         for sql_data in sql_datas:
             if sql_data['datasource']:
                 step_info += f".datasource('{sql_data['datasource']}')"
+            if sql_data.get('stream'):
+                step_info += f".stream({sql_data.get('batch_size', 1000)})"
+            if sql_data.get('columns'):
+                step_info += f".columns(*{sql_data['columns']})"
+            if sql_data.get('count_as'):
+                step_info += f".count_as('{sql_data['count_as']}')"
+            if sql_data.get('cache'):
+                step_info += f".cache({sql_data.get('cache_ttl')})"
+            if sql_data.get('params'):
+                step_info += f".params({repr(sql_data['params'])})"
             for dml in sql_data['dml']:
                 step_info += f".dml('{dml.strip()}')"
 
@@ -372,13 +499,11 @@ def make_teststep_chain_style(teststep: Dict) -> Text:
 
 
 def make_testcase(testcase: Dict, dir_path: Text = None) -> Text:
-    """convert valid testcase dict to pytest file path"""
+    """convert valid testcase dict to pytest file path,
+    skip rewriting if the testcase and its referenced testcases are unchanged since last make"""
     # ensure compatibility with testcase format v2
     testcase = ensure_testcase_v3(testcase)
 
-    # validate testcase format
-    load_testcase(testcase)
-
     testcase_abs_path = __ensure_absolute(testcase["config"]["path"])
     logger.info(f"start to make testcase: {testcase_abs_path}")
 
@@ -394,10 +519,9 @@ def make_testcase(testcase: Dict, dir_path: Text = None) -> Text:
     if testcase_python_abs_path in pytest_files_made_cache_mapping:
         return testcase_python_abs_path
 
-    config = testcase["config"]
-    config["path"] = convert_relative_project_root_dir(testcase_python_abs_path)
-    config["variables"] = convert_variables(
-        config.get("variables", {}), testcase_abs_path
+    project_meta = load_project_meta(testcase_abs_path)
+    testcase_digest = __get_testcase_digest(
+        testcase, testcase_python_abs_path, project_meta
     )
 
     # prepare reference testcase
@@ -421,6 +545,11 @@ def make_testcase(testcase: Dict, dir_path: Text = None) -> Text:
         test_content.setdefault("config", {})["path"] = ref_testcase_path
         ref_testcase_python_abs_path = make_testcase(test_content)
 
+        # referenced testcase changes will change this testcase
+        testcase_digest.update(
+            pytest_files_digest_mapping[ref_testcase_python_abs_path].encode("utf-8")
+        )
+
         # override testcase export
         ref_testcase_export: List = test_content["config"].get("export", [])
         if ref_testcase_export:
@@ -444,6 +573,33 @@ def make_testcase(testcase: Dict, dir_path: Text = None) -> Text:
         if import_expr not in imports_list:
             imports_list.append(import_expr)
 
+    # digest is recorded once pytest file is made or reused, thus invalid testcase is not recorded
+    testcase_digest = testcase_digest.hexdigest()
+
+    manifest_entry = __get_make_manifest(project_meta.RootDir).get(
+        testcase_python_abs_path
+    )
+    if (
+            manifest_entry
+            and manifest_entry["digest"] == testcase_digest
+            and os.path.isfile(testcase_python_abs_path)
+    ):
+        pytest_files_made_cache_mapping[testcase_python_abs_path] = manifest_entry[
+            "class_name"
+        ]
+        pytest_files_digest_mapping[testcase_python_abs_path] = testcase_digest
+        logger.info(f"testcase unchanged, skip making: {testcase_python_abs_path}")
+        return testcase_python_abs_path
+
+    # validate testcase format
+    load_testcase(testcase)
+
+    config = testcase["config"]
+    config["path"] = convert_relative_project_root_dir(testcase_python_abs_path)
+    config["variables"] = convert_variables(
+        config.get("variables", {}), testcase_abs_path
+    )
+
     testcase_path = convert_relative_project_root_dir(testcase_abs_path)
     # current file compared to ProjectRootDir
     diff_levels = len(testcase_path.split(os.sep))
@@ -471,6 +627,8 @@ def make_testcase(testcase: Dict, dir_path: Text = None) -> Text:
         f.write(content)
 
     pytest_files_made_cache_mapping[testcase_python_abs_path] = testcase_cls_name
+    pytest_files_digest_mapping[testcase_python_abs_path] = testcase_digest
+    pytest_files_rewritten_set.add(testcase_python_abs_path)
     __ensure_testcase_module(testcase_python_abs_path)
 
     logger.info(f"generated testcase: {testcase_python_abs_path}")
@@ -478,8 +636,8 @@ def make_testcase(testcase: Dict, dir_path: Text = None) -> Text:
     return testcase_python_abs_path
 
 
-def make_testsuite(testsuite: Dict):
-    """convert valid testsuite dict to pytest folder with testcases"""
+def load_testsuite_testcases(testsuite: Dict) -> List[Dict]:
+    """validate testsuite and load its testcases, overridden by testsuite config"""
     # validate testsuite format
     load_testsuite(testsuite)
 
@@ -489,14 +647,7 @@ def make_testsuite(testsuite: Dict):
         testsuite_config.get("variables", {}), testsuite_path
     )
 
-    logger.info(f"start to make testsuite: {testsuite_path}")
-
-    # create directory with testsuite file name, put its testcases under this directory
-    testsuite_path = ensure_file_abs_path_valid(testsuite_path)
-    testsuite_dir, file_suffix = os.path.splitext(testsuite_path)
-    # demo_testsuite.yml => demo_testsuite_yml
-    testsuite_dir = f"{testsuite_dir}_{file_suffix.lstrip('.')}"
-
+    testcases = []
     for testcase in testsuite["testcases"]:
         # get referenced testcase content
         testcase_file = testcase["testcase"]
@@ -530,18 +681,32 @@ def make_testsuite(testsuite: Dict):
         if "weight" in testcase:
             testcase_dict["config"]["weight"] = testcase["weight"]
 
+        testcases.append(testcase_dict)
+
+    return testcases
+
+
+def make_testsuite(testsuite: Dict):
+    """convert valid testsuite dict to pytest folder with testcases"""
+    testcases = load_testsuite_testcases(testsuite)
+
+    testsuite_path = testsuite["config"]["path"]
+    logger.info(f"start to make testsuite: {testsuite_path}")
+
+    # create directory with testsuite file name, put its testcases under this directory
+    testsuite_path = ensure_file_abs_path_valid(testsuite_path)
+    testsuite_dir, file_suffix = os.path.splitext(testsuite_path)
+    # demo_testsuite.yml => demo_testsuite_yml
+    testsuite_dir = f"{testsuite_dir}_{file_suffix.lstrip('.')}"
+
+    for testcase_dict in testcases:
         # make testcase
         testcase_pytest_path = make_testcase(testcase_dict, testsuite_dir)
         pytest_files_run_set.add(testcase_pytest_path)
 
 
-def __make(tests_path: Text):
-    """ make testcase(s) with testcase/testsuite/folder absolute path
-        generated pytest file path will be cached in pytest_files_made_cache_mapping
-
-    Args:
-        tests_path: should be in absolute path
-
+def __load_test_files(tests_path: Text) -> List[Text]:
+    """ load testcase/testsuite file paths with testcase/testsuite/folder absolute path
     """
     logger.info(f"make path: {tests_path}")
     test_files = []
@@ -553,95 +718,328 @@ def __make(tests_path: Text):
     else:
         raise exceptions.TestcaseNotFound(f"Invalid tests path: {tests_path}")
 
-    for test_file in test_files:
-        if test_file.lower().endswith("_test.py"):
-            pytest_files_run_set.add(test_file)
-            continue
+    return test_files
+
+
+def __load_test_content(test_file: Text) -> Union[Dict, None]:
+    """ load and check testcase/testsuite file content, None if invalid
+    """
+    try:
+        test_content = load_test_file(test_file)
+    except (exceptions.FileNotFound, exceptions.FileFormatError) as ex:
+        logger.warning(f"Invalid test file: {test_file}\n{type(ex).__name__}: {ex}")
+        return None
+
+    if not isinstance(test_content, Dict):
+        logger.warning(
+            f"Invalid test file: {test_file}\n"
+            f"reason: test content not in dict format."
+        )
+        return None
+
+    # api in v2 format, convert to v3 testcase
+    if "request" in test_content and "name" in test_content:
+        test_content = ensure_testcase_v3_api(test_content)
+
+    if "config" not in test_content:
+        logger.warning(
+            f"Invalid testcase/testsuite file: {test_file}\n"
+            f"reason: missing config part."
+        )
+        return None
+    elif not isinstance(test_content["config"], Dict):
+        logger.warning(
+            f"Invalid testcase/testsuite file: {test_file}\n"
+            f"reason: config should be dict type, got {test_content['config']}"
+        )
+        return None
+
+    # ensure path absolute
+    test_content.setdefault("config", {})["path"] = test_file
+    return test_content
+
+
+def __make_test_file(test_file: Text):
+    """ make single testcase/testsuite file with absolute path
+        generated pytest file path will be cached in pytest_files_made_cache_mapping
+    """
+    if test_file.lower().endswith("_test.py"):
+        pytest_files_run_set.add(test_file)
+        return
 
+    test_content = __load_test_content(test_file)
+    if test_content is None:
+        return
+
+    # testcase
+    if "teststeps" in test_content:
         try:
-            test_content = load_test_file(test_file)
-        except (exceptions.FileNotFound, exceptions.FileFormatError) as ex:
-            logger.warning(f"Invalid test file: {test_file}\n{type(ex).__name__}: {ex}")
-            continue
+            testcase_pytest_path = make_testcase(test_content)
+            pytest_files_run_set.add(testcase_pytest_path)
+        except exceptions.TestCaseFormatError as ex:
+            logger.warning(
+                f"Invalid testcase file: {test_file}\n{type(ex).__name__}: {ex}"
+            )
 
-        if not isinstance(test_content, Dict):
+    # testsuite
+    elif "testcases" in test_content:
+        try:
+            make_testsuite(test_content)
+        except exceptions.TestSuiteFormatError as ex:
             logger.warning(
-                f"Invalid test file: {test_file}\n"
-                f"reason: test content not in dict format."
+                f"Invalid testsuite file: {test_file}\n{type(ex).__name__}: {ex}"
             )
+
+    # invalid format
+    else:
+        logger.warning(
+            f"Invalid test file: {test_file}\n"
+            f"reason: file content is neither testcase nor testsuite"
+        )
+
+
+def __make_ref_testcase_file(ref_testcase_path: Text):
+    """ make referenced testcase file only, same as making it in make_testcase recursively
+    """
+    test_content = load_test_file(ref_testcase_path)
+    if "request" in test_content and "name" in test_content:
+        test_content = ensure_testcase_v3_api(test_content)
+
+    test_content.setdefault("config", {})["path"] = ref_testcase_path
+    make_testcase(test_content)
+
+
+def __get_ref_testcase_paths(test_content: Dict) -> List[Text]:
+    """ get absolute paths of testcases referenced by teststeps, in v2 or v3 format
+    """
+    ref_testcase_paths = []
+    teststeps = test_content.get("teststeps")
+    if not isinstance(teststeps, List):
+        return ref_testcase_paths
+
+    for step in teststeps:
+        if not isinstance(step, Dict) or "request" in step or "location" in step:
             continue
 
-        # api in v2 format, convert to v3 testcase
-        if "request" in test_content and "name" in test_content:
-            test_content = ensure_testcase_v3_api(test_content)
+        ref_testcase = step.get("api") or step.get("testcase")
+        if isinstance(ref_testcase, Text):
+            ref_testcase_paths.append(__ensure_absolute(ref_testcase))
 
-        if "config" not in test_content:
-            logger.warning(
-                f"Invalid testcase/testsuite file: {test_file}\n"
-                f"reason: missing config part."
-            )
+    return ref_testcase_paths
+
+
+def __sort_test_files_by_reference(
+        test_files: List[Text],
+) -> Tuple[List[List[Tuple[Text, bool]]], List[Text]]:
+    """ group test files into levels, testcases in each level only reference testcases
+        in previous levels, thus each level can be made in parallel.
+
+    Returns:
+        tuple: (levels, serial files)
+            each level is a list of (file path, is referenced only), sorted by path.
+            serial files are testsuites and testcases in circular reference,
+            they should be made one by one after all levels.
+
+    """
+    dependencies: Dict[Text, Set[Text]] = {}
+    ref_only_files: Set[Text] = set()
+    serial_files: List[Text] = []
+
+    pending_files = [(test_file, False) for test_file in test_files]
+    for test_file, is_ref_only in pending_files:
+        if test_file in dependencies or test_file in serial_files:
             continue
-        elif not isinstance(test_content["config"], Dict):
-            logger.warning(
-                f"Invalid testcase/testsuite file: {test_file}\n"
-                f"reason: config should be dict type, got {test_content['config']}"
-            )
+
+        if test_file.lower().endswith("_test.py"):
+            dependencies[test_file] = set()
             continue
 
-        # ensure path absolute
-        test_content.setdefault("config", {})["path"] = test_file
-
-        # testcase
-        if "teststeps" in test_content:
-            try:
-                testcase_pytest_path = make_testcase(test_content)
-                pytest_files_run_set.add(testcase_pytest_path)
-            except exceptions.TestCaseFormatError as ex:
-                logger.warning(
-                    f"Invalid testcase file: {test_file}\n{type(ex).__name__}: {ex}"
-                )
-                continue
-
-        # testsuite
-        elif "testcases" in test_content:
-            try:
-                make_testsuite(test_content)
-            except exceptions.TestSuiteFormatError as ex:
-                logger.warning(
-                    f"Invalid testsuite file: {test_file}\n{type(ex).__name__}: {ex}"
+        try:
+            test_content = load_test_file(test_file)
+        except exceptions.MyBaseError:
+            test_content = None
+
+        if is_ref_only and not (
+                isinstance(test_content, Dict)
+                and (
+                        "teststeps" in test_content
+                        or ("request" in test_content and "name" in test_content)
                 )
-                continue
+        ):
+            # invalid referenced testcase, leave it to its referrer to make recursively
+            continue
 
-        # invalid format
-        else:
-            logger.warning(
-                f"Invalid test file: {test_file}\n"
-                f"reason: file content is neither testcase nor testsuite"
-            )
+        if isinstance(test_content, Dict) and "testcases" in test_content:
+            # testsuite overrides config of its testcases, make it at last
+            serial_files.append(test_file)
+            continue
+
+        if is_ref_only:
+            ref_only_files.add(test_file)
+
+        ref_testcase_paths = (
+            __get_ref_testcase_paths(test_content)
+            if isinstance(test_content, Dict)
+            else []
+        )
+        dependencies[test_file] = set(ref_testcase_paths)
+        pending_files.extend((path, True) for path in ref_testcase_paths)
+
+    # referenced only files become normal files if they are also specified
+    ref_only_files -= set(test_files)
+
+    levels = []
+    made_files: Set[Text] = set()
+    remaining_files = set(dependencies)
+    while remaining_files:
+        level = sorted(
+            test_file
+            for test_file in remaining_files
+            if dependencies[test_file] <= made_files
+        )
+        if not level:
+            break
+
+        levels.append([(test_file, test_file in ref_only_files) for test_file in level])
+        made_files.update(level)
+        remaining_files.difference_update(level)
 
+    # circular reference, keep the original recursive making behaviour
+    serial_files.extend(
+        sorted(test_file for test_file in remaining_files if test_file not in ref_only_files)
+    )
+    return levels, serial_files
+
+
+def __make_level_file(test_file: Text, is_ref_only: bool):
+    if is_ref_only:
+        __make_ref_testcase_file(test_file)
+    else:
+        __make_test_file(test_file)
+
+
+def __init_make_worker(
+        made_cache_mapping: Dict[Text, Text], made_digest_mapping: Dict[Text, Text]
+):
+    """ initialize make worker process with pytest files made in previous levels
+    """
+    pytest_files_made_cache_mapping.clear()
+    pytest_files_made_cache_mapping.update(made_cache_mapping)
+    pytest_files_digest_mapping.clear()
+    pytest_files_digest_mapping.update(made_digest_mapping)
+    pytest_files_run_set.clear()
+    pytest_files_rewritten_set.clear()
+
+
+def __make_files_in_worker(
+        level_files: List[Tuple[Text, bool]]
+) -> Tuple[Dict[Text, Text], Dict[Text, Text], List[Text], List[Text]]:
+    """ make files in worker process
 
-def main_make(tests_paths: List[Text]) -> List[Text]:
+    Returns:
+        tuple: (newly made pytest files mapping, newly made pytest files digests,
+            pytest files to run, pytest files rewritten)
+
+    """
+    made_before = set(pytest_files_made_cache_mapping)
+    for test_file, is_ref_only in level_files:
+        __make_level_file(test_file, is_ref_only)
+
+    made_cache_mapping = {
+        path: cls_name
+        for path, cls_name in pytest_files_made_cache_mapping.items()
+        if path not in made_before
+    }
+    made_digest_mapping = {
+        path: pytest_files_digest_mapping[path] for path in made_cache_mapping
+    }
+    run_files = sorted(pytest_files_run_set)
+    rewritten_files = sorted(pytest_files_rewritten_set)
+    pytest_files_run_set.clear()
+    pytest_files_rewritten_set.clear()
+    return made_cache_mapping, made_digest_mapping, run_files, rewritten_files
+
+
+def __make_files_parallel(test_files: List[Text], workers: int):
+    """ make test files level by level, files in each level are made in a process pool,
+        made results are merged back in sorted file order.
+    """
+    levels, serial_files = __sort_test_files_by_reference(test_files)
+
+    for level_files in levels:
+        if len(level_files) < MAKE_PARALLEL_MIN_FILES:
+            for test_file, is_ref_only in level_files:
+                __make_level_file(test_file, is_ref_only)
+            continue
+
+        chunk_count = min(len(level_files), workers * 4)
+        chunks = [level_files[i::chunk_count] for i in range(chunk_count)]
+        with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=__init_make_worker,
+                initargs=(
+                        dict(pytest_files_made_cache_mapping),
+                        dict(pytest_files_digest_mapping),
+                ),
+        ) as executor:
+            for (
+                    made_cache_mapping,
+                    made_digest_mapping,
+                    run_files,
+                    rewritten_files,
+            ) in executor.map(__make_files_in_worker, chunks):
+                pytest_files_made_cache_mapping.update(made_cache_mapping)
+                pytest_files_digest_mapping.update(made_digest_mapping)
+                pytest_files_run_set.update(run_files)
+                pytest_files_rewritten_set.update(rewritten_files)
+
+    for test_file in serial_files:
+        __make_test_file(test_file)
+
+
+def main_make(tests_paths: List[Text], workers: int = 1) -> List[Text]:
+    """ make testcases, files are made in a process pool if more than one worker specified,
+        files unchanged since last make are skipped according to make manifest.
+
+    Args:
+        tests_paths: testcase/testsuite/folder paths
+        workers: process count to make files, default to 1 to make files one by one
+
+    Returns:
+        list: sorted pytest files to run
+
+    """
     if not tests_paths:
         return []
 
     ga_client.track_event("ConvertTests", "amake")
 
-    for tests_path in tests_paths:
-        tests_path = ensure_path_sep(tests_path)
-        if not os.path.isabs(tests_path):
-            tests_path = os.path.join(os.getcwd(), tests_path)
+    workers = workers or 1
+    try:
+        test_files = []
+        for tests_path in tests_paths:
+            tests_path = ensure_path_sep(tests_path)
+            if not os.path.isabs(tests_path):
+                tests_path = os.path.join(os.getcwd(), tests_path)
 
-        try:
-            __make(tests_path)
-        except exceptions.MyBaseError as ex:
-            logger.error(ex)
-            sys.exit(1)
+            test_files.extend(__load_test_files(tests_path))
 
-    # format pytest files
-    pytest_files_format_list = pytest_files_made_cache_mapping.keys()
-    format_pytest_with_black(*pytest_files_format_list)
+        if workers > 1 and is_support_multiprocessing():
+            __make_files_parallel(test_files, workers)
+        else:
+            for test_file in test_files:
+                __make_test_file(test_file)
+    except exceptions.MyBaseError as ex:
+        logger.error(ex)
+        sys.exit(1)
+
+    # format rewritten pytest files, unchanged ones have been formatted in previous make
+    if pytest_files_rewritten_set:
+        format_pytest_with_black(*sorted(pytest_files_rewritten_set))
+
+    __dump_make_manifest()
 
-    return list(pytest_files_run_set)
+    return sorted(pytest_files_run_set)
 
 
 def init_make_parser(subparsers):
@@ -653,5 +1051,11 @@ def init_make_parser(subparsers):
     parser.add_argument(
         "testcase_path", nargs="*", help="Specify YAML/JSON testcase file/folder path"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Specify process count to make testcases, default to 1.",
+    )
 
     return parser
@@ -0,0 +1,240 @@
+""" memoize deterministic functions referenced in YAML/JSON testcases.
+
+Functions in debugtalk.py are called on every evaluation of ${func(...)} by default.
+Mark deterministic functions as below, their results will be reused for the same
+function name and parsed arguments.
+
+    from autorunner import memoize
+
+    @memoize
+    def get_sign_key(app_id):
+        ...
+
+    @memoize(ttl=300, scope="global")
+    def get_vault_secret(name):
+        ...
+
+scope:
+    run: cached results are kept within one testcase run and its referenced testcases (default),
+         functions are not cached when called outside testcase runs
+    global: cached results are kept across testcase runs in the same process
+
+Cached results are shared between calls, do not mutate them.
+"""
+
+import contextvars
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from enum import Enum
+from typing import Any, Callable, Dict, Hashable, Text, Tuple, Union
+
+from autorunner.models import FunctionCacheStat
+
+# max count of function results kept in cache
+MEMOIZE_CACHE_MAXSIZE = 4096
+
+# attribute name to mark memoized function
+MEMOIZE_ATTR = "__autorunner_memoize__"
+
+
+class MemoizeScopeEnum(Text, Enum):
+    RUN = "run"
+    GLOBAL = "global"
+
+
+class MemoizeOptions(object):
+    __slots__ = ("ttl", "scope")
+
+    def __init__(self, ttl: Union[float, None], scope: MemoizeScopeEnum):
+        self.ttl = ttl
+        self.scope = scope
+
+
+def memoize(
+        func: Callable = None,
+        ttl: Union[float, None] = None,
+        scope: Text = MemoizeScopeEnum.RUN,
+) -> Callable:
+    """ mark function as pure or TTL-cached, the function itself is returned unchanged.
+
+    Args:
+        func: function to be marked, used as @memoize
+        ttl: seconds to keep cached result, cached forever if None
+        scope: run or global
+
+    """
+    scope = MemoizeScopeEnum(scope)
+    if ttl is not None and ttl <= 0:
+        raise ValueError(f"memoize ttl should be greater than 0, got {ttl}")
+
+    def decorator(f: Callable) -> Callable:
+        setattr(f, MEMOIZE_ATTR, MemoizeOptions(ttl, scope))
+        return f
+
+    if func is not None:
+        return decorator(func)
+
+    return decorator
+
+
+def get_memoize_options(func: Callable) -> Union[MemoizeOptions, None]:
+    return getattr(func, MEMOIZE_ATTR, None)
+
+
+class FunctionCacheRun(object):
+    """ memoized calls of one testcase run, calls of referenced testcases are counted in callers too,
+        and results of run scope are shared with callers by the same run id
+    """
+
+    __slots__ = ("run_id", "parent", "hits", "misses")
+
+    def __init__(self, run_id: int, parent: Union["FunctionCacheRun", None] = None):
+        self.run_id = run_id
+        self.parent = parent
+        self.hits = 0
+        self.misses = 0
+
+
+""" current testcase run, set in each thread or task of concurrent runs
+"""
+function_cache_run: contextvars.ContextVar[Union[FunctionCacheRun, None]] = (
+    contextvars.ContextVar("function_cache_run", default=None)
+)
+
+
+class FunctionResultCache(object):
+    """ bounded LRU cache for memoized function results, keyed by function name and arguments
+    """
+
+    def __init__(self, maxsize: int = MEMOIZE_CACHE_MAXSIZE):
+        self.maxsize = maxsize
+        # key => (expire_at, scope, result)
+        self.__entries: OrderedDict = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+        self.__run_ids = itertools.count(1)
+
+    @staticmethod
+    def __make_key(
+            run_id: Union[int, None], func_name: Text, args: Tuple, kwargs: Dict
+    ) -> Union[Hashable, None]:
+        key = (run_id, func_name, tuple(args), tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            # unhashable arguments, e.g. list or dict
+            return None
+
+        return key
+
+    def call(
+            self,
+            func_name: Text,
+            func: Callable,
+            options: MemoizeOptions,
+            args: Tuple,
+            kwargs: Dict,
+    ) -> Any:
+        run = function_cache_run.get()
+        if options.scope == MemoizeScopeEnum.RUN:
+            if run is None:
+                return func(*args, **kwargs)
+
+            # results of run scope are not shared with other runs
+            key = self.__make_key(run.run_id, func_name, args, kwargs)
+        else:
+            key = self.__make_key(None, func_name, args, kwargs)
+
+        if key is None:
+            return func(*args, **kwargs)
+
+        now = time.monotonic()
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None:
+                expire_at, _, result = entry
+                if expire_at is None or expire_at > now:
+                    self.__entries.move_to_end(key)
+                    self.__hits += 1
+                    self.__count_run(run, hit=True)
+                    return result
+
+                del self.__entries[key]
+
+            self.__misses += 1
+            self.__count_run(run, hit=False)
+
+        # call function outside lock, slow functions should not block other lookups
+        result = func(*args, **kwargs)
+
+        expire_at = None if options.ttl is None else time.monotonic() + options.ttl
+        with self.__lock:
+            self.__entries[key] = (expire_at, options.scope, result)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.maxsize:
+                self.__entries.popitem(last=False)
+
+        return result
+
+    @staticmethod
+    def __count_run(run: Union[FunctionCacheRun, None], hit: bool):
+        # called with lock held, steps of one run may be run in threads
+        while run is not None:
+            if hit:
+                run.hits += 1
+            else:
+                run.misses += 1
+            run = run.parent
+
+    def begin_run(self) -> contextvars.Token:
+        """ begin counting memoized calls of testcase run until end_run,
+            referenced testcase run shares run scope results with its caller
+        """
+        parent = function_cache_run.get()
+        run_id = parent.run_id if parent is not None else next(self.__run_ids)
+        return function_cache_run.set(FunctionCacheRun(run_id, parent))
+
+    def end_run(self, token: contextvars.Token) -> FunctionCacheStat:
+        """ end testcase run, returns hits and misses of the run,
+            results of run scope are dropped once the outermost run ends
+        """
+        run = function_cache_run.get()
+        function_cache_run.reset(token)
+        with self.__lock:
+            stat = FunctionCacheStat(
+                hits=run.hits, misses=run.misses, size=len(self.__entries)
+            )
+            if run.parent is None:
+                for key in [
+                    key for key in self.__entries if key[0] == run.run_id
+                ]:
+                    del self.__entries[key]
+
+        return stat
+
+    def clear(self, scope: Union[MemoizeScopeEnum, None] = None):
+        """ drop cached results of specified scope, all results if scope is None
+        """
+        with self.__lock:
+            if scope is None:
+                self.__entries.clear()
+                return
+
+            for key in [
+                key for key, entry in self.__entries.items() if entry[1] == scope
+            ]:
+                del self.__entries[key]
+
+    def stat(self) -> FunctionCacheStat:
+        with self.__lock:
+            return FunctionCacheStat(
+                hits=self.__hits, misses=self.__misses, size=len(self.__entries)
+            )
+
+
+""" process-wide memoized function results
+"""
+function_cache = FunctionResultCache()
@@ -52,6 +52,14 @@ class TConfig(BaseModel):
     path: Text = None
     weight: int = 1
     datasource: str = None
+    # run sql of testcase in transactions, all changes are rolled back when testcase finished
+    rollback: bool = False
+    # run sql of each datasource of step concurrently with async engines, dml of one datasource
+    # are run one by one in order, not applied in rollback mode
+    async_sql: bool = False
+    # max threads to run independent request steps concurrently, 0/1 to run steps one by one,
+    # not supported in rollback mode
+    parallel_steps: int = Field(0, ge=0)
 
 
 class TRequest(BaseModel):
@@ -100,6 +108,15 @@ class SqlData(BaseModel):
     """sql数据"""
     datasource: str = Field(None, description="数据源")
     dml: List[str] = Field([], description="sql语句")
+    stream: bool = Field(False, description="流式查询，服务端游标分批读取，不保存全部结果")
+    batch_size: int = Field(1000, gt=0, description="流式查询每批读取行数")
+    columns: List[str] = Field([], description="只将指定字段保存到步骤变量，为空则保存全部字段")
+    count_as: str = Field(None, description="查询结果行数保存到的步骤变量名")
+    params: Union[Dict, List[Dict], Text, None] = Field(
+        None, description="sql语句:name参数值，为空则取步骤变量，列表则批量执行"
+    )
+    cache: bool = Field(False, description="缓存查询结果，同一数据源执行增删改后失效")
+    cache_ttl: Union[float, None] = Field(None, gt=0, description="查询结果缓存秒数，为空则在本次运行中有效")
 
     @field_validator('dml')
     def check_dml_content(cls, v):
@@ -109,6 +126,15 @@ class SqlData(BaseModel):
         return v
 
 
+class TWaitUntil(BaseModel):
+    """轮询等待，步骤校验失败后重新执行sql和请求，直到校验通过"""
+    timeout: float = Field(60, gt=0, description="截止时间，秒")
+    max_attempts: int = Field(0, ge=0, description="最大执行次数，0不限制")
+    interval: float = Field(0.5, gt=0, description="首次重试间隔，秒")
+    backoff: float = Field(2, ge=1, description="重试间隔倍数，1为固定间隔")
+    max_interval: float = Field(10, gt=0, description="最大重试间隔，秒")
+
+
 class TStep(BaseModel):
     name: Name
     request: Union[TRequest, None] = None
@@ -126,6 +152,7 @@ class TStep(BaseModel):
     step_type: StepTypeEnum = Field(StepTypeEnum.API, description="步骤类型 api sql ui", alias="type")
     location: Union[List[TUiLocation], None] = None
     sql: Union[List[SqlData], None] = None
+    wait_until: Union[TWaitUntil, None] = None
 
 
 class TestCase(BaseModel):
@@ -137,7 +164,7 @@ class ProjectMeta(BaseModel):
     debugtalk_py: Text = ""  # debugtalk.py file content
     debugtalk_path: Text = ""  # debugtalk.py file path
     dot_env_path: Text = ""  # .env file path
-    functions: FunctionsMapping = {}  # functions defined in debugtalk.py
+    functions: FunctionsMapping = {}  # functions registry, debugtalk.py/validate.py functions merged with builtins
     env: Env = {}
     RootDir: Text = os.getcwd()  # project root directory (ensure absolute), the path debugtalk.py located
 
@@ -209,6 +236,15 @@ class SessionData(BaseModel):
     validators: Dict = {}
 
 
+class SqlStat(BaseModel):
+    """sql语句执行统计"""
+    datasource: Text  # 数据源名称
+    dml: Text  # sql语句
+    params_count: int = 1  # 参数组数，批量执行时大于1
+    row_count: int = 0  # 查询行数或影响行数
+    elapsed_ms: float = 0  # 执行耗时
+
+
 class StepData(BaseModel):
     """teststep data, each step maybe corresponding to one request or one testcase"""
 
@@ -216,11 +252,39 @@ class StepData(BaseModel):
     name: Text = ""  # teststep name
     data: Union[SessionData, List['StepData']] = None
     export_vars: VariablesMapping = {}
+    sql_stats: List[SqlStat] = []
+    attempts: int = 1  # 执行次数，轮询等待步骤大于1
+    wait_seconds: float = 0  # 轮询等待总时长
 
 
 StepData.update_forward_refs()
 
 
+class FunctionCacheStat(BaseModel):
+    """函数缓存统计"""
+    hits: int = 0  # 命中次数
+    misses: int = 0  # 未命中次数
+    size: int = 0  # 缓存结果数量
+
+
+class QueryCacheStat(BaseModel):
+    """查询结果缓存统计"""
+    hits: int = 0  # 命中次数
+    misses: int = 0  # 未命中次数
+    invalidations: int = 0  # 因增删改失效次数
+    size: int = 0  # 缓存结果数量
+
+
+class DBPoolStat(BaseModel):
+    """数据库连接池统计"""
+    datasource: Text  # 数据源，隐藏密码
+    pool_size: int = 0  # 连接池大小
+    checked_out: int = 0  # 使用中连接数
+    overflow: int = 0  # 溢出连接数
+    connects: int = 0  # 新建连接次数
+    checkouts: int = 0  # 取出连接次数
+
+
 class TestCaseSummary(BaseModel):
     """用例汇总数据"""
     name: Text
@@ -230,6 +294,9 @@ class TestCaseSummary(BaseModel):
     in_out: TestCaseInOut = {}
     log: Text = ""
     step_datas: List[StepData] = []
+    function_cache: FunctionCacheStat = FunctionCacheStat()
+    db_pools: List[DBPoolStat] = []
+    query_cache: QueryCacheStat = QueryCacheStat()
     # ------------------- 20241029
     # run_count: int  # 运行数量
     # actual_run_count: int  # 实际执行数量
@@ -1,15 +1,17 @@
 import ast
 import builtins
+import functools
 import re
 import os
 import typing
-from typing import Any, Set, Text, Callable, List, Dict
+from typing import Any, Set, Text, Callable, List, Dict, Iterable, Tuple
 
 from loguru import logger
 from sentry_sdk import capture_exception
 
 from autorunner import loader, utils, exceptions
-from autorunner.models import VariablesMapping, FunctionsMapping
+from autorunner.memoize import function_cache, get_memoize_options
+from autorunner.models import FunctionsMapping, StepTypeEnum, TStep, VariablesMapping
 
 absolute_http_url_regexp = re.compile(r"^https?://", re.I)
 
@@ -21,6 +23,12 @@ variable_regex_compile = re.compile(r"\$\{([a-zA-Z_]\w*)\}|\$([a-zA-Z_]\w*)")
 # function notation, e.g. ${func1($var_1, $var_3)}
 function_regex_compile = re.compile(r"\$\{([a-zA-Z_]\w*)\(([\$\w\.\-/\s=,]*)\)\}")
 
+# max count of distinct raw strings kept in compiled template cache
+TEMPLATE_CACHE_MAXSIZE = 8192
+# max count of tagged static list/dict, and min nodes count of list/dict to be tagged
+STATIC_DATA_CACHE_MAXSIZE = 4096
+STATIC_DATA_MIN_NODES = 32
+
 
 def parse_string_value(str_value: Text) -> Any:
     """ parse string to number if possible
@@ -156,7 +164,9 @@ def extract_variables(content: Any) -> Set:
         return variables
 
     elif isinstance(content, str):
-        return set(regex_findall_variables(content))
+        if "$" not in content:
+            return set()
+        return set(compile_template(content).variables)
 
     return set()
 
@@ -240,6 +250,7 @@ def get_mapping_function(
 ) -> Callable:
     """ get function from functions_mapping,
         if not found, then try to check if builtin function.
+        functions_mapping of loaded project meta is a full registry, see loader.build_functions_registry
 
     Args:
         function_name (str): function name
@@ -256,22 +267,9 @@ def get_mapping_function(
     if function_name in functions_mapping:
         return functions_mapping[function_name]
 
-    elif function_name in ["parameterize", "P"]:
-        return loader.load_csv_file
-
-    elif function_name in ["environ", "ENV"]:
-        return utils.get_os_environ
-
-    elif function_name in ["multipart_encoder", "multipart_content_type"]:
-        # extension for upload test
-        from autorunner.ext import uploader
-
-        return getattr(uploader, function_name)
-
     try:
-        # check if autorunner builtin functions
-        built_in_functions = loader.load_builtin_functions()
-        return built_in_functions[function_name]
+        # check if autorunner extension or autorunner builtin functions
+        return loader.load_builtin_functions_registry()[function_name]
     except KeyError:
         pass
 
@@ -284,6 +282,170 @@ def get_mapping_function(
     raise exceptions.FunctionNotFound(f"{function_name} is not found.")
 
 
+class LiteralToken(object):
+    """ plain text between notations, "$$" has already been unescaped to "$" """
+
+    __slots__ = ("text",)
+
+    def __init__(self, text: Text):
+        self.text = text
+
+    def evaluate(
+            self, variables_mapping: VariablesMapping, functions_mapping: FunctionsMapping
+    ) -> Any:
+        return self.text
+
+
+class VariableToken(object):
+    """ variable reference, $var or ${var} """
+
+    __slots__ = ("name",)
+
+    def __init__(self, name: Text):
+        self.name = name
+
+    def evaluate(
+            self, variables_mapping: VariablesMapping, functions_mapping: FunctionsMapping
+    ) -> Any:
+        return get_mapping_variable(self.name, variables_mapping)
+
+
+class FunctionToken(object):
+    """ function call, ${func($a, b=1)}, with params split once at compile time """
+
+    __slots__ = ("name", "args", "kwargs")
+
+    def __init__(self, name: Text, params: Text):
+        self.name = name
+        function_meta = parse_function_params(params)
+        self.args = tuple(function_meta["args"])
+        self.kwargs = function_meta["kwargs"]
+
+    def evaluate(
+            self, variables_mapping: VariablesMapping, functions_mapping: FunctionsMapping
+    ) -> Any:
+        func = get_mapping_function(self.name, functions_mapping)
+        parsed_args = parse_data(self.args, variables_mapping, functions_mapping)
+        parsed_kwargs = parse_data(self.kwargs, variables_mapping, functions_mapping)
+
+        try:
+            memoize_options = get_memoize_options(func)
+            if memoize_options:
+                # function marked with @memoize, reuse result for same arguments
+                return function_cache.call(
+                    self.name, func, memoize_options, parsed_args, parsed_kwargs
+                )
+
+            return func(*parsed_args, **parsed_kwargs)
+        except Exception as ex:
+            logger.error(
+                f"call function error:\n"
+                f"func_name: {self.name}\n"
+                f"args: {parsed_args}\n"
+                f"kwargs: {parsed_kwargs}\n"
+                f"{type(ex).__name__}: {ex}"
+            )
+            raise
+
+
+class CompiledTemplate(object):
+    """ raw string compiled into a sequence of literal/variable/function tokens.
+        compiled templates are shared between calls, do not mutate them.
+    """
+
+    __slots__ = ("raw_string", "tokens", "variables")
+
+    def __init__(self, raw_string: Text):
+        self.raw_string = raw_string
+        self.tokens = tuple(self.__tokenize(raw_string))
+        self.variables = frozenset(regex_findall_variables(raw_string))
+
+    @staticmethod
+    def __tokenize(raw_string: Text) -> List:
+        try:
+            match_start_position = raw_string.index("$", 0)
+        except ValueError:
+            return [LiteralToken(raw_string)] if raw_string else []
+
+        tokens = []
+        literal = raw_string[0:match_start_position]
+        while match_start_position < len(raw_string):
+
+            # Notice: notation priority
+            # $$ > ${func($a, $b)} > $var
+
+            # search $$
+            dollar_match = dolloar_regex_compile.match(raw_string, match_start_position)
+            if dollar_match:
+                match_start_position = dollar_match.end()
+                literal += "$"
+                continue
+
+            # search function like ${func($a, $b)}
+            func_match = function_regex_compile.match(raw_string, match_start_position)
+            if func_match:
+                if literal:
+                    tokens.append(LiteralToken(literal))
+                    literal = ""
+                tokens.append(FunctionToken(func_match.group(1), func_match.group(2)))
+                match_start_position = func_match.end()
+                continue
+
+            # search variable like ${var} or $var
+            var_match = variable_regex_compile.match(raw_string, match_start_position)
+            if var_match:
+                if literal:
+                    tokens.append(LiteralToken(literal))
+                    literal = ""
+                tokens.append(VariableToken(var_match.group(1) or var_match.group(2)))
+                match_start_position = var_match.end()
+                continue
+
+            curr_position = match_start_position
+            try:
+                # find next $ location
+                match_start_position = raw_string.index("$", curr_position + 1)
+                literal += raw_string[curr_position:match_start_position]
+            except ValueError:
+                literal += raw_string[curr_position:]
+                # break while loop
+                match_start_position = len(raw_string)
+
+        if literal:
+            tokens.append(LiteralToken(literal))
+
+        return tokens
+
+    def render(
+            self, variables_mapping: VariablesMapping, functions_mapping: FunctionsMapping
+    ) -> Any:
+        tokens = self.tokens
+        if len(tokens) == 1:
+            token = tokens[0]
+            if isinstance(token, LiteralToken):
+                # keep the original string object if nothing was unescaped
+                return self.raw_string if token.text == self.raw_string else token.text
+
+            # raw_string is a single variable or function, e.g. "$var" or "${add_one(3)}",
+            # return its eval value directly
+            return token.evaluate(variables_mapping, functions_mapping)
+
+        return "".join(
+            [
+                str(token.evaluate(variables_mapping, functions_mapping))
+                for token in tokens
+            ]
+        )
+
+
+@functools.lru_cache(maxsize=TEMPLATE_CACHE_MAXSIZE)
+def compile_template(raw_string: Text) -> CompiledTemplate:
+    """ compile raw string into template tokens, compiled templates are cached with LRU
+        eviction, use compile_template.cache_info() to inspect hits and misses.
+    """
+    return CompiledTemplate(raw_string)
+
+
 def parse_string(
         raw_string: Text,
         variables_mapping: VariablesMapping,
@@ -307,169 +469,347 @@ def parse_string(
             "abc4def"
 
     """
-    try:
-        match_start_position = raw_string.index("$", 0)
-        parsed_string = raw_string[0:match_start_position]
-    except ValueError:
-        parsed_string = raw_string
-        return parsed_string
+    if "$" not in raw_string:
+        return raw_string
 
-    while match_start_position < len(raw_string):
+    return compile_template(raw_string).render(variables_mapping, functions_mapping)
 
-        # Notice: notation priority
-        # $$ > ${func($a, $b)} > $var
 
-        # search $$
-        dollar_match = dolloar_regex_compile.match(raw_string, match_start_position)
-        if dollar_match:
-            match_start_position = dollar_match.end()
-            parsed_string += "$"
-            continue
+class StaticDataRegistry(object):
+    """ tag containers which contain no variable or function, parse_data returns them as-is.
+        tagged containers are referenced here so that their ids can not be reused,
+        they should not be mutated in place afterwards.
+    """
 
-        # search function like ${func($a, $b)}
-        func_match = function_regex_compile.match(raw_string, match_start_position)
-        if func_match:
-            func_name = func_match.group(1)
-            func = get_mapping_function(func_name, functions_mapping)
+    def __init__(self, maxsize: int = STATIC_DATA_CACHE_MAXSIZE):
+        self.maxsize = maxsize
+        self.__containers: Dict[int, Any] = {}
 
-            func_params_str = func_match.group(2)
-            function_meta = parse_function_params(func_params_str)
-            args = function_meta["args"]
-            kwargs = function_meta["kwargs"]
-            parsed_args = parse_data(args, variables_mapping, functions_mapping)
-            parsed_kwargs = parse_data(kwargs, variables_mapping, functions_mapping)
+    def is_static(self, data: Any) -> bool:
+        return self.__containers.get(id(data)) is data
 
-            try:
-                func_eval_value = func(*parsed_args, **parsed_kwargs)
-            except Exception as ex:
-                logger.error(
-                    f"call function error:\n"
-                    f"func_name: {func_name}\n"
-                    f"args: {parsed_args}\n"
-                    f"kwargs: {parsed_kwargs}\n"
-                    f"{type(ex).__name__}: {ex}"
-                )
-                raise
+    def tag(self, data: Any):
+        if len(self.__containers) >= self.maxsize:
+            self.__containers.clear()
 
-            func_raw_str = "${" + func_name + f"({func_params_str})" + "}"
-            if func_raw_str == raw_string:
-                # raw_string is a function, e.g. "${add_one(3)}", return its eval value directly
-                return func_eval_value
+        self.__containers[id(data)] = data
 
-            # raw_string contains one or many functions, e.g. "abc${add_one(3)}def"
-            parsed_string += str(func_eval_value)
-            match_start_position = func_match.end()
-            continue
+    def clear(self):
+        self.__containers.clear()
 
-        # search variable like ${var} or $var
-        var_match = variable_regex_compile.match(raw_string, match_start_position)
-        if var_match:
-            var_name = var_match.group(1) or var_match.group(2)
-            var_value = get_mapping_variable(var_name, variables_mapping)
 
-            if f"${var_name}" == raw_string or "${" + var_name + "}" == raw_string:
-                # raw_string is a variable, $var or ${var}, return its value directly
-                return var_value
+static_data_registry = StaticDataRegistry()
 
-            # raw_string contains one or many variables, e.g. "abc${var}def"
-            parsed_string += str(var_value)
-            match_start_position = var_match.end()
-            continue
 
-        curr_position = match_start_position
-        try:
-            # find next $ location
-            match_start_position = raw_string.index("$", curr_position + 1)
-            remain_string = raw_string[curr_position:match_start_position]
-        except ValueError:
-            remain_string = raw_string[curr_position:]
-            # break while loop
-            match_start_position = len(raw_string)
+def __tag_static_containers(static_containers: List[Any]):
+    """ tag static subtrees whose parent is not static, tiny subtrees are cheap to rebuild
+    """
+    for container, nodes_count in static_containers:
+        if nodes_count >= STATIC_DATA_MIN_NODES:
+            static_data_registry.tag(container)
 
-        parsed_string += remain_string
 
-    return parsed_string
+def __parse_data(
+        raw_data: Any,
+        variables_mapping: VariablesMapping,
+        functions_mapping: FunctionsMapping,
+        share_static: bool = False,
+) -> typing.Tuple[Any, typing.Optional[int]]:
+    """ parse raw data, also count nodes of raw data if it contains no variable or function.
+        static list/dict are returned as-is only if share_static, otherwise copied.
 
+    Returns:
+        tuple: (parsed data, nodes count), nodes count is None if raw data is not static
 
-def parse_data(
-        raw_data: Any,
-        variables_mapping: VariablesMapping = None,
-        functions_mapping: FunctionsMapping = None,
-) -> Any:
-    """ parse raw data with evaluated variables mapping.
-        Notice: variables_mapping should not contain any variable or function.
     """
     if isinstance(raw_data, str):
         # content in string format may contains variables and functions
         variables_mapping = variables_mapping or {}
         functions_mapping = functions_mapping or {}
         # only strip whitespaces and tabs, \n\r is left because they maybe used in changeset
-        raw_data = raw_data.strip(" \t")
-        return parse_string(raw_data, variables_mapping, functions_mapping)
+        parsed_data = parse_string(
+            raw_data.strip(" \t"), variables_mapping, functions_mapping
+        )
+        # string is static if parsing returns itself
+        return parsed_data, (1 if parsed_data is raw_data else None)
 
     elif isinstance(raw_data, (list, set, tuple)):
-        return [
-            parse_data(item, variables_mapping, functions_mapping) for item in raw_data
-        ]
+        if share_static and static_data_registry.is_static(raw_data):
+            return raw_data, 0
+
+        parsed_data = []
+        # set and tuple are always converted to list
+        nodes_count = 1 if isinstance(raw_data, list) else None
+        static_containers = []
+        for item in raw_data:
+            parsed_item, item_nodes_count = __parse_data(
+                item, variables_mapping, functions_mapping, share_static
+            )
+            parsed_data.append(parsed_item)
+            if item_nodes_count is None:
+                nodes_count = None
+            else:
+                if nodes_count is not None:
+                    nodes_count += item_nodes_count
+                if isinstance(item, (list, dict)):
+                    static_containers.append((item, item_nodes_count))
+
+        if nodes_count is not None:
+            return (raw_data if share_static else parsed_data), nodes_count
+
+        if share_static:
+            __tag_static_containers(static_containers)
+        return parsed_data, None
 
     elif isinstance(raw_data, dict):
+        if share_static and static_data_registry.is_static(raw_data):
+            return raw_data, 0
+
         parsed_data = {}
+        nodes_count = 1
+        static_containers = []
         for key, value in raw_data.items():
-            parsed_key = parse_data(key, variables_mapping, functions_mapping)
-            parsed_value = parse_data(value, variables_mapping, functions_mapping)
+            parsed_key, key_nodes_count = __parse_data(
+                key, variables_mapping, functions_mapping, share_static
+            )
+            parsed_value, value_nodes_count = __parse_data(
+                value, variables_mapping, functions_mapping, share_static
+            )
             parsed_data[parsed_key] = parsed_value
+            if key_nodes_count is None or value_nodes_count is None:
+                nodes_count = None
+            elif nodes_count is not None:
+                nodes_count += key_nodes_count + value_nodes_count
+
+            if value_nodes_count is not None and isinstance(value, (list, dict)):
+                static_containers.append((value, value_nodes_count))
 
-        return parsed_data
+        if nodes_count is not None:
+            return (raw_data if share_static else parsed_data), nodes_count
+
+        if share_static:
+            __tag_static_containers(static_containers)
+        return parsed_data, None
 
     else:
         # other types, e.g. None, int, float, bool
-        return raw_data
+        return raw_data, 1
+
+
+def parse_data(
+        raw_data: Any,
+        variables_mapping: VariablesMapping = None,
+        functions_mapping: FunctionsMapping = None,
+        share_static: bool = False,
+) -> Any:
+    """ parse raw data with evaluated variables mapping.
+        Notice: variables_mapping should not contain any variable or function.
+
+        parsed data is a copy of raw data by default, thus it can be bound to variables and passed
+        to functions which may change it. with share_static, e.g. request sent over HTTP,
+        list/dict subtrees without any variable or function are returned as-is instead of copied,
+        large ones are tagged at first parse and skipped without walking afterwards.
+    """
+    parsed_data, nodes_count = __parse_data(
+        raw_data, variables_mapping, functions_mapping, share_static
+    )
+    if share_static and nodes_count and isinstance(raw_data, (list, dict)):
+        __tag_static_containers([(raw_data, nodes_count)])
+
+    return parsed_data
+
+
+def is_static_data(raw_data: Any) -> bool:
+    """ check if raw data contains no variable or function, thus parsed result is the same in every run
+    """
+    if isinstance(raw_data, str):
+        return "$" not in raw_data
+    elif isinstance(raw_data, (list, set, tuple)):
+        return all(is_static_data(item) for item in raw_data)
+    elif isinstance(raw_data, dict):
+        return all(
+            is_static_data(key) and is_static_data(value)
+            for key, value in raw_data.items()
+        )
+    else:
+        return True
+
+
+def sort_variables_by_dependency(dependencies: Dict[Text, Set]) -> List[Text]:
+    """ sort variable names topologically, referenced variables come first.
+
+    Args:
+        dependencies: variable name and names of variables it references
+
+    Returns:
+        list: variable names in evaluation order
+
+    Raises:
+        exceptions.VariableNotFound: variables reference each other circularly.
+
+    Examples:
+        >>> sort_variables_by_dependency({"c": {"a", "b"}, "b": {"a"}, "a": set()})
+        ["a", "b", "c"]
+
+        >>> sort_variables_by_dependency({"a": {"b"}, "b": {"c"}, "c": {"a"}})
+        VariableNotFound: circular reference in variables: a -> b -> c -> a
+
+    """
+    sorted_names: List[Text] = []
+    visited: Set[Text] = set()
+
+    for root_name in dependencies:
+        if root_name in visited:
+            continue
+
+        # iterative depth-first search, stack holds the current reference path
+        stack = [(root_name, iter(sorted(dependencies[root_name])))]
+        on_path = {root_name}
+        while stack:
+            var_name, ref_names = stack[-1]
+            for ref_name in ref_names:
+                if ref_name in visited:
+                    continue
+
+                if ref_name in on_path:
+                    path = [name for name, _ in stack]
+                    cycle = path[path.index(ref_name):] + [ref_name]
+                    raise exceptions.VariableNotFound(
+                        f"circular reference in variables: {' -> '.join(cycle)}"
+                    )
+
+                stack.append((ref_name, iter(sorted(dependencies[ref_name]))))
+                on_path.add(ref_name)
+                break
+            else:
+                # all referenced variables are sorted
+                stack.pop()
+                on_path.discard(var_name)
+                visited.add(var_name)
+                sorted_names.append(var_name)
+
+    return sorted_names
+
+
+def get_steps_dependencies(teststeps: List[TStep]) -> List[Set[int]]:
+    """ get indexes of previous steps each teststep depends on.
+        a request step depends on previous steps extracting variables it references or extracts,
+        other steps (referenced testcase, sql, ui) may export any variable or change session state,
+        thus they depend on all previous steps and all following steps depend on them.
+
+    Args:
+        teststeps: teststeps to run in order
+
+    Returns:
+        list: set of dependent step indexes for each step
+
+    Examples:
+        >>> get_steps_dependencies([login, get_user($token), get_orders($token), logout])
+        [set(), {0}, {0}, set()]
+
+    """
+    dependencies: List[Set[int]] = []
+    # variable name => index of the latest step extracting it
+    extracted_by: Dict[Text, int] = {}
+    barrier_index = None
+
+    for index, step in enumerate(teststeps):
+        if (
+                not step.request
+                or step.sql
+                or step.location
+                or step.step_type != StepTypeEnum.API
+        ):
+            dependencies.append(set(range(index)))
+            barrier_index = index
+            continue
+
+        step_dependencies = set() if barrier_index is None else {barrier_index}
+        step_content = step.model_dump(by_alias=True, exclude={"name"})
+        for var_name in extract_variables(step_content) | set(step.extract):
+            if var_name in extracted_by:
+                step_dependencies.add(extracted_by[var_name])
+
+        dependencies.append(step_dependencies)
+        for var_name in step.extract:
+            extracted_by[var_name] = index
+
+    return dependencies
 
 
 def parse_variables_mapping(
-        variables_mapping: VariablesMapping, functions_mapping: FunctionsMapping = None
+        variables_mapping: VariablesMapping,
+        functions_mapping: FunctionsMapping = None,
+        var_names: Iterable[Text] = None,
 ) -> VariablesMapping:
-    parsed_variables: VariablesMapping = {}
+    """ parse variables mapping, variables may reference each other.
+        the reference graph is built once and each variable is evaluated exactly once.
+        if var_names specified, only these variables and variables referenced by them are parsed.
+    """
+    if var_names is None:
+        var_names = variables_mapping.keys()
+
+    dependencies: Dict[Text, Set] = {}
+    # referenced variables are appended in iterating
+    pending_var_names = [
+        var_name for var_name in var_names if var_name in variables_mapping
+    ]
+    for var_name in pending_var_names:
+        if var_name in dependencies:
+            continue
 
-    while len(parsed_variables) != len(variables_mapping):
-        for var_name in variables_mapping:
+        variables = extract_variables(variables_mapping[var_name])
 
-            if var_name in parsed_variables:
-                continue
+        # check if reference variable itself
+        if var_name in variables:
+            # e.g.
+            # variables_mapping = {"token": "abc$token"}
+            # variables_mapping = {"key": ["$key", 2]}
+            raise exceptions.VariableNotFound(var_name)
 
-            var_value = variables_mapping[var_name]
-            variables = extract_variables(var_value)
+        # check if reference variable not in variables_mapping
+        not_defined_variables = [
+            v_name for v_name in variables if v_name not in variables_mapping
+        ]
+        if not_defined_variables:
+            # e.g. {"varA": "123$varB", "varB": "456$varC"}
+            # e.g. {"varC": "${sum_two($a, $b)}"}
+            raise exceptions.VariableNotFound(not_defined_variables)
 
-            # check if reference variable itself
-            if var_name in variables:
-                # e.g.
-                # variables_mapping = {"token": "abc$token"}
-                # variables_mapping = {"key": ["$key", 2]}
-                raise exceptions.VariableNotFound(var_name)
+        dependencies[var_name] = variables
+        pending_var_names.extend(variables)
 
-            # check if reference variable not in variables_mapping
-            not_defined_variables = [
-                v_name for v_name in variables if v_name not in variables_mapping
-            ]
-            if not_defined_variables:
-                # e.g. {"varA": "123$varB", "varB": "456$varC"}
-                # e.g. {"varC": "${sum_two($a, $b)}"}
-                raise exceptions.VariableNotFound(not_defined_variables)
+    parsed_variables: VariablesMapping = {}
+    for var_name in sort_variables_by_dependency(dependencies):
+        parsed_variables[var_name] = parse_data(
+            variables_mapping[var_name], parsed_variables, functions_mapping
+        )
 
-            try:
-                parsed_value = parse_data(
-                    var_value, parsed_variables, functions_mapping
-                )
-            except exceptions.VariableNotFound:
-                continue
+    # keep variables in declared order
+    return {
+        var_name: parsed_variables[var_name]
+        for var_name in variables_mapping
+        if var_name in parsed_variables
+    }
 
-            parsed_variables[var_name] = parsed_value
 
-    return parsed_variables
+def parse_parameters_shard(shard: Text) -> Tuple[int, int]:
+    """ parse shard in format i/n, e.g. 0/4, returns (shard index, shard count)
+    """
+    try:
+        shard_index, shard_count = [int(i) for i in shard.split("/")]
+    except ValueError:
+        raise exceptions.ParamsError(
+            f"parameters shard should be in format i/n, e.g. 0/4, got {shard}"
+        )
+
+    return shard_index, shard_count
 
 
-def parse_parameters(parameters: Dict, ) -> List[Dict]:
-    """ parse parameters and generate cartesian product.
+def parse_parameters(
+        parameters: Dict, shard: Text = None
+) -> utils.CartesianProduct:
+    """ parse parameters and generate cartesian product lazily.
 
     Args:
         parameters (Dict) parameters: parameter name and value mapping
@@ -477,9 +817,11 @@ def parse_parameters(parameters: Dict, ) -> List[Dict]:
                 (1) data list, e.g. ["iOS/10.1", "iOS/10.2", "iOS/10.3"]
                 (2) call built-in parameterize function, "${parameterize(account.csv)}"
                 (3) call custom function in debugtalk.py, "${gen_app_version()}"
+        shard: "i/n", e.g. "0/4", only the i-th of n deterministic shards is returned,
+            passed from --parameters-shard of command line
 
     Returns:
-        list: cartesian product list
+        CartesianProduct: lazy cartesian product sequence, supports len(), indexing and iteration
 
     Examples:
         >>> parameters = {
@@ -572,7 +914,12 @@ def parse_parameters(parameters: Dict, ) -> List[Dict]:
 
         parsed_parameters_list.append(parameter_content_list)
 
-    return utils.gen_cartesian_product(*parsed_parameters_list)
+    parameters_product = utils.gen_cartesian_product(*parsed_parameters_list)
+
+    if shard:
+        parameters_product = parameters_product.shard(*parse_parameters_shard(shard))
+
+    return parameters_product
 
 
 class Parser(object):
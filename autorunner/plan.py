@@ -0,0 +1,150 @@
+""" compiled execution plans of testcases, shared by all runs of the same testcase.
+
+Runners change config and teststeps in running, e.g. parsed variables and upload request, thus testcase
+models had to be rebuilt or deep copied before each run. A plan is compiled once from testcase models,
+which are never changed afterwards, and each run gets its own copies:
+
+    plan = compile_testcase(testcase)
+    config = plan.new_config()        # variables copied, parsed in this run
+    teststeps = plan.new_teststeps()  # skipped steps excluded, variables copied
+
+Variables are bound and passed to functions in running, nested lists and dicts of them are copied
+for each run. Static parts of steps, e.g. request, extractors and validators, are shared by the copies,
+thus compiled templates and validator plans are reused by parameter rows and load test iterations.
+runners never change them: request is parsed into new dict and copied before exposed to hooks.
+"""
+
+from typing import Any, Callable, Dict, List, Set, Tuple, Union
+
+from autorunner.models import TConfig, TestCase, TStep
+from autorunner.parser import get_steps_dependencies
+
+# max count of testcases kept in compiled plans registry
+TESTCASE_PLAN_CACHE_MAXSIZE = 1024
+
+
+def copy_variables(variables: Any) -> Any:
+    """ copy nested lists and dicts of variables, other values, e.g. objects of chain-style config,
+        are shared
+    """
+    if isinstance(variables, Dict):
+        return {key: copy_variables(value) for key, value in variables.items()}
+    elif isinstance(variables, List):
+        return [copy_variables(item) for item in variables]
+
+    return variables
+
+
+def is_step_skipped(step: TStep) -> bool:
+    """ skip: True, or skip: $skip with skip in step variables
+    """
+    skip = step.skip
+    if "skip" in step.variables:
+        if skip == 'True':
+            return True
+        elif skip == '$skip':
+            skip = step.variables["skip"]
+
+    return bool(skip)
+
+
+class StepPlan(object):
+    """ compiled teststep, do not mutate it
+    """
+
+    def __init__(self, step: TStep):
+        self.step = step
+        self.skipped = is_step_skipped(step)
+        # upload info is parsed into request of each run, see prepare_upload_step
+        self.has_upload = bool(step.request and step.request.upload)
+
+    def new_step(self) -> TStep:
+        """ teststep for one run, variables are copied, static fields are shared with plan
+        """
+        update = {"variables": copy_variables(self.step.variables)}
+        if self.has_upload:
+            update["request"] = self.step.request.model_copy(deep=True)
+
+        return self.step.model_copy(update=update)
+
+
+class TestCasePlan(object):
+    """ compiled testcase, do not mutate it
+    """
+
+    def __init__(self, testcase: TestCase):
+        self.testcase = testcase
+        self.config = testcase.config
+        self.steps = [StepPlan(step) for step in testcase.teststeps]
+        self.run_steps = [step_plan for step_plan in self.steps if not step_plan.skipped]
+        self.__dependencies: Union[List[Set[int]], None] = None
+
+    @property
+    def dependencies(self) -> List[Set[int]]:
+        """ dependencies of steps to run, used to run independent steps concurrently
+        """
+        if self.__dependencies is None:
+            self.__dependencies = get_steps_dependencies(
+                [step_plan.step for step_plan in self.run_steps]
+            )
+
+        return self.__dependencies
+
+    def new_config(self) -> TConfig:
+        """ config for one run, variables are parsed and updated in running
+        """
+        return self.config.model_copy(
+            update={"variables": copy_variables(self.config.variables)}
+        )
+
+    def new_teststeps(self) -> List[TStep]:
+        """ teststeps for one run, skipped steps are excluded
+        """
+        return [step_plan.new_step() for step_plan in self.run_steps]
+
+    def new_testcase(self) -> TestCase:
+        """ testcase for one run, with all teststeps
+        """
+        return TestCase(
+            config=self.new_config(),
+            teststeps=[step_plan.new_step() for step_plan in self.steps],
+        )
+
+
+class TestCasePlanRegistry(object):
+    """ plans compiled from source objects, e.g. testcase model, or Config and Steps of AutoRunner class.
+        sources are referenced here so that their ids can not be reused.
+    """
+
+    def __init__(self, maxsize: int = TESTCASE_PLAN_CACHE_MAXSIZE):
+        self.maxsize = maxsize
+        self.__plans: Dict[Tuple[int, ...], Tuple[Tuple, TestCasePlan]] = {}
+
+    def get_plan(
+            self, sources: Tuple, get_testcase: Callable[[], TestCase]
+    ) -> TestCasePlan:
+        key = tuple(id(source) for source in sources)
+        entry = self.__plans.get(key)
+        if entry is not None and all(
+                cached is source for cached, source in zip(entry[0], sources)
+        ):
+            return entry[1]
+
+        plan = TestCasePlan(get_testcase())
+        if len(self.__plans) >= self.maxsize:
+            self.__plans.clear()
+
+        self.__plans[key] = (sources, plan)
+        return plan
+
+    def clear(self):
+        self.__plans.clear()
+
+
+testcase_plan_registry = TestCasePlanRegistry()
+
+
+def compile_testcase(testcase: TestCase) -> TestCasePlan:
+    """ compile testcase into plan, testcase model should not be changed afterwards
+    """
+    return testcase_plan_registry.get_plan((testcase,), lambda: testcase)
@@ -1,54 +1,95 @@
-from typing import Dict, Text, Any
+import json
+import os
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Text, Tuple, Union
 
 import jmespath
 import requests
 from jmespath.exceptions import JMESPathError
+from jmespath.parser import ParsedResult
 from loguru import logger
 
 from autorunner import exceptions
+from autorunner.jsonlib import get_response_json
 from autorunner.exceptions import ValidationFailure, ParamsError
 from autorunner.models import VariablesMapping, Validators, FunctionsMapping
-from autorunner.parser import parse_data, parse_string_value, get_mapping_function
+from autorunner.parser import (get_mapping_function, is_static_data, parse_data,
+                               parse_string_value)
+
+
+# max count of compiled jmespath expressions kept in process
+JMESPATH_CACHE_SIZE = int(os.getenv("JMESPATH_CACHE_SIZE", 1024))
+
+# fields of response to search with jmespath
+RESP_OBJ_META_KEYS = ("status_code", "headers", "cookies", "body")
+
+
+@lru_cache(maxsize=JMESPATH_CACHE_SIZE)
+def compile_jmespath(expr: Text) -> ParsedResult:
+    """ compiled jmespath expression, expressions are parsed only once in process
+    """
+    return jmespath.compile(expr)
+
+
+def is_jmespath(expr: Any) -> bool:
+    """ check if expression searches response, or it is a literal value
+    """
+    return isinstance(expr, Text) and expr.startswith(RESP_OBJ_META_KEYS)
+
+
+@lru_cache(maxsize=JMESPATH_CACHE_SIZE)
+def compile_jmespath_hash(fields: Tuple[Tuple[Text, Text], ...]) -> ParsedResult:
+    """ join (key, expression) pairs into one multiselect hash expression, thus searched in one pass
+
+        (("token", "body.data.token"), ("code", "status_code"))
+        => {"token": body.data.token, "code": status_code}
+
+    """
+    return compile_jmespath(
+        "{"
+        + ", ".join(f"{json.dumps(key, ensure_ascii=False)}: {expr}" for key, expr in fields)
+        + "}"
+    )
+
+
+""" comparator aliases and their uniform names
+"""
+COMPARATOR_ALIASES = {
+    "eq": "equal",
+    "equals": "equal",
+    "equal": "equal",
+    "lt": "less_than",
+    "less_than": "less_than",
+    "le": "less_or_equals",
+    "less_or_equals": "less_or_equals",
+    "gt": "greater_than",
+    "greater_than": "greater_than",
+    "ge": "greater_or_equals",
+    "greater_or_equals": "greater_or_equals",
+    "ne": "not_equal",
+    "not_equal": "not_equal",
+    "str_eq": "string_equals",
+    "string_equals": "string_equals",
+    "len_eq": "length_equal",
+    "length_equal": "length_equal",
+    "len_gt": "length_greater_than",
+    "length_greater_than": "length_greater_than",
+    "len_ge": "length_greater_or_equals",
+    "length_greater_or_equals": "length_greater_or_equals",
+    "len_lt": "length_less_than",
+    "length_less_than": "length_less_than",
+    "len_le": "length_less_or_equals",
+    "length_less_or_equals": "length_less_or_equals",
+}
+
+# max count of validators lists kept in validator plans registry
+VALIDATOR_PLAN_CACHE_MAXSIZE = 4096
 
 
 def get_uniform_comparator(comparator: Text):
     """ convert comparator alias to uniform name
     """
-    if comparator in ["eq", "equals", "equal"]:
-        return "equal"
-    elif comparator in ["lt", "less_than"]:
-        return "less_than"
-    elif comparator in ["le", "less_or_equals"]:
-        return "less_or_equals"
-    elif comparator in ["gt", "greater_than"]:
-        return "greater_than"
-    elif comparator in ["ge", "greater_or_equals"]:
-        return "greater_or_equals"
-    elif comparator in ["ne", "not_equal"]:
-        return "not_equal"
-    elif comparator in ["str_eq", "string_equals"]:
-        return "string_equals"
-    elif comparator in ["len_eq", "length_equal"]:
-        return "length_equal"
-    elif comparator in [
-        "len_gt",
-        "length_greater_than",
-    ]:
-        return "length_greater_than"
-    elif comparator in [
-        "len_ge",
-        "length_greater_or_equals",
-    ]:
-        return "length_greater_or_equals"
-    elif comparator in ["len_lt", "length_less_than"]:
-        return "length_less_than"
-    elif comparator in [
-        "len_le",
-        "length_less_or_equals",
-    ]:
-        return "length_less_or_equals"
-    else:
-        return comparator
+    return COMPARATOR_ALIASES.get(comparator, comparator)
 
 
 def uniform_validator(validator):
@@ -114,6 +155,106 @@ def uniform_validator(validator):
     }
 
 
+class ValidatorPlan(object):
+    """ validator normalized once and reused in every run of step, do not mutate it.
+        constant check item, expect value and message are parsed at compile time.
+    """
+
+    def __init__(self, validator: Dict):
+        u_validator = self.uniform(validator)
+        self.validator = validator
+        self.check = u_validator["check"]
+        self.assert_method = u_validator["assert"]
+        self.expect = u_validator["expect"]
+        self.message = u_validator["message"]
+
+        self.is_static_check = is_static_data(self.check)
+        # constant check item searching response, searched with other validators in one pass
+        self.is_static_jmespath = self.is_static_check and is_jmespath(self.check)
+        self.is_static_expect = is_static_data(self.expect)
+        self.expect_value = parse_data(self.expect) if self.is_static_expect else None
+        self.is_static_message = is_static_data(self.message)
+        self.message_value = parse_data(self.message) if self.is_static_message else None
+
+        # comparator function resolved with functions mapping, (functions mapping, function),
+        # replaced as one tuple thus threads never pair one mapping with function of another
+        self.__assert_entry: Union[Tuple[FunctionsMapping, Callable], None] = None
+
+    @staticmethod
+    def uniform(validator: Dict) -> Dict:
+        return uniform_validator(validator)
+
+    def get_check_item(
+            self, variables_mapping: VariablesMapping, functions_mapping: FunctionsMapping
+    ) -> Any:
+        if self.is_static_check:
+            return self.check
+
+        # check_item is variable or function
+        check_item = parse_data(self.check, variables_mapping, functions_mapping)
+        return parse_string_value(check_item)
+
+    def get_expect_value(
+            self, variables_mapping: VariablesMapping, functions_mapping: FunctionsMapping
+    ) -> Any:
+        if self.is_static_expect:
+            return self.expect_value
+
+        # parse expected value with config/teststep/extracted variables
+        return parse_data(self.expect, variables_mapping, functions_mapping)
+
+    def get_message(
+            self, variables_mapping: VariablesMapping, functions_mapping: FunctionsMapping
+    ) -> Any:
+        if self.is_static_message:
+            return self.message_value
+
+        # parse message with config/teststep/extracted variables
+        return parse_data(self.message, variables_mapping, functions_mapping)
+
+    def get_assert_func(self, functions_mapping: FunctionsMapping) -> Callable:
+        assert_entry = self.__assert_entry
+        if assert_entry is None or assert_entry[0] is not functions_mapping:
+            assert_entry = (
+                functions_mapping,
+                get_mapping_function(self.assert_method, functions_mapping),
+            )
+            self.__assert_entry = assert_entry
+
+        return assert_entry[1]
+
+
+class ValidatorPlanRegistry(object):
+    """ validator plans of validators lists, validators of step are compiled at first run and
+        reused in later runs, e.g. parameters rows and load test iterations.
+        plans are keyed by content of validators, thus validators changed in place are compiled again.
+    """
+
+    def __init__(self, maxsize: int = VALIDATOR_PLAN_CACHE_MAXSIZE):
+        self.maxsize = maxsize
+        self.__plans: Dict[Tuple[Text, type], List] = {}
+
+    def get_plans(self, validators: Validators, plan_class: type = ValidatorPlan) -> List:
+        # repr tells apart values equal in hash, e.g. 1, 1.0 and True for type_match
+        key = (repr(validators), plan_class)
+        plans = self.__plans.get(key)
+        if plans is not None:
+            return plans
+
+        plans = [plan_class(validator) for validator in validators]
+        if len(self.__plans) >= self.maxsize:
+            self.__plans.clear()
+
+        self.__plans[key] = plans
+        return plans
+
+    def clear(self):
+        self.__plans.clear()
+
+
+validator_plan_registry = ValidatorPlanRegistry()
+
+
 class ResponseObject(object):
     def __init__(self, resp_obj: requests.Response):
         """ initialize with a requests.Response object
@@ -124,11 +265,12 @@ class ResponseObject(object):
         """
         self.resp_obj = resp_obj
         self.validation_results: Dict = {}
+        self.__resp_obj_meta = None
 
     def __getattr__(self, key):
         if key in ["json", "content", "body"]:
             try:
-                value = self.resp_obj.json()
+                value = get_response_json(self.resp_obj)
             except ValueError:
                 value = self.resp_obj.content
         elif key == "cookies":
@@ -144,18 +286,26 @@ class ResponseObject(object):
         self.__dict__[key] = value
         return value
 
+    def _get_resp_obj_meta(self) -> Dict:
+        """ response data searched by jmespath, built once for all extractors and validators
+        """
+        if self.__resp_obj_meta is None:
+            self.__resp_obj_meta = {
+                "status_code": self.status_code,
+                "headers": self.headers,
+                "cookies": self.cookies,
+                "body": self.body,
+            }
+
+        return self.__resp_obj_meta
+
     def _search_jmespath(self, expr: Text) -> Any:
-        resp_obj_meta = {
-            "status_code": self.status_code,
-            "headers": self.headers,
-            "cookies": self.cookies,
-            "body": self.body,
-        }
-        if not expr.startswith(tuple(resp_obj_meta.keys())):
+        if not is_jmespath(expr):
             return expr
 
+        resp_obj_meta = self._get_resp_obj_meta()
         try:
-            check_value = jmespath.search(expr, resp_obj_meta)
+            check_value = compile_jmespath(expr).search(resp_obj_meta)
         except JMESPathError as ex:
             logger.error(
                 f"failed to search with jmespath\n"
@@ -167,6 +317,30 @@ class ResponseObject(object):
 
         return check_value
 
+    def _search_jmespath_many(self, fields: Dict[Text, Text]) -> Dict[Text, Any]:
+        """ search jmespath fields in one pass, literal fields are kept as they are
+        """
+        values = {key: field for key, field in fields.items() if not is_jmespath(field)}
+        jmespath_fields = {
+            key: field for key, field in fields.items() if key not in values
+        }
+        if len(jmespath_fields) > 1:
+            try:
+                values.update(
+                    compile_jmespath_hash(tuple(jmespath_fields.items())).search(
+                        self._get_resp_obj_meta()
+                    )
+                )
+                jmespath_fields = {}
+            except JMESPathError:
+                # search fields one by one to log the invalid expression
+                pass
+
+        for key, field in jmespath_fields.items():
+            values[key] = self._search_jmespath(field)
+
+        return {key: values[key] for key in fields}
+
     def extract(self,
                 extractors: Dict[Text, Text],
                 variables_mapping: VariablesMapping = None,
@@ -175,17 +349,18 @@ class ResponseObject(object):
         if not extractors:
             return {}
 
-        extract_mapping = {}
+        fields = {}
         for key, field in extractors.items():
             if '$' in field:
                 # field contains variable or function
                 field = parse_data(
                     field, variables_mapping, functions_mapping
                 )
-            field_value = self._search_jmespath(field)
-            extract_mapping[key] = field_value
+            fields[key] = field
+
+        extract_mapping = self._search_jmespath_many(fields)
 
-        logger.info(f"extract mapping: {extract_mapping}")
+        logger.info("extract mapping: {}", extract_mapping)
         return extract_mapping
 
     def validate(
@@ -204,44 +379,41 @@ class ResponseObject(object):
 
         validate_pass = True
         failures = []
+        self.validation_results["validate_extractor"] = []
 
-        for v in validators:
+        plans = validator_plan_registry.get_plans(validators)
 
-            if "validate_extractor" not in self.validation_results:
-                self.validation_results["validate_extractor"] = []
+        # search constant check items in one pass
+        static_check_values = self._search_jmespath_many(
+            {
+                str(index): plan.check
+                for index, plan in enumerate(plans)
+                if plan.is_static_jmespath
+            }
+        )
 
-            u_validator = uniform_validator(v)
+        for index, plan in enumerate(plans):
 
             # check item
-            check_item = u_validator["check"]
-            if "$" in check_item:
-                # check_item is variable or function
-                check_item = parse_data(
-                    check_item, variables_mapping, functions_mapping
-                )
-                check_item = parse_string_value(check_item)
-
-            if check_item and isinstance(check_item, Text):
+            check_item = plan.get_check_item(variables_mapping, functions_mapping)
+            if str(index) in static_check_values:
+                check_value = static_check_values[str(index)]
+            elif check_item and isinstance(check_item, Text):
                 check_value = self._search_jmespath(check_item)
             else:
                 # variable or function evaluation result is "" or not text
                 check_value = check_item
 
             # comparator
-            assert_method = u_validator["assert"]
-            assert_func = get_mapping_function(assert_method, functions_mapping)
+            assert_method = plan.assert_method
+            assert_func = plan.get_assert_func(functions_mapping)
 
             # expect item
-            expect_item = u_validator["expect"]
-            # parse expected value with config/teststep/extracted variables
-            expect_value = parse_data(expect_item, variables_mapping, functions_mapping)
+            expect_item = plan.expect
+            expect_value = plan.get_expect_value(variables_mapping, functions_mapping)
 
             # message
-            message = u_validator["message"]
-            # parse message with config/teststep/extracted variables
-            message = parse_data(message, variables_mapping, functions_mapping)
-
-            validate_msg = f"assert {check_item} {assert_method} {expect_value}({type(expect_value).__name__})"
+            message = plan.get_message(variables_mapping, functions_mapping)
 
             validator_dict = {
                 "comparator": assert_method,
@@ -254,12 +426,18 @@ class ResponseObject(object):
 
             try:
                 assert_func(check_value, expect_value, message)
-                validate_msg += "\t==> pass"
-                logger.info(validate_msg)
+                logger.info(
+                    "assert {} {} {}({})\t==> pass",
+                    check_item,
+                    assert_method,
+                    expect_value,
+                    type(expect_value).__name__,
+                )
                 validator_dict["check_result"] = "pass"
             except AssertionError as ex:
                 validate_pass = False
                 validator_dict["check_result"] = "fail"
+                validate_msg = f"assert {check_item} {assert_method} {expect_value}({type(expect_value).__name__})"
                 validate_msg += "\t==> fail"
                 validate_msg += (
                     f"\n"
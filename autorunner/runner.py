@@ -1,10 +1,17 @@
+import contextvars
 import os
+import threading
 import time
 import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime
-from typing import List, Dict, Text
+from typing import List, Dict, Set, Text, Tuple, Union
 
-from autorunner.dbcore.engine import DBEngine
+from autorunner.dbcore.aio import AsyncDBEngine, get_async_engine, run_concurrently
+from autorunner.dbcore.cache import query_cache
+from autorunner.dbcore.engine import (DBEngine, begin_rollback_scope, end_rollback_scope,
+                                      get_engine, get_pool_stats,
+                                      in_rollback_scope, project_columns)
 from autorunner.uicore.driver import AutoDriver
 from autorunner.uicore.element import ElementObj
 from autorunner.uicore.local import gc
@@ -19,13 +26,20 @@ except ModuleNotFoundError:
 
 from loguru import logger
 
-from autorunner import utils, exceptions
+from autorunner import exceptions
 from autorunner.client import HttpSession
 from autorunner.exceptions import ValidationFailure, ParamsError, NotFoundError
-from autorunner.ext.uploader import prepare_upload_step
+from autorunner.logs import case_log
 from autorunner.loader import load_project_meta, load_testcase_file
-from autorunner.parser import build_url, parse_data, parse_variables_mapping
+from autorunner.memoize import function_cache
+from autorunner.parser import parse_data, parse_variables_mapping
+from autorunner.parser import extract_variables as extract_referenced_variables
+from autorunner.plan import TestCasePlan, compile_testcase, testcase_plan_registry
 from autorunner.response import ResponseObject
+from autorunner.steps import (WaitUntilBackoff, call_hooks, extract_variables,
+                              get_export_variables, get_ref_testcase_path,
+                              log_req_resp_details, parse_config,
+                              parse_step_variables, prepare_request)
 from autorunner.testcase import Config, Step
 from autorunner.utils import merge_variables
 from autorunner.models import (
@@ -36,9 +50,13 @@ from autorunner.models import (
     TestCaseSummary,
     TestCaseTime,
     TestCaseInOut,
+    FunctionCacheStat,
+    DBPoolStat,
+    QueryCacheStat,
+    SqlData,
+    SqlStat,
     ProjectMeta,
     TestCase,
-    Hooks,
     StepTypeEnum, TUiLocation,
 )
 
@@ -50,15 +68,21 @@ class AutoRunner(object):
     success: bool = False  # indicate testcase execution result
     __config: TConfig
     __teststeps: List[TStep]
+    __plan: TestCasePlan = None
     __project_meta: ProjectMeta = None
     __case_id: Text = ""
     __export: List[Text] = []
     __step_datas: List[StepData] = []
     __session: HttpSession = None
-    __session_variables: VariablesMapping = {}
+    # variables of runner session, created for each runner instance if not given
+    __session_variables: VariablesMapping = None
     # time
     __start_at: float = 0
     __duration: float = 0
+    # memoized functions cache hits/misses during run
+    __function_cache_stat: FunctionCacheStat = FunctionCacheStat()
+    __db_pool_stats: List[DBPoolStat] = []
+    __query_cache_stat: QueryCacheStat = QueryCacheStat()
     # log
     __log_path: Text = ""
     # ui 驱动
@@ -73,17 +97,19 @@ class AutoRunner(object):
         return self.__driver
 
     def __init_tests__(self):
-        self.__config = self.config.perform()
-        self.__teststeps = []
-        for step in self.teststeps:
-            self.__teststeps.append(step.perform())
+        # compiled once for Config and Steps of class, reused by parameter rows and load test iterations
+        self.__plan = testcase_plan_registry.get_plan(
+            (self.config, self.teststeps),
+            lambda: TestCase(
+                config=self.config.perform(),
+                teststeps=[step.perform() for step in self.teststeps],
+            ),
+        )
 
     @property
     def raw_testcase(self) -> TestCase:
-        if not hasattr(self, "__config"):
-            self.__init_tests__()
-
-        return TestCase(config=self.__config, teststeps=self.__teststeps)
+        self.__init_tests__()
+        return self.__plan.new_testcase()
 
     def with_project_meta(self, project_meta: ProjectMeta) -> "AutoRunner":
         self.__project_meta = project_meta
@@ -113,52 +139,6 @@ class AutoRunner(object):
         self.__export = export
         return self
 
-    def __call_hooks(
-            self, hooks: Hooks, step_variables: VariablesMapping, hook_msg: Text,
-    ):
-        """ call hook actions.
-
-        Args:
-            hooks (list): each hook in hooks list maybe in two format.
-
-                format1 (str): only call hook functions.
-                    ${func()}
-                format2 (dict): assignment, the value returned by hook function will be assigned to variable.
-                    {"var": "${func()}"}
-
-            step_variables: current step variables to call hook, include two special variables
-
-                request: parsed request dict
-                response: ResponseObject for current response
-
-            hook_msg: setup/teardown request/testcase
-
-        """
-        logger.info(f"call hook actions: {hook_msg}")
-
-        if not isinstance(hooks, List):
-            logger.error(f"Invalid hooks format: {hooks}")
-            return
-
-        for hook in hooks:
-            if isinstance(hook, Text):
-                # format 1: ["${func()}"]
-                logger.debug(f"call hook function: {hook}")
-                parse_data(hook, step_variables, self.__project_meta.functions)
-            elif isinstance(hook, Dict) and len(hook) == 1:
-                # format 2: {"var": "${func()}"}
-                var_name, hook_content = list(hook.items())[0]
-                hook_content_eval = parse_data(
-                    hook_content, step_variables, self.__project_meta.functions
-                )
-                logger.debug(
-                    f"call hook function: {hook_content}, got value: {hook_content_eval}"
-                )
-                logger.debug(f"assign variable: {var_name} = {hook_content_eval}")
-                step_variables[var_name] = hook_content_eval
-            else:
-                logger.error(f"Invalid hook format: {hook}")
-
     def __run_step_ui(self, step: TStep):
         """
         运行及校验UI自动化
@@ -170,7 +150,9 @@ class AutoRunner(object):
 
         # setup hooks
         if step.setup_hooks:
-            self.__call_hooks(step.setup_hooks, step.variables, "setup ui request")
+            call_hooks(
+                step.setup_hooks, step.variables, "setup ui request", self.__project_meta.functions
+            )
 
         location_info = []
         if locations:
@@ -199,13 +181,15 @@ class AutoRunner(object):
 
         # teardown hooks
         if step.teardown_hooks:
-            self.__call_hooks(step.teardown_hooks, step.variables, "teardown request")
+            call_hooks(
+                step.teardown_hooks, step.variables, "teardown request", self.__project_meta.functions
+            )
 
         # validate
         validators = step.validators
         success = False
 
-        def log_req_resp_details():
+        def log_location_details():
             err_msg = "\n\n{} DETAILED UI LOCATION {}\n\n".format("*" * 32, "*" * 32)
             for v in location_info:
                 err_msg += f"{v}\n"
@@ -221,7 +205,7 @@ class AutoRunner(object):
             success = True
         except ValidationFailure:
             success = False
-            log_req_resp_details()
+            log_location_details()
             # log testcase duration before raise ValidationFailure
             self.__duration = time.time() - self.__start_at
             raise
@@ -231,72 +215,30 @@ class AutoRunner(object):
 
         return step_data
 
-    def __run_step_request(self, step: TStep) -> StepData:
+    def __run_step_request(self, step: TStep, session: HttpSession) -> StepData:
         """run teststep: request"""
         step_data = StepData(name=step.name)
 
-        # parse
-        prepare_upload_step(step, self.__project_meta.functions)
-        request_dict = step.request.dict()
-        request_dict.pop("upload", None)
-        parsed_request_dict = parse_data(
-            request_dict, step.variables, self.__project_meta.functions
-        )
-        parsed_request_dict["headers"].setdefault(
-            "HRUN-Request-ID",
-            f"HRUN-{self.__case_id}-{str(int(time.time() * 1000))[-6:]}",
+        # parse request and call setup hooks
+        method, url, parsed_request_dict = prepare_request(
+            step, self.__config, self.__project_meta.functions, self.__case_id
         )
-        step.variables["request"] = parsed_request_dict
-
-        # setup hooks
-        if step.setup_hooks:
-            self.__call_hooks(step.setup_hooks, step.variables, "setup request")
-
-        # prepare arguments
-        method = parsed_request_dict.pop("method")
-        url_path = parsed_request_dict.pop("url")
-        url = build_url(self.__config.base_url, url_path)
-        parsed_request_dict["verify"] = self.__config.verify
-        parsed_request_dict["json"] = parsed_request_dict.pop("req_json", {})
 
         # request
-        resp = self.__session.request(method, url, **parsed_request_dict)
+        resp = session.request(method, url, **parsed_request_dict)
         resp_obj = ResponseObject(resp)
         step.variables["response"] = resp_obj
 
         # teardown hooks
         if step.teardown_hooks:
-            self.__call_hooks(step.teardown_hooks, step.variables, "teardown request")
-
-        def log_req_resp_details():
-            err_msg = "\n{} DETAILED REQUEST & RESPONSE {}\n".format("*" * 32, "*" * 32)
-
-            # log request
-            err_msg += "====== request details ======\n"
-            err_msg += f"url: {url}\n"
-            err_msg += f"method: {method}\n"
-            headers = parsed_request_dict.pop("headers", {})
-            err_msg += f"headers: {headers}\n"
-            for k, v in parsed_request_dict.items():
-                v = utils.omit_long_data(v)
-                err_msg += f"{k}: {repr(v)}\n"
-
-            err_msg += "\n"
-
-            # log response
-            err_msg += "====== response details ======\n"
-            err_msg += f"status_code: {resp.status_code}\n"
-            err_msg += f"headers: {resp.headers}\n"
-            err_msg += f"body: {repr(resp.text)}\n"
-            logger.error(err_msg)
+            call_hooks(
+                step.teardown_hooks, step.variables, "teardown request", self.__project_meta.functions
+            )
 
         # extract
-        extractors = step.extract
-        extract_mapping = resp_obj.extract(extractors, step.variables, self.__project_meta.functions)
+        extract_mapping = extract_variables(step, resp_obj, self.__project_meta.functions)
         step_data.export_vars = extract_mapping
-
         variables_mapping = step.variables
-        variables_mapping.update(extract_mapping)
 
         # validate
         validators = step.validators
@@ -308,7 +250,7 @@ class AutoRunner(object):
             session_success = True
         except ValidationFailure:
             session_success = False
-            log_req_resp_details()
+            log_req_resp_details(method, url, parsed_request_dict, resp)
             # log testcase duration before raise ValidationFailure
             self.__duration = time.time() - self.__start_at
             raise
@@ -316,18 +258,18 @@ class AutoRunner(object):
             self.success = session_success
             step_data.success = session_success
 
-            if hasattr(self.__session, "data"):
+            if hasattr(session, "data"):
                 # autorunner.client.HttpSession, not locust.clients.HttpSession
                 # save request & response meta data
-                self.__session.data.success = session_success
-                self.__session.data.validators = resp_obj.validation_results
+                session.data.success = session_success
+                session.data.validators = resp_obj.validation_results
 
                 # save step data
-                step_data.data = self.__session.data
+                step_data.data = session.data
 
         return step_data
 
-    def __run_step_testcase(self, step: TStep) -> StepData:
+    def __run_step_testcase(self, step: TStep, session: HttpSession) -> StepData:
         """run teststep: referenced testcase"""
         step_data = StepData(name=step.name)
         step_variables = step.variables
@@ -335,28 +277,25 @@ class AutoRunner(object):
 
         # setup hooks
         if step.setup_hooks:
-            self.__call_hooks(step.setup_hooks, step_variables, "setup testcase")
+            call_hooks(
+                step.setup_hooks, step_variables, "setup testcase", self.__project_meta.functions
+            )
 
         if hasattr(step.testcase, "config") and hasattr(step.testcase, "teststeps"):
             testcase_cls = step.testcase
             case_result = (
                 testcase_cls()
-                .with_session(self.__session)
+                .with_session(session)
                 .with_case_id(self.__case_id)
                 .with_variables(step_variables)
                 .with_export(step_export)
                 .run()
             )
         elif isinstance(step.testcase, Text):
-            if os.path.isabs(step.testcase):
-                ref_testcase_path = step.testcase
-            else:
-                ref_testcase_path = os.path.join(
-                    self.__project_meta.RootDir, step.testcase
-                )
+            ref_testcase_path = get_ref_testcase_path(step, self.__project_meta)
             case_result = (
                 AutoRunner()
-                .with_session(self.__session)
+                .with_session(session)
                 .with_case_id(self.__case_id)
                 .with_is_reference(True)
                 .with_driver(self.__driver)
@@ -372,7 +311,9 @@ class AutoRunner(object):
 
         # teardown hooks
         if step.teardown_hooks:
-            self.__call_hooks(step.teardown_hooks, step.variables, "teardown testcase")
+            call_hooks(
+                step.teardown_hooks, step.variables, "teardown testcase", self.__project_meta.functions
+            )
 
         step_data.data = case_result.get_step_datas()  # list of step data
         step_data.export_vars = case_result.get_export_variables()
@@ -380,13 +321,14 @@ class AutoRunner(object):
         self.success = case_result.success
 
         if step_data.export_vars:
-            logger.info(f"export variables: {step_data.export_vars}")
+            logger.info("export variables: {}", step_data.export_vars)
 
         return step_data
 
-    def __run_step(self, step: TStep) -> Dict:
-        """run teststep, teststep maybe a request or referenced testcase"""
-        logger.info(f"run step begin: {step.name} >>>>>>")
+    def __run_step(self, step: TStep, session: HttpSession = None) -> StepData:
+        """run teststep with session, teststep maybe a request or referenced testcase"""
+        session = session or self.__session
+        logger.info("run step begin: {} >>>>>>", step.name)
         # _type = os.getenv('type', 'api')
         step_type = step.step_type
         if step_type not in StepTypeEnum:
@@ -396,9 +338,9 @@ class AutoRunner(object):
 
         if _type == StepTypeEnum.API:
             if step.request:
-                step_data = self.__run_step_request(step)
+                step_data = self.__run_step_request(step, session)
             elif step.testcase:
-                step_data = self.__run_step_testcase(step)
+                step_data = self.__run_step_testcase(step, session)
             else:
                 raise ParamsError(
                     f"teststep is neither a request nor a referenced testcase: {step.dict()}"
@@ -417,7 +359,7 @@ class AutoRunner(object):
                         self.__driver.quit()
                     raise
             elif step.testcase:
-                step_data = self.__run_step_testcase(step)
+                step_data = self.__run_step_testcase(step, session)
             else:
                 raise ParamsError(
                     f"teststep is neither a location nor a referenced testcase: {step.dict()}"
@@ -427,105 +369,458 @@ class AutoRunner(object):
         else:
             raise NotFoundError("请正确设置参数type")
 
-        self.__step_datas.append(step_data)
-        logger.info(f"run step end: {step.name} <<<<<<\n")
-        return step_data.export_vars
+        logger.info("run step end: {} <<<<<<\n", step.name)
+        return step_data
 
-    def __parse_config(self, config: TConfig):
-        config.variables.update(self.__session_variables)
-        config.variables = parse_variables_mapping(
-            config.variables, self.__project_meta.functions
-        )
-        config.name = parse_data(
-            config.name, config.variables, self.__project_meta.functions
-        )
-        config.base_url = parse_data(
-            config.base_url, config.variables, self.__project_meta.functions
-        )
+    def __prepare_step(
+            self, step: TStep, extracted_variables: VariablesMapping
+    ) -> List[SqlStat]:
+        """ query sql data and parse step variables before running step, returns sql stats
+        """
+        sql_stats: List[SqlStat] = []
+        # sql handle
+        if step.sql:
+            bind_variables = None
+            bind_names: Set[Text] = set()
+            sql_datas = []
+            for sql_data in step.sql:
+                # step datasource > config datasource
+                datasource = sql_data.datasource if sql_data.datasource and self.__config.datasource != sql_data.datasource else self.__config.datasource
+                if datasource:
+                    datasource_url = os.getenv(datasource.strip().upper())
+                    if datasource_url is None:
+                        raise ValueError(f'未查询到数据源：{datasource}，请确认！')
+                    gc.engine = get_engine(datasource_url)
+                    bind_names.update(self.__get_sql_bind_names(sql_data))
+                    sql_datas.append((datasource, datasource_url, sql_data))
+
+            if bind_names:
+                # variables referenced by params, parsed once for all sql of step
+                bind_variables = parse_variables_mapping(
+                    merge_variables(
+                        merge_variables(step.variables, extracted_variables),
+                        self.__config.variables,
+                    ),
+                    self.__project_meta.functions,
+                    bind_names,
+                )
 
-    def run_testcase(self, testcase: TestCase) -> "AutoRunner":
-        """run specified testcase
+            if self.__config.async_sql and not in_rollback_scope():
+                sql_stats = self.__run_sql_datas_async(step, sql_datas, bind_variables)
+            else:
+                for datasource, datasource_url, sql_data in sql_datas:
+                    sql_stats.extend(self.__run_sql_data(
+                        step, sql_data, get_engine(datasource_url), datasource, bind_variables
+                    ))
+        elif self.__config.datasource:
+            datasource = os.getenv(self.__config.datasource.strip().upper())
+            if datasource is None:
+                raise ValueError(f'未查询到数据源：{datasource}，请确认！')
+            gc.engine = get_engine(datasource)
+
+        parse_step_variables(
+            step, extracted_variables, self.__config, self.__project_meta.functions
+        )
+        return sql_stats
+
+    def __run_sql_data(
+            self,
+            step: TStep,
+            sql_data: SqlData,
+            db: DBEngine,
+            datasource: Text,
+            bind_variables: VariablesMapping = None,
+    ) -> List[SqlStat]:
+        """ execute dml of sql data with bound params, query results are saved to step variables
+        """
+        params = self.__get_sql_params(sql_data, bind_variables)
+
+        sql_stats = []
+        for dml in sql_data.dml:
+            start_at = time.time()
+            row_count = 0
+            if isinstance(params, List):
+                # bulk insert/update/delete with list of params
+                row_count = db.executemany(dml, params)
+            else:
+                if sql_data.stream:
+                    rows = db.iter_rows(dml, sql_data.batch_size, sql_data.columns, params)
+                else:
+                    result = db.fetchall(
+                        dml, params=params, cache=sql_data.cache, cache_ttl=sql_data.cache_ttl
+                    )
+                    if isinstance(result, Dict):
+                        # count of rows affected by insert/update/delete
+                        rows, row_count = [], result["count"]
+                    else:
+                        rows = [project_columns(r, sql_data.columns) for r in result or []]
+
+                # row values are saved to step variables one by one, the last row wins
+                for row in rows:
+                    step.variables.update(row)
+                    if bind_variables is not None:
+                        bind_variables.update(row)
+                    row_count += 1
+
+            if sql_data.count_as:
+                step.variables[sql_data.count_as] = row_count
+
+            sql_stats.append(SqlStat(
+                datasource=datasource,
+                dml=dml,
+                params_count=len(params) if isinstance(params, List) else 1,
+                row_count=row_count,
+                elapsed_ms=round((time.time() - start_at) * 1000, 2),
+            ))
+
+        return sql_stats
+
+    @staticmethod
+    def __get_sql_bind_names(sql_data: SqlData) -> Set[Text]:
+        """ names of variables referenced in params of sql data
+        """
+        if sql_data.params:
+            return extract_referenced_variables(sql_data.params)
 
-        Examples:
-            >>> testcase_obj = TestCase(config=TConfig(...), teststeps=[TStep(...)])
-            >>> AutoRunner().with_project_meta(project_meta).run_testcase(testcase_obj)
+        return set()
 
+    def __get_sql_params(
+            self, sql_data: SqlData, bind_variables: VariablesMapping = None
+    ) -> Union[Dict, List[Dict], None]:
+        """ params bound to :name of dml, dml without params is executed as it is
         """
-        self.__config = testcase.config
-        self.__teststeps = testcase.teststeps
+        if sql_data.params:
+            return parse_data(sql_data.params, bind_variables, self.__project_meta.functions)
+
+        return None
+
+    def __run_sql_datas_async(
+            self,
+            step: TStep,
+            sql_datas: List[Tuple[Text, Text, SqlData]],
+            bind_variables: VariablesMapping = None,
+    ) -> List[SqlStat]:
+        """ run sql datas of each datasource in one task with async engine, tasks of datasources
+            are run concurrently. dml of one datasource are run one by one in order, thus query rows
+            are bound to later dml of the same datasource, but not to dml of other datasources.
+            query results are saved to step variables in the order of sql datas as running one by one.
+        """
+        # sql datas of each datasource url, in the order of sql datas
+        datasource_sql_datas: Dict[Text, List[Tuple[int, Text, SqlData]]] = {}
+        for index, (datasource, datasource_url, sql_data) in enumerate(sql_datas):
+            datasource_sql_datas.setdefault(datasource_url, []).append(
+                (index, datasource, sql_data)
+            )
 
-        # prepare
-        self.__project_meta = self.__project_meta or load_project_meta(
-            self.__config.path
+        # params are parsed in managed loop, functions of debugtalk.py run with context of this run
+        context = contextvars.copy_context()
+        results = run_concurrently([
+            self.__run_datasource_sql_datas_async(
+                context,
+                datasource_url,
+                items,
+                dict(bind_variables) if bind_variables is not None else None,
+            )
+            for datasource_url, items in datasource_sql_datas.items()
+        ])
+
+        sql_stats = []
+        dml_results = sorted(
+            (dml_result for datasource_results in results for dml_result in datasource_results),
+            key=lambda dml_result: dml_result[0],
         )
-        self.__parse_config(self.__config)
-        self.__start_at = time.time()
-        self.__step_datas: List[StepData] = []
-        self.__session = self.__session or HttpSession()
-        # save extracted variables of teststeps
-        extracted_variables: VariablesMapping = {}
-        self.__type = os.getenv('TYPE', StepTypeEnum.API)
+        for _, sql_data, sql_stat, variables in dml_results:
+            step.variables.update(variables)
+            if sql_data.count_as:
+                step.variables[sql_data.count_as] = sql_stat.row_count
+
+            sql_stats.append(sql_stat)
+
+        return sql_stats
+
+    async def __run_datasource_sql_datas_async(
+            self,
+            context: contextvars.Context,
+            datasource_url: Text,
+            sql_datas: List[Tuple[int, Text, SqlData]],
+            bind_variables: VariablesMapping = None,
+    ) -> List[Tuple[Tuple[int, int], SqlData, SqlStat, VariablesMapping]]:
+        """ run dml of sql datas of one datasource one by one,
+            returns (order, sql data, sql stat, variables of query rows) of each dml
+        """
+        db = get_async_engine(datasource_url)
+        results = []
+        for index, datasource, sql_data in sql_datas:
+            # parsed after previous dml, rows of previous queries are bound
+            params = context.run(self.__get_sql_params, sql_data, bind_variables)
+            for dml_index, dml in enumerate(sql_data.dml):
+                start_at = time.time()
+                variables, row_count = await self.__run_dml_async(db, sql_data, dml, params)
+                if bind_variables is not None:
+                    bind_variables.update(variables)
+
+                sql_stat = SqlStat(
+                    datasource=datasource,
+                    dml=dml,
+                    params_count=len(params) if isinstance(params, List) else 1,
+                    row_count=row_count,
+                    elapsed_ms=round((time.time() - start_at) * 1000, 2),
+                )
+                results.append(((index, dml_index), sql_data, sql_stat, variables))
 
-        if self.__type == StepTypeEnum.UI:
-            if not self.__driver:
-                self.__driver = AutoDriver()
-                self.__driver.open(self.__config.base_url)
+        return results
 
-        # run teststeps
-        for step in self.__teststeps:
-
-            if "skip" in step.variables:
-                if step.skip == 'True':
-                    continue
-                elif step.skip == '$skip':
-                    step.skip = step.variables["skip"]
-
-            if step.skip:
-                continue
-
-            # sql handle
-            if step.sql:
-                for sql_data in step.sql:
-                    # step datasource > config datasource
-                    datasource = sql_data.datasource if sql_data.datasource and self.__config.datasource != sql_data.datasource else self.__config.datasource
-                    if datasource:
-                        datasource_url = os.getenv(datasource.strip().upper())
-                        if datasource_url is None:
-                            raise ValueError(f'未查询到数据源：{datasource}，请确认！')
-                        db = DBEngine(datasource_url)
-                        gc.engine = db
-                        for dml in sql_data.dml:
-                            result = db.fetchall(dml)
-                            [step.variables.update(r) for r in result]
-            elif self.__config.datasource:
-                datasource = os.getenv(self.__config.datasource.strip().upper())
-                if datasource is None:
-                    raise ValueError(f'未查询到数据源：{datasource}，请确认！')
-                gc.engine = DBEngine(datasource)
-
-            # override variables
-            # step variables > extracted variables from previous steps
-            step.variables = merge_variables(step.variables, extracted_variables)
-            # step variables > testcase config variables
-            step.variables = merge_variables(step.variables, self.__config.variables)
-
-            # parse variables
-            step.variables = parse_variables_mapping(
-                step.variables, self.__project_meta.functions
+    @staticmethod
+    async def __run_dml_async(
+            db: AsyncDBEngine, sql_data: SqlData, dml: Text, params: Union[Dict, List[Dict], None]
+    ) -> Tuple[VariablesMapping, int]:
+        """ same as dml run in __run_sql_data, returns variables of query rows (the last row wins)
+            and count of rows
+        """
+        variables, row_count = {}, 0
+        if isinstance(params, List):
+            # bulk insert/update/delete with list of params
+            row_count = await db.executemany(dml, params)
+        elif sql_data.stream:
+            async for row in db.iter_rows(dml, sql_data.batch_size, sql_data.columns, params):
+                variables.update(row)
+                row_count += 1
+        else:
+            result = await db.fetchall(
+                dml, params, cache=sql_data.cache, cache_ttl=sql_data.cache_ttl
             )
+            if isinstance(result, Dict):
+                # count of rows affected by insert/update/delete
+                row_count = result["count"]
+            else:
+                for row in result or []:
+                    variables.update(project_columns(row, sql_data.columns))
+                    row_count += 1
+
+        return variables, row_count
+
+    def __run_step_until(
+            self, step: TStep, extracted_variables: VariablesMapping, session: HttpSession = None
+    ) -> StepData:
+        """ prepare and run step, if wait_until configured, step is prepared and run again
+            with backoff until validators pass, attempts exceed or deadline reached.
+        """
+        wait_until = step.wait_until
+        if not wait_until or not step.request:
+            sql_stats = self.__prepare_step(step, extracted_variables)
+            step_data = self.__run_step(step, session)
+            step_data.sql_stats = sql_stats
+            return step_data
+
+        # variables are prepared in each attempt, thus sql is queried and functions are called again
+        raw_variables = step.variables
+        backoff = WaitUntilBackoff(wait_until)
+        while True:
+            backoff.attempts += 1
+            step.variables = dict(raw_variables)
+            try:
+                sql_stats = self.__prepare_step(step, extracted_variables)
+                step_data = self.__run_step(step, session)
+                break
+            except ValidationFailure:
+                delay = backoff.next_delay(step)
+                if delay is None:
+                    raise
+
+                time.sleep(delay)
+
+        step_data.sql_stats = sql_stats
+        step_data.attempts = backoff.attempts
+        step_data.wait_seconds = round(backoff.wait_seconds, 3)
+        return step_data
+
+    def __run_step_in_session(
+            self, step: TStep, extracted_variables: VariablesMapping, lock: threading.Lock
+    ) -> StepData:
+        """ run step in its own session sharing connections and cookies with testcase session,
+            thus request data of concurrent steps are recorded separately.
+        """
+        session = HttpSession()
+        for prefix, adapter in self.__session.adapters.items():
+            session.mount(prefix, adapter)
+
+        with lock:
+            session.headers.update(self.__session.headers)
+            session.cookies.update(self.__session.cookies)
+
+        step_data = self.__run_step_until(step, extracted_variables, session)
+
+        with lock:
+            self.__session.cookies.update(session.cookies)
+
+        return step_data
+
+    def __run_teststeps(self, teststeps: List[TStep]) -> VariablesMapping:
+        """ run teststeps one by one, or concurrently if parallel_steps configured,
+            returns extracted variables
+        """
+        if (
+                self.__config.parallel_steps > 1
+                and self.__type == StepTypeEnum.API
+                and isinstance(self.__session, HttpSession)
+        ):
+            if in_rollback_scope():
+                # sessions of rollback scope are copied to step threads, one session can not be
+                # used by threads at the same time
+                raise ParamsError(
+                    f"parallel_steps is not supported in rollback mode: {self.__config.name}"
+                )
+
+            return self.__run_teststeps_parallel(teststeps, self.__config.parallel_steps)
 
+        # save extracted variables of teststeps
+        extracted_variables: VariablesMapping = {}
+        for step in teststeps:
             # run step
             if USE_ALLURE:
                 with allure.step(f"step: {step.name}"):
-                    extract_mapping = self.__run_step(step)
+                    step_data = self.__run_step_until(step, extracted_variables)
             else:
-                extract_mapping = self.__run_step(step)
+                step_data = self.__run_step_until(step, extracted_variables)
 
+            self.__step_datas.append(step_data)
             # save extracted variables to session variables
-            extracted_variables.update(extract_mapping)
+            extracted_variables.update(step_data.export_vars)
+
+        return extracted_variables
+
+    def __run_teststeps_parallel(
+            self, teststeps: List[TStep], max_workers: int
+    ) -> VariablesMapping:
+        """ run teststeps in thread pool, each step starts once steps it depends on are finished.
+            each step sees variables extracted by steps it depends on directly or indirectly,
+            step datas and extracted variables are merged in teststeps order.
+        """
+        dependencies = self.__plan.dependencies
+        ancestors: List[Set[int]] = []
+        for step_dependencies in dependencies:
+            step_ancestors = set(step_dependencies)
+            for index in step_dependencies:
+                step_ancestors |= ancestors[index]
+            ancestors.append(step_ancestors)
+
+        step_datas: Dict[int, StepData] = {}
+        pending = list(range(len(teststeps)))
+        running: Dict[Future, int] = {}
+        failures: Dict[int, BaseException] = {}
+        lock = threading.Lock()
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while pending or running:
+                if not failures:
+                    for index in list(pending):
+                        if not dependencies[index] <= step_datas.keys():
+                            continue
+
+                        extracted_variables = {}
+                        for ancestor_index in sorted(ancestors[index]):
+                            extracted_variables.update(step_datas[ancestor_index].export_vars)
+
+                        pending.remove(index)
+                        # run with current context, e.g. gc.engine
+                        future = executor.submit(
+                            contextvars.copy_context().run,
+                            self.__run_step_in_session,
+                            teststeps[index],
+                            extracted_variables,
+                            lock,
+                        )
+                        running[future] = index
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = running.pop(future)
+                    try:
+                        step_datas[index] = future.result()
+                    except BaseException as ex:
+                        failures[index] = ex
+
+        extracted_variables = {}
+        for index in sorted(step_datas):
+            self.__step_datas.append(step_datas[index])
+            extracted_variables.update(step_datas[index].export_vars)
+
+        if failures:
+            self.success = False
+            # raise failure of the first failed step, as running steps one by one
+            raise failures[min(failures)]
+
+        self.success = all(step_data.success for step_data in step_datas.values())
+        return extracted_variables
+
+    def run_testcase(self, testcase: TestCase) -> "AutoRunner":
+        """run specified testcase
+
+        Examples:
+            >>> testcase_obj = TestCase(config=TConfig(...), teststeps=[TStep(...)])
+            >>> AutoRunner().with_project_meta(project_meta).run_testcase(testcase_obj)
+
+        """
+        return self.run_plan(compile_testcase(testcase))
+
+    def run_plan(self, plan: TestCasePlan, config: TConfig = None) -> "AutoRunner":
+        """run compiled testcase plan, config and teststeps of this run are copied from plan
+
+        Examples:
+            >>> plan = compile_testcase(testcase_obj)
+            >>> AutoRunner().with_project_meta(project_meta).run_plan(plan)
+
+        """
+        self.__plan = plan
+        self.__config = config or plan.new_config()
+        self.__teststeps = plan.new_teststeps()
+        if self.__session_variables is None:
+            self.__session_variables = {}
+
+        # prepare
+        self.__project_meta = self.__project_meta or load_project_meta(
+            self.__config.path
+        )
+        if not self.__is_reference:
+            query_cache.clear()
+        query_cache_stat_before = query_cache.stat()
+        pool_stats_before = get_pool_stats()
+        # memoized calls are counted in this run, results of run scope are dropped at the end
+        function_cache_token = function_cache.begin_run()
+        try:
+            parse_config(self.__config, self.__session_variables, self.__project_meta.functions)
+            self.__start_at = time.time()
+            self.__step_datas: List[StepData] = []
+            self.__session = self.__session or HttpSession()
+            self.__type = os.getenv('TYPE', StepTypeEnum.API)
+
+            if self.__type == StepTypeEnum.UI:
+                if not self.__driver:
+                    self.__driver = AutoDriver()
+                    self.__driver.open(self.__config.base_url)
+
+            # run teststeps, changes of sql are rolled back at the end in rollback mode
+            rollback_token = begin_rollback_scope() if self.__config.rollback else None
+            try:
+                extracted_variables = self.__run_teststeps(self.__teststeps)
+            finally:
+                end_rollback_scope(rollback_token)
+        finally:
+            self.__function_cache_stat = function_cache.end_run(function_cache_token)
 
         self.__session_variables.update(extracted_variables)
         self.__duration = time.time() - self.__start_at
+        self.__db_pool_stats = get_pool_stats(since=pool_stats_before)
+        query_cache_stat_after = query_cache.stat()
+        self.__query_cache_stat = QueryCacheStat(
+            hits=query_cache_stat_after.hits - query_cache_stat_before.hits,
+            misses=query_cache_stat_after.misses - query_cache_stat_before.misses,
+            invalidations=query_cache_stat_after.invalidations - query_cache_stat_before.invalidations,
+            size=query_cache_stat_after.size,
+        )
         if self.__driver and not self.__is_reference:
             self.__driver.quit()
         return self
@@ -545,8 +840,7 @@ class AutoRunner(object):
 
         """
         self.__init_tests__()
-        testcase_obj = TestCase(config=self.__config, teststeps=self.__teststeps)
-        return self.run_testcase(testcase_obj)
+        return self.run_plan(self.__plan)
 
     def get_step_datas(self) -> List[StepData]:
         return self.__step_datas
@@ -554,16 +848,7 @@ class AutoRunner(object):
     def get_export_variables(self) -> Dict:
         # override testcase export vars with step export
         export_var_names = self.__export or self.__config.export
-        export_vars_mapping = {}
-        for var_name in export_var_names:
-            if var_name not in self.__session_variables:
-                raise ParamsError(
-                    f"failed to export variable {var_name} from session variables {self.__session_variables}"
-                )
-
-            export_vars_mapping[var_name] = self.__session_variables[var_name]
-
-        return export_vars_mapping
+        return get_export_variables(export_var_names, self.__session_variables)
 
     def get_summary(self) -> TestCaseSummary:
         """get testcase result summary"""
@@ -584,11 +869,25 @@ class AutoRunner(object):
             ),
             log=self.__log_path,
             step_datas=self.__step_datas,
+            function_cache=self.__function_cache_stat,
+            db_pools=self.__db_pool_stats,
+            query_cache=self.__query_cache_stat,
         )
 
     def test_start(self, param: Dict = None) -> "AutoRunner":
         """main entrance, discovered by pytest"""
         self.__init_tests__()
+        return self.start_plan(self.__plan, param)
+
+    def start_testcase(self, testcase: TestCase, param: Dict = None) -> "AutoRunner":
+        """run testcase as a pytest test, with case id, log file, allure meta and parameter prepared"""
+        return self.start_plan(compile_testcase(testcase), param)
+
+    def start_plan(self, plan: TestCasePlan, param: Dict = None) -> "AutoRunner":
+        """run compiled testcase plan as a pytest test, parameter rows share the same plan"""
+        self.__config = plan.new_config()
+        if self.__session_variables is None:
+            self.__session_variables = {}
         self.__project_meta = self.__project_meta or load_project_meta(
             self.__config.path
         )
@@ -596,30 +895,27 @@ class AutoRunner(object):
         self.__log_path = self.__log_path or os.path.join(
             self.__project_meta.RootDir, "logs", f"{self.__case_id}.run.log"
         )
-        log_handler = logger.add(self.__log_path, level="DEBUG")
-
-        # parse config name
-        config_variables = self.__config.variables
-        if param:
-            config_variables.update(param)
-        config_variables.update(self.__session_variables)
-        self.__config.name = parse_data(
-            self.__config.name, config_variables, self.__project_meta.functions
-        )
+        try:
+            # debug details of testcase are written to log file in background
+            with case_log(self.__log_path):
+                # parse config name
+                config_variables = self.__config.variables
+                if param:
+                    config_variables.update(param)
+                config_variables.update(self.__session_variables)
+                self.__config.name = parse_data(
+                    self.__config.name, config_variables, self.__project_meta.functions
+                )
 
-        if USE_ALLURE:
-            # update allure report meta
-            allure.dynamic.title(self.__config.name)
-            allure.dynamic.description(f"TestCase ID: {self.__case_id}")
+                if USE_ALLURE:
+                    # update allure report meta
+                    allure.dynamic.title(self.__config.name)
+                    allure.dynamic.description(f"TestCase ID: {self.__case_id}")
 
-        logger.info(
-            f"Start to run testcase: {self.__config.name}, TestCase ID: {self.__case_id}"
-        )
+                logger.info(
+                    "Start to run testcase: {}, TestCase ID: {}", self.__config.name, self.__case_id
+                )
 
-        try:
-            return self.run_testcase(
-                TestCase(config=self.__config, teststeps=self.__teststeps)
-            )
+                return self.run_plan(plan, self.__config)
         finally:
-            logger.remove(log_handler)
-            logger.info(f"generate testcase log: {self.__log_path}")
+            logger.info("generate testcase log: {}", self.__log_path)
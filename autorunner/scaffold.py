@@ -162,7 +162,15 @@ teststeps:
         - eq: ["body.form.foo2", "bar21"]
 """
     ignore_content = "\n".join(
-        [".env", "reports/*", "__pycache__/*", "*.pyc", ".python-version", "logs/*"]
+        [
+            ".env",
+            "reports/*",
+            "__pycache__/*",
+            "*.pyc",
+            ".python-version",
+            "logs/*",
+            ".autorunner_cache/*",
+        ]
     )
     demo_debugtalk_content = """import time
 
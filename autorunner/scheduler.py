@@ -0,0 +1,284 @@
+"""
+多进程用例调度 run collected testcases in a process pool, e.g. arun --workers auto testcases/
+
+Tests are collected once in main process, then split into units of one testcase file
+or one parameter row. Each worker process pulls next unit once it is idle and runs it
+with pytest, testcase summaries of all units are merged into one summary.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Text, Tuple, Union
+
+import pytest
+from loguru import logger
+
+from autorunner import exceptions
+from autorunner.loader import load_project_meta
+from autorunner.models import TestCaseSummary
+from autorunner.utils import get_platform
+
+""" schedule each testcase file or each parameter row as one unit
+"""
+GRANULARITY_TESTCASE = "testcase"
+GRANULARITY_PARAM = "param"
+
+""" environment variable set in worker processes, summary conftest is skipped in workers
+"""
+WORKER_ENV_NAME = "AUTORUNNER_WORKER"
+
+
+def parse_workers(workers: Union[Text, int, None]) -> int:
+    """ parse workers count, auto for cpu count
+    """
+    if workers is None:
+        return 1
+
+    if workers == "auto":
+        return os.cpu_count() or 1
+
+    try:
+        workers = int(workers)
+    except ValueError:
+        raise exceptions.ParamsError(
+            f"Invalid workers: {workers}, should be integer or auto"
+        )
+
+    if workers < 1:
+        raise exceptions.ParamsError(f"Invalid workers: {workers}, should be >= 1")
+
+    return workers
+
+
+def build_tests_summary(
+        testcase_summaries: List[TestCaseSummary], start_at: float, duration: float
+) -> Dict:
+    """ build tests summary with testcase summaries, same as summary.json of --save-tests
+    """
+    summary = {
+        "success": True,
+        "stat": {
+            "testcases": {"total": 0, "success": 0, "fail": 0},
+            "teststeps": {"total": 0, "failures": 0, "successes": 0},
+        },
+        "time": {"start_at": start_at, "duration": duration},
+        "platform": get_platform(),
+        "db_pools": [],
+        "query_cache": {"hits": 0, "misses": 0, "invalidations": 0, "hit_rate": 0},
+        "details": [],
+    }
+    # pool stats of each datasource, counters are summed and gauges are peak values
+    db_pools_mapping: Dict[Text, Dict] = {}
+
+    for testcase_summary in testcase_summaries:
+        summary["success"] &= testcase_summary.success
+
+        summary["stat"]["testcases"]["total"] += 1
+        summary["stat"]["teststeps"]["total"] += len(testcase_summary.step_datas)
+        if testcase_summary.success:
+            summary["stat"]["testcases"]["success"] += 1
+            summary["stat"]["teststeps"]["successes"] += len(
+                testcase_summary.step_datas
+            )
+        else:
+            summary["stat"]["testcases"]["fail"] += 1
+            summary["stat"]["teststeps"]["successes"] += (
+                len(testcase_summary.step_datas) - 1
+            )
+            summary["stat"]["teststeps"]["failures"] += 1
+
+        for key in ["hits", "misses", "invalidations"]:
+            summary["query_cache"][key] += getattr(testcase_summary.query_cache, key)
+
+        for pool_stat in testcase_summary.db_pools:
+            if pool_stat.datasource not in db_pools_mapping:
+                db_pools_mapping[pool_stat.datasource] = pool_stat.dict()
+                continue
+
+            db_pool = db_pools_mapping[pool_stat.datasource]
+            db_pool["connects"] += pool_stat.connects
+            db_pool["checkouts"] += pool_stat.checkouts
+            for key in ["pool_size", "checked_out", "overflow"]:
+                db_pool[key] = max(db_pool[key], getattr(pool_stat, key))
+
+        testcase_summary_json = testcase_summary.dict()
+        testcase_summary_json["records"] = testcase_summary_json.pop("step_datas")
+        summary["details"].append(testcase_summary_json)
+
+    summary["db_pools"] = list(db_pools_mapping.values())
+    query_cache_lookups = summary["query_cache"]["hits"] + summary["query_cache"]["misses"]
+    if query_cache_lookups:
+        summary["query_cache"]["hit_rate"] = round(
+            summary["query_cache"]["hits"] / query_cache_lookups, 4
+        )
+    return summary
+
+
+class UnitsCollector(object):
+    """ pytest plugin to collect test units without running
+    """
+
+    def __init__(self, granularity: Text):
+        self.granularity = granularity
+        self.units: List[Text] = []
+
+    def pytest_collection_finish(self, session):
+        root_path = str(session.config.rootpath)
+        for item in session.items:
+            if self.granularity == GRANULARITY_PARAM:
+                node_id = item.nodeid
+            else:
+                node_id = item.nodeid.split("::", 1)[0]
+
+            # absolute node id, not affected by working directory
+            unit = os.path.join(root_path, node_id)
+            if unit not in self.units:
+                self.units.append(unit)
+
+
+def get_testcase_summary(item) -> Union[TestCaseSummary, None]:
+    """ get testcase summary of pytest item, None if item is not a testcase or has not run
+    """
+    runner = getattr(item, "instance", None)
+    if runner is None or not hasattr(runner, "get_summary"):
+        return None
+
+    try:
+        return runner.get_summary()
+    except Exception as ex:
+        # testcase not started, e.g. failed in setup, deselected or only collected
+        logger.debug(f"failed to get testcase summary of {item.nodeid}: {ex}")
+        return None
+
+
+def get_testcase_summaries(items: List) -> List[TestCaseSummary]:
+    """ get testcase summaries of pytest items which have run
+    """
+    testcase_summaries = []
+    for item in items:
+        testcase_summary = get_testcase_summary(item)
+        if testcase_summary is not None:
+            testcase_summaries.append(testcase_summary)
+
+    return testcase_summaries
+
+
+def merge_exit_codes(exit_codes: List[int]) -> int:
+    """ merge pytest exit codes of units, tests failed(1) in any unit takes precedence,
+        otherwise the first non-zero exit code, e.g. no tests collected in one unit
+    """
+    if int(pytest.ExitCode.TESTS_FAILED) in exit_codes:
+        return int(pytest.ExitCode.TESTS_FAILED)
+
+    for exit_code in exit_codes:
+        if exit_code != int(pytest.ExitCode.OK):
+            return exit_code
+
+    return int(pytest.ExitCode.OK)
+
+
+class SummaryCollector(object):
+    """ pytest plugin to get testcase summaries of items run in worker
+    """
+
+    def __init__(self):
+        self.testcase_summaries: List[TestCaseSummary] = []
+
+    def pytest_runtest_teardown(self, item):
+        testcase_summary = get_testcase_summary(item)
+        if testcase_summary is not None:
+            self.testcase_summaries.append(testcase_summary)
+
+
+def collect_units(pytest_args: List[Text], granularity: Text) -> Tuple[int, List[Text]]:
+    """ collect units to run, returns (pytest exit code of collection, units)
+    """
+    collector = UnitsCollector(granularity)
+    # summary conftest of --save-tests is skipped in collecting, nothing has run
+    worker_env = os.environ.get(WORKER_ENV_NAME)
+    os.environ[WORKER_ENV_NAME] = "true"
+    try:
+        exit_code = pytest.main(
+            ["--collect-only", "-q", "-p", "no:cacheprovider", *pytest_args],
+            plugins=[collector],
+        )
+    finally:
+        if worker_env is None:
+            os.environ.pop(WORKER_ENV_NAME, None)
+        else:
+            os.environ[WORKER_ENV_NAME] = worker_env
+
+    return int(exit_code), collector.units
+
+
+def __init_worker(project_path: Text):
+    """ load project meta once in each worker, reused by all units run in this worker
+    """
+    os.environ[WORKER_ENV_NAME] = "true"
+    load_project_meta(project_path)
+
+
+def __run_unit(
+        unit: Text, pytest_args: List[Text]
+) -> Tuple[int, List[TestCaseSummary]]:
+    collector = SummaryCollector()
+    exit_code = pytest.main(
+        ["-p", "no:cacheprovider", *pytest_args, unit], plugins=[collector]
+    )
+    return int(exit_code), collector.testcase_summaries
+
+
+def run_in_workers(
+        test_paths: List[Text],
+        pytest_args: List[Text],
+        workers: int,
+        granularity: Text = GRANULARITY_TESTCASE,
+) -> Tuple[int, Dict]:
+    """ run tests in process pool
+
+    Args:
+        test_paths: pytest files or YAML/JSON testcase paths to run
+        pytest_args: pytest arguments except test paths
+        workers: process count
+        granularity: testcase or param
+
+    Returns:
+        tuple: (pytest exit code, merged tests summary)
+
+    """
+    if granularity not in [GRANULARITY_TESTCASE, GRANULARITY_PARAM]:
+        raise exceptions.ParamsError(
+            f"Invalid granularity: {granularity}, should be testcase or param"
+        )
+
+    start_at = time.time()
+    collect_exit_code, units = collect_units([*pytest_args, *test_paths], granularity)
+    if collect_exit_code not in [
+        int(pytest.ExitCode.OK), int(pytest.ExitCode.NO_TESTS_COLLECTED)
+    ]:
+        # e.g. errors in collection, nothing is run as running tests serially
+        logger.error(f"failed to collect units, pytest exit code: {collect_exit_code}")
+        return collect_exit_code, build_tests_summary([], start_at, time.time() - start_at)
+
+    logger.info(f"run {len(units)} units of {granularity} in {workers} workers")
+
+    exit_codes = []
+    testcase_summaries: List[TestCaseSummary] = []
+    with ProcessPoolExecutor(
+            max_workers=workers, initializer=__init_worker, initargs=(test_paths[0],)
+    ) as executor:
+        # units are submitted one by one, idle worker takes the next one
+        futures = [executor.submit(__run_unit, unit, pytest_args) for unit in units]
+        for future in futures:
+            exit_code, unit_summaries = future.result()
+            exit_codes.append(exit_code)
+            testcase_summaries.extend(unit_summaries)
+
+    summary = build_tests_summary(
+        testcase_summaries, start_at, time.time() - start_at
+    )
+    if not units:
+        return int(pytest.ExitCode.NO_TESTS_COLLECTED), summary
+
+    return merge_exit_codes(exit_codes), summary
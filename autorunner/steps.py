@@ -0,0 +1,256 @@
+""" step logic shared by AutoRunner and AsyncAutoRunner.
+
+Runners differ only in how requests are sent and referenced testcases are run, variables, hooks,
+request parsing, extract, export and wait_until backoff are the same:
+
+    method, url, request_dict = prepare_request(step, config, functions, case_id)
+    resp = session.request(method, url, **request_dict)           # or await in async runner
+    resp_obj = ResponseObject(resp)
+    extract_variables(step, resp_obj, functions)
+"""
+
+import copy
+import os
+import time
+from typing import Dict, List, Text, Tuple, Union
+
+from loguru import logger
+
+from autorunner import exceptions, utils
+from autorunner.ext.uploader import prepare_upload_step
+from autorunner.models import (
+    FunctionsMapping,
+    Hooks,
+    ProjectMeta,
+    TConfig,
+    TStep,
+    TWaitUntil,
+    VariablesMapping,
+)
+from autorunner.parser import build_url, parse_data, parse_variables_mapping
+from autorunner.response import ResponseObject
+from autorunner.utils import merge_variables
+
+
+def call_hooks(
+        hooks: Hooks,
+        step_variables: VariablesMapping,
+        hook_msg: Text,
+        functions: FunctionsMapping,
+):
+    """ call hook actions.
+
+    Args:
+        hooks (list): each hook in hooks list maybe in two format.
+
+            format1 (str): only call hook functions.
+                ${func()}
+            format2 (dict): assignment, the value returned by hook function will be assigned to variable.
+                {"var": "${func()}"}
+
+        step_variables: current step variables to call hook, include two special variables
+
+            request: parsed request dict
+            response: ResponseObject for current response
+
+        hook_msg: setup/teardown request/testcase
+        functions: functions of debugtalk.py
+
+    """
+    logger.info("call hook actions: {}", hook_msg)
+
+    if not isinstance(hooks, List):
+        logger.error(f"Invalid hooks format: {hooks}")
+        return
+
+    for hook in hooks:
+        if isinstance(hook, Text):
+            # format 1: ["${func()}"]
+            logger.debug("call hook function: {}", hook)
+            parse_data(hook, step_variables, functions)
+        elif isinstance(hook, Dict) and len(hook) == 1:
+            # format 2: {"var": "${func()}"}
+            var_name, hook_content = list(hook.items())[0]
+            hook_content_eval = parse_data(hook_content, step_variables, functions)
+            logger.debug(
+                "call hook function: {}, got value: {}", hook_content, hook_content_eval
+            )
+            logger.debug("assign variable: {} = {}", var_name, hook_content_eval)
+            step_variables[var_name] = hook_content_eval
+        else:
+            logger.error(f"Invalid hook format: {hook}")
+
+
+def parse_config(
+        config: TConfig, session_variables: VariablesMapping, functions: FunctionsMapping
+):
+    """ parse config variables, name and base_url, session variables override config variables
+    """
+    config.variables.update(session_variables)
+    config.variables = parse_variables_mapping(config.variables, functions)
+    config.name = parse_data(config.name, config.variables, functions)
+    config.base_url = parse_data(config.base_url, config.variables, functions)
+
+
+def parse_step_variables(
+        step: TStep,
+        extracted_variables: VariablesMapping,
+        config: TConfig,
+        functions: FunctionsMapping,
+):
+    """ override and parse step variables before running step
+    """
+    # step variables > extracted variables from previous steps
+    step.variables = merge_variables(step.variables, extracted_variables)
+    # step variables > testcase config variables
+    step.variables = merge_variables(step.variables, config.variables)
+
+    # parse variables
+    step.variables = parse_variables_mapping(step.variables, functions)
+
+
+def prepare_request(
+        step: TStep, config: TConfig, functions: FunctionsMapping, case_id: Text
+) -> Tuple[Text, Text, Dict]:
+    """ parse request of step and call setup hooks, returns method, url and arguments of request
+    """
+    prepare_upload_step(step, functions)
+    # shallow copy, static request body is parsed as-is instead of copied on every run
+    request_dict = dict(step.request)
+    request_dict.pop("upload", None)
+    parsed_request_dict = parse_data(request_dict, step.variables, functions, share_static=True)
+    if step.setup_hooks or step.teardown_hooks:
+        # request is exposed to hooks as $request, changes of hooks should not be
+        # made to static parts shared with step.request
+        parsed_request_dict = copy.deepcopy(parsed_request_dict)
+    # static headers are shared with step.request, copy before adding request id
+    parsed_request_dict["headers"] = dict(parsed_request_dict["headers"])
+    parsed_request_dict["headers"].setdefault(
+        "HRUN-Request-ID",
+        f"HRUN-{case_id}-{str(int(time.time() * 1000))[-6:]}",
+    )
+    step.variables["request"] = parsed_request_dict
+
+    # setup hooks
+    if step.setup_hooks:
+        call_hooks(step.setup_hooks, step.variables, "setup request", functions)
+
+    # prepare arguments
+    method = parsed_request_dict.pop("method")
+    url_path = parsed_request_dict.pop("url")
+    url = build_url(config.base_url, url_path)
+    parsed_request_dict["verify"] = config.verify
+    parsed_request_dict["json"] = parsed_request_dict.pop("req_json", {})
+    return method, url, parsed_request_dict
+
+
+def log_req_resp_details(method: Text, url: Text, request_dict: Dict, resp):
+    """ log request and response details when validation failed
+    """
+    err_msg = "\n{} DETAILED REQUEST & RESPONSE {}\n".format("*" * 32, "*" * 32)
+
+    # log request
+    err_msg += "====== request details ======\n"
+    err_msg += f"url: {url}\n"
+    err_msg += f"method: {method}\n"
+    request_dict = dict(request_dict)
+    headers = request_dict.pop("headers", {})
+    err_msg += f"headers: {headers}\n"
+    for k, v in request_dict.items():
+        v = utils.omit_long_data(v)
+        err_msg += f"{k}: {repr(v)}\n"
+
+    err_msg += "\n"
+
+    # log response
+    err_msg += "====== response details ======\n"
+    err_msg += f"status_code: {resp.status_code}\n"
+    err_msg += f"headers: {resp.headers}\n"
+    err_msg += f"body: {repr(resp.text)}\n"
+    logger.error(err_msg)
+
+
+def extract_variables(
+        step: TStep, resp_obj: ResponseObject, functions: FunctionsMapping
+) -> VariablesMapping:
+    """ extract variables from response, extracted variables are updated to step variables
+    """
+    extract_mapping = resp_obj.extract(step.extract, step.variables, functions)
+    step.variables.update(extract_mapping)
+    return extract_mapping
+
+
+def get_ref_testcase_path(step: TStep, project_meta: ProjectMeta) -> Text:
+    """ absolute path of referenced testcase file, relative to project root directory
+    """
+    if os.path.isabs(step.testcase):
+        return step.testcase
+
+    return os.path.join(project_meta.RootDir, step.testcase)
+
+
+def get_export_variables(
+        export_var_names: List[Text], session_variables: VariablesMapping
+) -> Dict:
+    export_vars_mapping = {}
+    for var_name in export_var_names:
+        if var_name not in session_variables:
+            raise exceptions.ParamsError(
+                f"failed to export variable {var_name} from session variables {session_variables}"
+            )
+
+        export_vars_mapping[var_name] = session_variables[var_name]
+
+    return export_vars_mapping
+
+
+def get_retry_after(step: TStep, max_interval: float) -> Union[float, None]:
+    """ seconds of Retry-After header of step response, no more than max interval
+    """
+    resp_obj = step.variables.get("response")
+    if not isinstance(resp_obj, ResponseObject):
+        return None
+
+    try:
+        retry_after = float(resp_obj.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+    return min(max(retry_after, 0), max_interval) or None
+
+
+class WaitUntilBackoff(object):
+    """ backoff of running step again until validators pass, attempts exceed or deadline reached
+    """
+
+    def __init__(self, wait_until: TWaitUntil):
+        self.wait_until = wait_until
+        self.deadline = time.monotonic() + wait_until.timeout
+        self.interval = wait_until.interval
+        self.attempts = 0
+        self.wait_seconds = 0.0
+
+    def next_delay(self, step: TStep) -> Union[float, None]:
+        """ seconds to wait before next attempt, None if no more attempts
+        """
+        # Retry-After of response overrides backoff interval, never wait beyond deadline
+        delay = min(
+            get_retry_after(step, self.wait_until.max_interval) or self.interval,
+            self.deadline - time.monotonic(),
+        )
+        if delay <= 0 or (
+                self.wait_until.max_attempts and self.attempts >= self.wait_until.max_attempts
+        ):
+            logger.error(
+                f"validators not passed after {self.attempts} attempts, waited {self.wait_seconds:.2f}s"
+            )
+            return None
+
+        logger.warning(
+            "validators not passed in attempt {}, run step again in {:.2f}s", self.attempts, delay
+        )
+        self.wait_seconds += delay
+        self.interval = min(
+            self.interval * self.wait_until.backoff, self.wait_until.max_interval
+        )
+        return delay
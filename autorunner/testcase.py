@@ -1,12 +1,12 @@
 import inspect
-from typing import Text, Any, Union, Callable, List
+from typing import Text, Any, Union, Callable, List, Dict
 
 from autorunner.models import (
     TConfig,
     TStep,
     TRequest,
     MethodEnum,
-    TestCase, TUiLocation, StepTypeEnum, SqlData,
+    TestCase, TUiLocation, StepTypeEnum, SqlData, TWaitUntil,
 )
 
 
@@ -19,6 +19,9 @@ class Config(object):
         self.__export = []
         self.__weight = 1
         self.__datasource = ""
+        self.__rollback = False
+        self.__async_sql = False
+        self.__parallel_steps = 0
 
         caller_frame = inspect.stack()[1]
         self.__path = caller_frame.filename
@@ -35,8 +38,13 @@ class Config(object):
     def weight(self) -> int:
         return self.__weight
 
-    def datasource(self, datasource: Text) -> "Config":
+    def datasource(self, datasource: Text, rollback: bool = False) -> "Config":
         self.__datasource = datasource
+        self.__rollback = rollback
+        return self
+
+    def async_sql(self, enabled: bool = True) -> "Config":
+        self.__async_sql = enabled
         return self
 
     def variables(self, **variables) -> "Config":
@@ -59,6 +67,10 @@ class Config(object):
         self.__weight = weight
         return self
 
+    def parallel_steps(self, max_workers: int) -> "Config":
+        self.__parallel_steps = max_workers
+        return self
+
     def perform(self) -> TConfig:
         return TConfig(
             name=self.__name,
@@ -69,6 +81,9 @@ class Config(object):
             path=self.__path,
             weight=self.__weight,
             datasource=self.__datasource,
+            rollback=self.__rollback,
+            async_sql=self.__async_sql,
+            parallel_steps=self.__parallel_steps,
         )
 
 
@@ -301,6 +316,23 @@ class RequestWithOptionalArgs(object):
 
         return self
 
+    def wait_until(
+            self,
+            timeout: float = 60,
+            max_attempts: int = 0,
+            interval: float = 0.5,
+            backoff: float = 2,
+            max_interval: float = 10,
+    ) -> "RequestWithOptionalArgs":
+        self.__step_context.wait_until = TWaitUntil(
+            timeout=timeout,
+            max_attempts=max_attempts,
+            interval=interval,
+            backoff=backoff,
+            max_interval=max_interval,
+        )
+        return self
+
     def sql(self) -> "SqlWithOptionalArgs":
         self.__step_context.sql = []
         return SqlWithOptionalArgs(self.__step_context)
@@ -341,19 +373,38 @@ class SqlWithOptionalArgs(object):
         self.sql_data['datasource'] = name
         return self
 
+    def stream(self, batch_size: int = 1000) -> "SqlWithOptionalArgs":
+        self.sql_data.update({"stream": True, "batch_size": batch_size})
+        return self
+
+    def columns(self, *columns: str) -> "SqlWithOptionalArgs":
+        self.sql_data["columns"] = list(columns)
+        return self
+
+    def count_as(self, var_name: str) -> "SqlWithOptionalArgs":
+        self.sql_data["count_as"] = var_name
+        return self
+
+    def cache(self, ttl: float = None) -> "SqlWithOptionalArgs":
+        self.sql_data.update({"cache": True, "cache_ttl": ttl})
+        return self
+
+    def params(self, params: Union[Dict, List[Dict], Text]) -> "SqlWithOptionalArgs":
+        self.sql_data["params"] = params
+        return self
+
     def dml(self, dml: str) -> "SqlWithOptionalArgs":
         self.dml_list.append(dml)
         self.sql_data.update({"dml": self.dml_list})
         sql_data = SqlData(**self.sql_data)
         sql_datas = self.__step_context.sql
-        if len(sql_datas) == 0:
-            sql_datas.append(sql_data)
-        else:
-            for s in sql_datas:
-                if self.sql_data['datasource'] in s.datasource:
-                    # 删除已存在的，重新赋值
-                    sql_datas.remove(s)
-                    sql_datas.append(sql_data)
+        for s in sql_datas:
+            if self.sql_data['datasource'] in s.datasource:
+                # 删除已存在的，重新赋值
+                sql_datas.remove(s)
+                break
+        # 不同数据源，新增
+        sql_datas.append(sql_data)
         return self
 
     def extract(self) -> StepRequestExtraction:
@@ -16,74 +16,76 @@ from selenium.webdriver.remote.webelement import WebElement
 from autorunner import exceptions
 from autorunner.exceptions import ValidationFailure, ParamsError, FunctionNotFound
 from autorunner.models import VariablesMapping, Validators, FunctionsMapping, TUiLocation
-from autorunner.parser import parse_data, parse_string_value, get_mapping_function
+from autorunner.response import (COMPARATOR_ALIASES, ValidatorPlan,
+                                 validator_plan_registry)
 from autorunner.uicore.driver import AutoDriver
 from autorunner.uicore.web_action import Action
 
 
+""" comparator aliases of ui validators and their uniform names
+"""
+ELEMENT_COMPARATOR_ALIASES = {
+    **COMPARATOR_ALIASES,
+    # 包含 expect_value
+    "cont": "contains",
+    "contains": "contains",
+    # expect_value 包含check_value
+    "cont_by": "contained_by",
+    "contained_by": "contained_by",
+}
+
+
 def get_uniform_comparator(comparator: Text):
     """
     convert comparator alias to uniform name
     """
-    if comparator in ["eq", "equals", "equal"]:
-        return "equal"
-    elif comparator in ["lt", "less_than"]:
-        return "less_than"
-    elif comparator in ["le", "less_or_equals"]:
-        return "less_or_equals"
-    elif comparator in ["gt", "greater_than"]:
-        return "greater_than"
-    elif comparator in ["ge", "greater_or_equals"]:
-        return "greater_or_equals"
-    elif comparator in ["ne", "not_equal"]:
-        return "not_equal"
-    elif comparator in ["str_eq", "string_equals"]:
-        return "string_equals"
-    elif comparator in ["len_eq", "length_equal"]:
-        return "length_equal"
-    elif comparator in [
-        "len_gt",
-        "length_greater_than",
-    ]:
-        return "length_greater_than"
-    elif comparator in [
-        "len_ge",
-        "length_greater_or_equals",
-    ]:
-        return "length_greater_or_equals"
-    elif comparator in ["len_lt", "length_less_than"]:
-        return "length_less_than"
-    elif comparator in [
-        "len_le",
-        "length_less_or_equals",
-    ]:
-        return "length_less_or_equals"
-    elif comparator in [
-        "cont",
-        "contains",
-    ]:
-        # 包含 expect_value
-        return "contains"
-    elif comparator in [
-        "cont_by",
-        "contained_by",
-    ]:
-        # expect_value 包含check_value
-        return "contained_by"
-    elif comparator in [
-        "startswith",
-    ]:
-        return "startswith"
-    elif comparator in [
-        "endswith",
-    ]:
-        return "endswith"
-    elif comparator in [
-        "regex_match",
-    ]:
-        return "regex_match"
-    else:
-        return comparator
+    return ELEMENT_COMPARATOR_ALIASES.get(comparator, comparator)
+
+
+class ElementValidatorPlan(ValidatorPlan):
+    """ui校验器编译一次后复用，每次执行只定位元素"""
+
+    def __init__(self, validator: Dict):
+        super().__init__(validator)
+        comparator = list(validator.keys())[0]
+        self.compare_values = validator[comparator]
+        self.ui_location = TUiLocation.model_validate(self.compare_values)
+        self.action = 'finds' if not self.ui_location.action else self.ui_location.action
+        if not hasattr(Action, self.action):
+            funcs = [w for w in dir(Action) if callable(getattr(Action, w)) and not w.startswith("__")]
+            logger.error(f'action: {self.action}, 操作方法不存在以下列表中:{funcs}')
+            raise AttributeError(f'action: {self.action}, 操作方法不存在以下列表中:{funcs}')
+
+    @staticmethod
+    def uniform(validator: Dict) -> Dict:
+        if not isinstance(validator, dict) or len(validator) != 1:
+            raise ParamsError(f"invalid validator: {validator}")
+
+        # format2
+        comparator = list(validator.keys())[0]
+        compare_values = validator[comparator]
+
+        if not isinstance(compare_values, dict) or len(compare_values) not in [3, 4, 5]:
+            raise ParamsError(f"invalid validator: {validator}")
+        check_item, expect_value = None, None
+        for key, value in compare_values.items():
+            if str(key).lower() in ['by', 'value', 'msg', 'action']:
+                continue
+            check_item = str(key)
+            expect_value = value
+
+        message = "" if 'msg' not in compare_values else compare_values['msg']
+
+        return {
+            "check": check_item,
+            "expect": expect_value,
+            # uniform comparator, e.g. lt => less_than, eq => equals
+            "assert": get_uniform_comparator(comparator),
+            "message": message,
+        }
+
+    def find_elements(self, driver: AutoDriver) -> List[WebElement]:
+        return getattr(Action, self.action)(driver, self.ui_location)
 
 
 class ElementObj:
@@ -95,48 +97,18 @@ class ElementObj:
         self.validation_results: Dict = {}
 
     def uniform_validator_element(self, validator):
-        if not isinstance(validator, dict):
-            raise ParamsError(f"invalid validator: {validator}")
-
-        if len(validator) == 1:
-            # format2
-            comparator = list(validator.keys())[0]
-            compare_values = validator[comparator]
-
-            if not isinstance(compare_values, dict) or len(compare_values) not in [3, 4, 5]:
-                raise ParamsError(f"invalid validator: {validator}")
-            check_item, expect_value = None, None
-            for key, value in compare_values.items():
-                if str(key).lower() in ['by', 'value', 'msg', 'action']:
-                    continue
-                check_item = str(key)
-                expect_value = value
-
-            message = "" if 'msg' not in compare_values else compare_values['msg']
-
-            ui_location_obj = TUiLocation.model_validate(compare_values)
-            action = 'finds' if not ui_location_obj.action else ui_location_obj.action
-            if not hasattr(Action, action):
-                funcs = [w for w in dir(Action) if callable(getattr(Action, w)) and not w.startswith("__")]
-                logger.error(f'action: {action}, 操作方法不存在以下列表中:{funcs}')
-                raise AttributeError(f'action: {action}, 操作方法不存在以下列表中:{funcs}')
-
-            elements = getattr(Action, action)(self.driver, ui_location_obj)
-            # logger.info(f'元素定位查询结果：{[vars(element) for element in elements]}')
-        else:
-            raise ParamsError(f"invalid validator: {validator}")
-
-        # uniform comparator, e.g. lt => less_than, eq => equals
-        assert_method = get_uniform_comparator(comparator)
-        self.__check_item = check_item
+        plan = ElementValidatorPlan(validator)
+        elements = plan.find_elements(self.driver)
+        # logger.info(f'元素定位查询结果：{[vars(element) for element in elements]}')
+        self.__check_item = plan.check
         return {
-            "check": check_item,
-            "expect": expect_value,
-            "assert": assert_method,
-            "message": message,
+            "check": plan.check,
+            "expect": plan.expect,
+            "assert": plan.assert_method,
+            "message": plan.message,
             "elements": elements,
             # make.py中使用
-            "compare_values": compare_values,
+            "compare_values": plan.compare_values,
         }
 
     def get_element_check_value(self, elements: List[WebElement]):
@@ -188,33 +160,34 @@ class ElementObj:
         validate_pass = True
         failures = []
 
-        for v in validators:
+        self.validation_results["validate_extractor"] = []
 
-            if "validate_extractor" not in self.validation_results:
-                self.validation_results["validate_extractor"] = []
+        # 校验器首次执行时编译，参数化和压测多次执行时复用
+        plans = validator_plan_registry.get_plans(validators, ElementValidatorPlan)
 
-            u_validator = self.uniform_validator_element(v)
+        for plan in plans:
+            v = plan.validator
 
             # check item
-            check_item = u_validator["check"]
-            elements = list(u_validator["elements"])
+            check_item = plan.check
+            self.__check_item = check_item
+            elements = list(plan.find_elements(self.driver))
 
             check_value = self.get_element_check_value(elements)
 
             # comparator
-            assert_method = u_validator["assert"]
+            assert_method = plan.assert_method
 
-            assert_func = get_mapping_function(assert_method, functions_mapping)
+            assert_func = plan.get_assert_func(functions_mapping)
 
             # expect item
-            expect_item = u_validator["expect"]
+            expect_item = plan.expect
             # parse expected value with config/teststep/extracted variables
-            expect_value = parse_data(expect_item, variables_mapping, functions_mapping)
+            expect_value = plan.get_expect_value(variables_mapping, functions_mapping)
 
             # message
-            message = u_validator["message"]
             # parse message with config/teststep/extracted variables
-            message = parse_data(message, variables_mapping, functions_mapping)
+            message = plan.get_message(variables_mapping, functions_mapping)
 
             validate_msg = f"assert {check_value} {assert_method} {expect_value}({type(expect_value).__name__})"
             validator_dict = {
@@ -1,13 +1,16 @@
 import collections
+import collections.abc
 import copy
+import functools
 import itertools
 import json
+import operator
 import os
 import os.path
 import platform
 import uuid
 from multiprocessing import Queue
-from typing import Any, Dict, List, Text
+from typing import Any, Dict, Iterator, List, Text
 
 import requests
 import sentry_sdk
@@ -278,23 +281,115 @@ def is_support_multiprocessing() -> bool:
         return False
 
 
-def gen_cartesian_product(*args: List[Dict]) -> List[Dict]:
-    """ generate cartesian product for lists
+class CartesianProduct(collections.abc.Sequence):
+    """ lazy cartesian product of parameter lists, each combination is merged on demand.
+        supports len(), indexed access, slicing and iteration, in the same order as itertools.product.
+
+    Examples:
+
+        >>> product = CartesianProduct([{"a": 1}, {"a": 2}], [{"x": 111}, {"x": 121}])
+        >>> len(product)
+            4
+        >>> product[1]
+            {'a': 1, 'x': 121}
+        >>> list(product.shard(1, 2))
+            [{'a': 2, 'x': 111}, {'a': 2, 'x': 121}]
+
+    """
+
+    def __init__(self, *args: List[Dict], indexes: range = None):
+        self.__factors = args
+        if indexes is None:
+            # math.prod is not available in Python 3.7
+            total = functools.reduce(operator.mul, (len(factor) for factor in args), 1) if args else 0
+            indexes = range(total)
+        self.__indexes = indexes
+
+    def __len__(self) -> int:
+        return len(self.__indexes)
+
+    def __merge(self, index: int) -> Dict:
+        items = []
+        for factor in reversed(self.__factors):
+            index, factor_index = divmod(index, len(factor))
+            items.append(factor[factor_index])
+
+        product_item_dict = {}
+        for item in reversed(items):
+            product_item_dict.update(item)
+
+        return product_item_dict
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return CartesianProduct(*self.__factors, indexes=self.__indexes[index])
+
+        return self.__merge(self.__indexes[index])
+
+    def __iter__(self) -> Iterator[Dict]:
+        if not self.__factors or self.__indexes.step != 1:
+            for index in self.__indexes:
+                yield self.__merge(index)
+            return
+
+        product_iter = itertools.islice(
+            itertools.product(*self.__factors),
+            self.__indexes.start,
+            self.__indexes.stop,
+        )
+        for product_item_tuple in product_iter:
+            product_item_dict = {}
+            for item in product_item_tuple:
+                product_item_dict.update(item)
+
+            yield product_item_dict
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (list, tuple, CartesianProduct)):
+            return len(self) == len(other) and list(self) == list(other)
+
+        return NotImplemented
+
+    def __repr__(self) -> Text:
+        return f"<CartesianProduct length={len(self)}>"
+
+    def shard(self, shard_index: int, shard_count: int) -> "CartesianProduct":
+        """ get deterministic contiguous slice for shard_index of shard_count shards
+        """
+        shard_range = get_shard_range(len(self), shard_index, shard_count)
+        return self[shard_range.start:shard_range.stop]
+
+
+def get_shard_range(length: int, shard_index: int, shard_count: int) -> range:
+    """ get deterministic contiguous range of indexes for shard_index of shard_count shards
+    """
+    if shard_count < 1 or not 0 <= shard_index < shard_count:
+        raise exceptions.ParamsError(
+            f"invalid shard: {shard_index} of {shard_count}, shard index should be in [0, {shard_count})"
+        )
+
+    start = length * shard_index // shard_count
+    stop = length * (shard_index + 1) // shard_count
+    return range(start, stop)
+
+
+def gen_cartesian_product(*args: List[Dict]) -> CartesianProduct:
+    """ generate cartesian product for lists, combinations are computed lazily
 
     Args:
         args (list of list): lists to be generated with cartesian product
 
     Returns:
-        list: cartesian product in list
+        CartesianProduct: lazy sequence of cartesian product
 
     Examples:
 
         >>> arg1 = [{"a": 1}, {"a": 2}]
         >>> arg2 = [{"x": 111, "y": 112}, {"x": 121, "y": 122}]
         >>> args = [arg1, arg2]
-        >>> gen_cartesian_product(*args)
+        >>> list(gen_cartesian_product(*args))
         >>> # same as below
-        >>> gen_cartesian_product(arg1, arg2)
+        >>> list(gen_cartesian_product(arg1, arg2))
             [
                 {'a': 1, 'x': 111, 'y': 112},
                 {'a': 1, 'x': 121, 'y': 122},
@@ -303,17 +398,4 @@ def gen_cartesian_product(*args: List[Dict]) -> List[Dict]:
             ]
 
     """
-    if not args:
-        return []
-    elif len(args) == 1:
-        return args[0]
-
-    product_list = []
-    for product_item_tuple in itertools.product(*args):
-        product_item_dict = {}
-        for item in product_item_tuple:
-            product_item_dict.update(item)
-
-        product_list.append(product_item_dict)
-
-    return product_list
+    return CartesianProduct(*args)
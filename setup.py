@@ -31,6 +31,11 @@ setup(
         'pymysql==1.1.1',
         'black==24.10.0'
     ],
+    extras_require={
+        'async': ['aiohttp~=3.10'],
+        'async-db': ['greenlet', 'aiomysql'],
+        'json': ['orjson'],
+    },
     entry_points={
         'console_scripts': [
             'har2case=autorunner.cli:main_har2case_alias',
@@ -38,6 +43,9 @@ setup(
             'arun=autorunner.cli:main_hrun_alias',
             'autorunner=autorunner.cli:main',
             'locusts=autorunner.ext.locust:main_locusts'
+        ],
+        'pytest11': [
+            'autorunner.ext.pytest_plugin=autorunner.ext.pytest_plugin'
         ]
     }
 )
\ No newline at end of file
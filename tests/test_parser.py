@@ -0,0 +1,50 @@
+from autorunner.models import TConfig, TestCase
+from autorunner.parser import parse_data, parse_variables_mapping
+from autorunner.plan import compile_testcase
+
+
+def stamp(payload):
+    """ function changing its argument """
+    payload["n"] = len(payload)
+    return payload["n"]
+
+
+def test_parse_data_copies_static_containers():
+    raw_data = {"payload": {"a": 1}, "items": [1, 2]}
+    parsed_data = parse_data(raw_data)
+    assert parsed_data == raw_data
+    assert parsed_data["payload"] is not raw_data["payload"]
+    assert parsed_data["items"] is not raw_data["items"]
+
+
+def test_parse_data_shares_static_containers():
+    raw_data = {"json": {"a": 1}, "url": "/api/$id"}
+    parsed_data = parse_data(raw_data, {"id": 1}, share_static=True)
+    assert parsed_data["url"] == "/api/1"
+    assert parsed_data["json"] is raw_data["json"]
+
+
+def test_parse_variables_mapping_function_changes_argument():
+    variables = {"payload": {"a": 1}, "n": "${stamp($payload)}"}
+    for _ in range(3):
+        parsed_variables = parse_variables_mapping(dict(variables), {"stamp": stamp})
+        assert parsed_variables["n"] == 1
+        assert parsed_variables["payload"] == {"a": 1, "n": 1}
+
+    assert variables["payload"] == {"a": 1}
+
+
+def test_plan_runs_function_changes_argument():
+    testcase = TestCase(
+        config=TConfig(
+            name="stamp", variables={"payload": {"a": 1}, "n": "${stamp($payload)}"}
+        ),
+        teststeps=[],
+    )
+    plan = compile_testcase(testcase)
+    for _ in range(3):
+        config = plan.new_config()
+        config.variables = parse_variables_mapping(config.variables, {"stamp": stamp})
+        assert config.variables["n"] == 1
+
+    assert testcase.config.variables["payload"] == {"a": 1}
@@ -0,0 +1,27 @@
+from autorunner.models import TConfig, TestCase, TStep
+from autorunner.plan import compile_testcase
+
+
+def test_new_config_and_teststeps_copy_nested_variables():
+    testcase = TestCase(
+        config=TConfig(name="plan", variables={"payload": {"a": [1]}}),
+        teststeps=[
+            TStep(
+                name="step",
+                variables={"body": {"b": [2]}},
+                request={"method": "GET", "url": "/api", "params": {"c": "3"}},
+            )
+        ],
+    )
+    plan = compile_testcase(testcase)
+
+    config = plan.new_config()
+    config.variables["payload"]["a"].append(2)
+    step = plan.new_teststeps()[0]
+    step.variables["body"]["b"].append(3)
+
+    assert testcase.config.variables == {"payload": {"a": [1]}}
+    assert testcase.teststeps[0].variables == {"body": {"b": [2]}}
+    assert plan.new_config().variables == {"payload": {"a": [1]}}
+    # static request is shared by runs
+    assert plan.new_teststeps()[0].request is testcase.teststeps[0].request
@@ -0,0 +1,10 @@
+from autorunner.response import validator_plan_registry
+
+
+def test_validator_plans_compiled_again_after_in_place_change():
+    validators = [{"eq": ["status_code", 200]}]
+    plans = validator_plan_registry.get_plans(validators)
+    assert validator_plan_registry.get_plans(validators) is plans
+
+    validators[0] = {"eq": ["status_code", 201]}
+    assert validator_plan_registry.get_plans(validators)[0].expect == 201